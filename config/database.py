@@ -0,0 +1,60 @@
+"""
+Per-process database connection metrics for the POSTGRES_CONNECTIONS modes.
+
+``connection_stats()`` reports how many connections this process has opened
+and, in "pool" mode, psycopg_pool's counters: how many requests had to wait
+for a connection and for how long in total.
+"""
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_connections_created = Counter()
+
+# psycopg_pool.ConnectionPool.get_stats() keys; counters that are still zero are left out
+POOL_STATS = (
+    'pool_min', 'pool_max', 'pool_size', 'pool_available', 'requests_waiting',
+    'requests_num', 'requests_queued', 'requests_wait_ms', 'requests_errors',
+    'connections_num', 'connections_ms', 'connections_errors', 'connections_lost',
+)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    # Sent on every connect(); in pool mode that is every checkout from the pool
+    with _lock:
+        _connections_created[connection.alias] += 1
+
+
+def get_pool(alias=DEFAULT_DB_ALIAS):
+    """The psycopg pool behind ``alias``, or ``None`` when it isn't pooled."""
+    return getattr(connections[alias], 'pool', None)
+
+
+def connection_stats(alias=DEFAULT_DB_ALIAS):
+    stats = {
+        'mode': getattr(settings, 'POSTGRES_CONNECTIONS', None),
+        'conn_max_age': connections[alias].settings_dict['CONN_MAX_AGE'],
+        'connections_created': _connections_created[alias],
+    }
+    pool = get_pool(alias)
+    if pool is not None:
+        pool_stats = pool.get_stats()
+        stats.update({key: pool_stats.get(key, 0) for key in POOL_STATS})
+        queued = stats['requests_queued']
+        stats['requests_wait_ms_avg'] = stats['requests_wait_ms'] / queued if queued else 0.0
+    return stats
+
+
+def reset_connection_stats(alias=DEFAULT_DB_ALIAS):
+    """Start counting afresh (the pool's own counters are reset by ``pop_stats()``)."""
+    with _lock:
+        _connections_created.pop(alias, None)
+    pool = get_pool(alias)
+    if pool is not None:
+        pool.pop_stats()
@@ -42,8 +42,18 @@ def custom_exception_handler(exc, context):
             
         response.data = custom_response_data
         
-        # Log the error for debugging
-        logger.error(f"API Error: {exc}", exc_info=True)
+        # Client errors (validation, 401/403/404...) are routine: log them
+        # cheaply, without a traceback; keep the traceback for server errors
+        request = context.get('request')
+        extra = {
+            'status_code': response.status_code,
+            'method': getattr(request, 'method', None),
+            'path': getattr(request, 'path', None),
+        }
+        if response.status_code >= 500:
+            logger.error("API Error: %s", exc, exc_info=True, extra=extra)
+        else:
+            logger.info("API Error: %s", exc, extra=extra)
     
     return response
 
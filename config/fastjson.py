@@ -0,0 +1,106 @@
+"""
+JSON renderer and parser backed by orjson when it is installed.
+
+Opt in with FAST_JSON=True (see REST_FRAMEWORK in settings). Output matches
+DRF's compact JSONRenderer byte for byte for the data this API returns,
+including the success/error envelope built in ``config.exceptions``; without
+orjson both classes fall back to DRF's stdlib implementation.
+"""
+import codecs
+import decimal
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+_stdlib_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Decimals as numbers, like DRF's encoder; anything else orjson doesn't
+    # know (lazy strings, querysets, timedeltas...) goes through DRF's encoder
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    return _stdlib_encoder.default(obj)
+
+
+def _escape_separators(content):
+    # Same as DRF: keep the output a strict JavaScript subset
+    if b'\xe2\x80' in content:
+        content = content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+    return content
+
+
+def dumps(data):
+    """Compact UTF-8 JSON for ``data`` as bytes."""
+    if orjson is None:
+        return FastJSONRenderer.fallback.render(data)
+    return _escape_separators(orjson.dumps(data, default=_default, option=ORJSON_OPTIONS))
+
+
+def iter_json_array(batches):
+    """
+    Encode an iterable of lists as one JSON array, a chunk of bytes per batch,
+    so large result sets can be streamed without building the whole document.
+    """
+    yield b'['
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        chunk = b','.join(dumps(item) for item in batch)
+        yield chunk if first else b',' + chunk
+        first = False
+    yield b']'
+
+
+def iter_json_lines(batches):
+    """Encode an iterable of lists as newline-delimited JSON, a chunk per batch."""
+    for batch in batches:
+        yield b''.join(dumps(item) + b'\n' for item in batch)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` using orjson for compact output; indented output (the
+    browsable API, ``Accept: application/json; indent=4``) stays on the stdlib.
+    """
+    fallback = JSONRenderer()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` using orjson; rejects NaN and Infinity like DRF's strict mode."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            if codecs.lookup(encoding).name == 'utf-8':
+                return orjson.loads(stream.read())
+            return orjson.loads(codecs.getreader(encoding)(stream).read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
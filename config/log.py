@@ -0,0 +1,135 @@
+"""
+Logging pipeline: request threads only put records on a queue; a background
+thread formats them (tracebacks included) and writes them to the real
+handlers. Also a JSON-lines formatter and the file handler picked by
+LOG_ROTATION. Wired up in ``LOGGING`` (config/settings.py).
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+# LogRecord attributes; anything else on a record came in through ``extra``
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _get_handler(name):
+    # logging.getHandlerByName() on Python 3.12+
+    getter = getattr(logging, 'getHandlerByName', None)
+    return getter(name) if getter else logging._handlers.get(name)
+
+
+class BackgroundHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the ``handlers`` named in LOGGING through a bounded queue,
+    written by one background thread.
+
+    The calling thread doesn't format anything beyond ``msg % args``; when the
+    queue is full the record is dropped and counted in ``dropped`` rather than
+    blocking the request.
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.handler_names = handlers
+        self.listener = None
+        self.listener_pid = None
+        self.dropped = 0
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def start(self):
+        # Named handlers are configured alongside this one: resolve them on first use
+        with self._lock:
+            if self.listener_pid != os.getpid():
+                # Not started yet, or started in a parent process (a preforking
+                # server) whose writer thread didn't survive the fork
+                self.queue = queue.Queue(self.queue.maxsize)
+                self.listener = None
+            if self.listener is None:
+                self.listener_pid = os.getpid()
+                targets = [_get_handler(name) for name in self.handler_names]
+                self.listener = logging.handlers.QueueListener(
+                    self.queue, *(target for target in targets if target is not None), respect_handler_level=True
+                )
+                self.listener.start()
+
+    def stop(self):
+        with self._lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def close(self):
+        self.stop()
+        super().close()
+
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare(), leave exc_info for the writer thread to format
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self.listener_pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, source, ``extra`` fields and exception."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+def log_file_handler(filename, rotation='external', max_bytes=0, backup_count=5, when='midnight', encoding='utf-8'):
+    """
+    The handler for LOG_FILE.
+
+    ``external`` (a WatchedFileHandler) leaves rotation to logrotate or the
+    like and reopens the file once it has been moved; any number of worker
+    processes can append to it. ``size`` and ``time`` rotate in-process and
+    are for a single process only: every process rotates on its own, so with
+    several of them records go to renamed files or are lost.
+    """
+    if rotation == 'external':
+        return logging.handlers.WatchedFileHandler(filename, encoding=encoding)
+    if rotation == 'time':
+        return logging.handlers.TimedRotatingFileHandler(
+            filename, when=when, backupCount=backup_count, encoding=encoding, utc=True
+        )
+    if rotation == 'size':
+        return logging.handlers.RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding
+        )
+    raise ValueError(f"Unknown log rotation {rotation!r}")
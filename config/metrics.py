@@ -0,0 +1,366 @@
+"""
+Per-route request metrics and slow-request profiles.
+
+``RequestMetricsMiddleware`` records, for every request, the wall time, the
+number and duration of database queries, the time spent serializing (DRF and
+fast serializers, minus the queries they trigger) and the response size,
+keyed by the resolved route name (``patient-list``, ``doctor-patients``...).
+They are aggregated into in-process histograms that ``metrics_view`` serves
+in the Prometheus text format; each worker process keeps its own, so scrape
+every worker.
+
+With ``REQUEST_PROFILE_SAMPLE_RATE`` set, that fraction of sync requests runs
+under cProfile (one at a time per process); the profile is written to
+``REQUEST_PROFILE_DIR`` when the request took at least
+``REQUEST_PROFILE_THRESHOLD_MS``.
+"""
+import bisect
+import contextvars
+import cProfile
+import hmac
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from config.database import POOL_STATS, connection_stats
+from config.log import BackgroundHandler
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current_metrics = contextvars.ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+_profile_lock = threading.Lock()
+
+
+class RequestMetrics:
+    """Measurements of one request, shared by every thread that serves it."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.response_bytes = 0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, **extra):
+    pairs = [*zip(names, values), *extra.items()]
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labels=('route', 'method')):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.label_names = labels
+        self.series = {}  # label values -> [count per bucket..., count above the last, sum]
+
+    def observe(self, label_values, value):
+        with _lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with _lock:
+            series = {label_values: list(values) for label_values, values in self.series.items()}
+        for label_values, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, label_values, le=float(bound))} {cumulative}')
+            count = cumulative + values[-2]
+            lines.append(f'{self.name}_bucket{_labels(self.label_names, label_values, le="+Inf")} {count}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, label_values)} {values[-1]}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, label_values)} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self.series = {}
+
+    def inc(self, label_values):
+        with _lock:
+            self.series[label_values] = self.series.get(label_values, 0) + 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with _lock:
+            series = dict(self.series)
+        for label_values, value in sorted(series.items()):
+            lines.append(f'{self.name}{_labels(self.label_names, label_values)} {value}')
+        return lines
+
+
+REQUESTS = Counter('http_requests_total', "Requests by route, method and status.", ('route', 'method', 'status'))
+DURATION = Histogram('http_request_duration_seconds', "Wall time of the request.", DURATION_BUCKETS)
+QUERIES = Histogram('http_request_db_queries', "Database queries per request.", QUERY_BUCKETS)
+QUERY_DURATION = Histogram('http_request_db_duration_seconds', "Time spent in database queries.", DURATION_BUCKETS)
+SERIALIZER_DURATION = Histogram(
+    'http_request_serializer_duration_seconds',
+    "Time spent in serializers, not counting the queries they run.",
+    DURATION_BUCKETS,
+)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', "Response body size.", SIZE_BUCKETS)
+METRICS = (REQUESTS, DURATION, QUERIES, QUERY_DURATION, SERIALIZER_DURATION, RESPONSE_SIZE)
+
+
+def reset_metrics():
+    with _lock:
+        for metric in METRICS:
+            metric.series.clear()
+
+
+def time_queries(execute, sql, params, many, context):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # Wrappers stay on the connection object across reconnects; install once
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+def timed_serialization(func, *args):
+    """``func(*args)``, counted as serializer time of the current request (nested calls once)."""
+    metrics = _current_metrics.get()
+    if metrics is None or metrics.serializing:
+        return func(*args)
+    metrics.serializing = True
+    query_time = metrics.query_time
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        # Lazy loads inside the serializer already count as query time
+        metrics.serializer_time += time.perf_counter() - started - (metrics.query_time - query_time)
+        metrics.serializing = False
+
+
+class TimedSerializerMixin:
+    """Count ``to_representation`` (per row for ``many=True``) towards the request's serializer time."""
+
+    def to_representation(self, instance):
+        return timed_serialization(super().to_representation, instance)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name or 'unnamed'
+
+
+def record(request, response, metrics):
+    route = route_name(request)
+    method = request.method if request.method in METHODS else 'other'
+    labels = (route, method)
+    REQUESTS.inc((route, method, str(response.status_code)))
+    DURATION.observe(labels, time.perf_counter() - metrics.started)
+    QUERIES.observe(labels, metrics.queries)
+    QUERY_DURATION.observe(labels, metrics.query_time)
+    SERIALIZER_DURATION.observe(labels, metrics.serializer_time)
+    RESPONSE_SIZE.observe(labels, metrics.response_bytes)
+
+
+def _count_bytes(content, metrics):
+    for chunk in content:
+        metrics.response_bytes += len(chunk)
+        yield chunk
+
+
+async def _acount_bytes(content, metrics):
+    async for chunk in content:
+        metrics.response_bytes += len(chunk)
+        yield chunk
+
+
+class RequestMetricsMiddleware:
+    """Measure each request into the route histograms; profile a sample of slow sync requests."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.REQUEST_METRICS:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        profiler = self.start_profiler()
+        try:
+            response = self.get_response(request)
+        except Exception:
+            _current_metrics.reset(token)
+            raise
+        finally:
+            if profiler is not None:
+                self.stop_profiler(profiler, request, metrics)
+        return self.finish(request, response, metrics, token)
+
+    async def __acall__(self, request):
+        if not settings.REQUEST_METRICS:
+            return await self.get_response(request)
+        # cProfile would see every other coroutine on the loop: async requests aren't profiled
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            _current_metrics.reset(token)
+            raise
+        return self.finish(request, response, metrics, token)
+
+    def finish(self, request, response, metrics, token):
+        if not response.streaming:
+            _current_metrics.reset(token)
+            metrics.response_bytes = len(response.content)
+            record(request, response, metrics)
+            return response
+        # The body is generated after we return: measure until it is closed
+        if response.is_async:
+            response.streaming_content = _acount_bytes(response.streaming_content, metrics)
+        else:
+            response.streaming_content = _count_bytes(response.streaming_content, metrics)
+        response._resource_closers.append(lambda: self.finish_stream(request, response, metrics))
+        return response
+
+    def finish_stream(self, request, response, metrics):
+        # close() may run in another context (ASGI), where the token can't be reset
+        _current_metrics.set(None)
+        record(request, response, metrics)
+
+    def start_profiler(self):
+        if not settings.REQUEST_PROFILE_SAMPLE_RATE or random.random() >= settings.REQUEST_PROFILE_SAMPLE_RATE:
+            return None
+        # One profiler per process at a time
+        if not _profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this process
+            _profile_lock.release()
+            return None
+        return profiler
+
+    def stop_profiler(self, profiler, request, metrics):
+        try:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - metrics.started) * 1000
+            if elapsed_ms >= settings.REQUEST_PROFILE_THRESHOLD_MS:
+                self.save_profile(profiler, request, elapsed_ms)
+        finally:
+            _profile_lock.release()
+
+    def save_profile(self, profiler, request, elapsed_ms):
+        directory = settings.REQUEST_PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        path = os.path.join(directory, f'{stamp}-{route_name(request)}-{elapsed_ms:.0f}ms-{os.getpid()}.prof')
+        profiler.dump_stats(path)
+        logger.warning(
+            "Slow request %s %s took %.0f ms; profile saved to %s", request.method, request.path, elapsed_ms, path
+        )
+        # Keep the newest REQUEST_PROFILE_MAX_FILES (names sort by time)
+        profiles = sorted(name for name in os.listdir(directory) if name.endswith('.prof'))
+        for name in profiles[:max(len(profiles) - settings.REQUEST_PROFILE_MAX_FILES, 0)]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def process_metrics():
+    """Database connection and logging counters of this process."""
+    lines = [
+        '# HELP db_connections_created_total Database connections opened (pool checkouts when pooled).',
+        '# TYPE db_connections_created_total counter',
+    ]
+    pools = []
+    for alias in settings.DATABASES:
+        stats = connection_stats(alias)
+        lines.append(f'db_connections_created_total{_labels(("alias",), (alias,))} {stats["connections_created"]}')
+        if 'pool_size' in stats:
+            pools.append((alias, stats))
+    for key in POOL_STATS if pools else ():
+        lines += [f'# HELP db_pool_{key} psycopg_pool statistic {key}.', f'# TYPE db_pool_{key} gauge']
+        lines += [f'db_pool_{key}{_labels(("alias",), (alias,))} {stats[key]}' for alias, stats in pools]
+    dropped = sum(
+        handler.dropped for handler in logging.getLogger().handlers if isinstance(handler, BackgroundHandler)
+    )
+    lines += [
+        '# HELP log_records_dropped_total Log records dropped because the logging queue was full.',
+        '# TYPE log_records_dropped_total counter',
+        f'log_records_dropped_total {dropped}',
+    ]
+    return lines
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += process_metrics()
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; needs ``Authorization: Bearer <REQUEST_METRICS_TOKEN>``.
+    Without a token configured every scrape is refused: route names, timings
+    and pool statistics are not for the public.
+    """
+    if not settings.REQUEST_METRICS:
+        raise Http404
+    expected = settings.REQUEST_METRICS_TOKEN
+    if not expected:
+        return HttpResponseForbidden('REQUEST_METRICS_TOKEN is not set')
+    authorization = request.headers.get('Authorization', '').encode()
+    if not hmac.compare_digest(authorization, f'Bearer {expected}'.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,266 @@
+"""
+Read-replica routing.
+
+``ReplicaRoutingMiddleware`` marks each request that may read from a replica:
+safe methods (GET, HEAD, OPTIONS) from clients that haven't written in the
+last ``REPLICA_PIN_SECONDS``. ``ReplicaRouter`` sends that request's reads to
+one replica from ``DATABASE_REPLICAS`` (the same one for the whole request)
+and everything else to ``default``. Once a request writes, its remaining
+reads go to ``default`` and its client (the user of its JWT, otherwise its
+session or address) is pinned to ``default`` for ``REPLICA_PIN_SECONDS``, so
+it reads its own writes. Pins live in ``REPLICA_PIN_CACHE``, which every
+worker must share.
+
+Replicas more than ``REPLICA_MAX_LAG_SECONDS`` behind, or unreachable, are
+skipped; their lag is measured at most every ``REPLICA_LAG_CHECK_INTERVAL``
+seconds per process, and a replica whose lag isn't known yet is skipped too.
+Reads outside a request (management commands, shell) always use ``default``.
+"""
+import asyncio
+import contextvars
+import hashlib
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds a PostgreSQL standby is behind; 0 when it has replayed all it received
+POSTGRESQL_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+_request_routing = contextvars.ContextVar('request_routing', default=None)
+_lag_lock = threading.Lock()
+_lag = {}  # alias -> (checked at, lag in seconds or None when unreachable)
+_refreshing = set()  # aliases being measured by a background thread
+
+
+class RequestRouting:
+    """Routing state of one request, shared by every thread that serves it."""
+
+    def __init__(self, replica_allowed):
+        self.replica_allowed = replica_allowed
+        self.replica = None
+        self.wrote = False
+
+
+def read_from_primary():
+    """Send the rest of the current request's reads to ``default``."""
+    routing = _request_routing.get()
+    if routing is not None:
+        routing.replica_allowed = False
+
+
+def read_from_primary_after(written_at):
+    """
+    ``read_from_primary()`` if a replica may not have the write made at
+    ``written_at`` (a ``time.time()`` timestamp) yet. A replica is chosen
+    while at most ``REPLICA_MAX_LAG_SECONDS`` behind, and can fall further
+    behind until its next lag check.
+    """
+    if time.time() - written_at <= settings.REPLICA_MAX_LAG_SECONDS + settings.REPLICA_LAG_CHECK_INTERVAL:
+        read_from_primary()
+
+
+def _measure_lag(alias):
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'postgresql':
+            # No replication status to ask for (e.g. SQLite copies in development)
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRESQL_LAG_SQL)
+            lag = cursor.fetchone()[0]
+        return None if lag is None else float(lag)
+    except DatabaseError:
+        logger.warning("Replica %s is unreachable; reading from the primary", alias, exc_info=True)
+        connection.close()
+        return None
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _refresh_lag(alias):
+    try:
+        lag = _measure_lag(alias)
+        with _lag_lock:
+            _lag[alias] = (time.monotonic(), lag)
+    finally:
+        connections[alias].close()
+        with _lag_lock:
+            _refreshing.discard(alias)
+
+
+def _refresh_lag_in_background(alias):
+    with _lag_lock:
+        if alias in _refreshing:
+            return
+        _refreshing.add(alias)
+    threading.Thread(target=_refresh_lag, args=(alias,), name=f'replica-lag-{alias}', daemon=True).start()
+
+
+def replica_lag(alias):
+    """
+    Last measured lag of ``alias`` in seconds, refreshed when older than
+    ``REPLICA_LAG_CHECK_INTERVAL``; ``None`` when unreachable or not measured
+    yet. The event loop can't run queries, so there it is measured in a
+    background thread, and reads use ``default`` until the first measurement.
+    """
+    checked, lag = _lag.get(alias, (None, None))
+    now = time.monotonic()
+    if checked is None or now - checked >= settings.REPLICA_LAG_CHECK_INTERVAL:
+        if _in_event_loop():
+            _refresh_lag_in_background(alias)
+        else:
+            lag = _measure_lag(alias)
+            with _lag_lock:
+                _lag[alias] = (now, lag)
+    return lag
+
+
+def healthy_replicas():
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if (lag := replica_lag(alias)) is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+    ]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _request_routing.get()
+        if routing is None or not routing.replica_allowed or routing.wrote or not settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        if routing.replica is None:
+            replicas = healthy_replicas()
+            routing.replica = random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _request_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def _cache():
+    return caches[settings.REPLICA_PIN_CACHE]
+
+
+def _token_user_id(request):
+    """User id of the request's JWT, if it carries a valid one; checked without a query."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        return authentication.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+    except AuthenticationFailed:
+        # Malformed or invalid; the view rejects the request anyway
+        return None
+
+
+def _pin_key(request):
+    # The authenticated user, so every token and device of theirs reads their
+    # writes; anonymous and session clients by their session or address
+    user_id = _token_user_id(request)
+    if user_id is not None:
+        return f'replicas:pin:user:{user_id}'
+    client = request.COOKIES.get(settings.SESSION_COOKIE_NAME) or request.META.get('REMOTE_ADDR', '')
+    return 'replicas:pin:' + hashlib.sha256(client.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """Decide per request whether its reads may go to a replica; pin clients after writes."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = _pin_key(request)
+        routing = RequestRouting(request.method in SAFE_METHODS and not _cache().get(key))
+        token = _request_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        except Exception:
+            _request_routing.reset(token)
+            self.pin_after_write(key, routing)
+            raise
+        if response.streaming:
+            # The body is generated after we return: keep routing it until it is closed
+            response._resource_closers.append(lambda: self.finish_stream(key, routing))
+        else:
+            _request_routing.reset(token)
+            self.pin_after_write(key, routing)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        key = _pin_key(request)
+        routing = RequestRouting(request.method in SAFE_METHODS and not await _cache().aget(key))
+        token = _request_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            _request_routing.reset(token)
+            await sync_to_async(self.pin_after_write)(key, routing)
+            raise
+        if response.streaming:
+            response._resource_closers.append(lambda: self.finish_stream(key, routing))
+        else:
+            _request_routing.reset(token)
+            await sync_to_async(self.pin_after_write)(key, routing)
+        return response
+
+    def pin_after_write(self, key, routing):
+        if routing.wrote:
+            _cache().set(key, True, settings.REPLICA_PIN_SECONDS)
+
+    def finish_stream(self, key, routing):
+        # close() may run in another context (ASGI), where the token can't be reset
+        _request_routing.set(None)
+        self.pin_after_write(key, routing)
@@ -0,0 +1,183 @@
+"""
+The OpenAPI schema, generated once per code version.
+
+drf-yasg introspects every view and serializer to build the schema; that only
+changes with the code, so ``SchemaView`` serves the JSON and YAML documents
+from an artifact keyed by ``code_version()``: kept in memory, read from
+``API_SCHEMA_DIR`` (written by ``manage.py generate_schema`` at deploy time)
+or, failing both, generated on the first request and saved there. Responses
+carry a strong ETag and ``Cache-Control: max-age=API_SCHEMA_MAX_AGE``, and
+conditional requests get a 304.
+
+The schema is public and generated as an anonymous request would see it, so
+it is the same for every caller; it has no ``host`` unless
+``SWAGGER_SETTINGS['DEFAULT_API_URL']`` is set, so clients use the host that
+served it.
+"""
+import hashlib
+import logging
+import os
+import threading
+from functools import lru_cache
+from importlib import import_module
+from importlib.metadata import PackageNotFoundError, version as package_version
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_yasg import openapi
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+from rest_framework.request import Request
+
+logger = logging.getLogger(__name__)
+
+API_INFO = openapi.Info(
+    title="Healthcare Backend API",
+    default_version='v1',
+    description="A comprehensive healthcare management system API",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="bhuvan@healthcare.local"),
+    license=openapi.License(name="BSD License"),
+)
+
+# Artifact file extension per drf-yasg codec
+CODECS = {OpenAPICodecJson: 'json', OpenAPICodecYaml: 'yaml'}
+# Installed packages whose upgrades can change the schema
+SCHEMA_PACKAGES = ('Django', 'djangorestframework', 'drf-yasg', 'django-filter')
+# Settings that change the schema without changing the code: renderers and
+# parsers (FAST_JSON), authentication, pagination and the views' serializers
+SCHEMA_SETTINGS = (
+    'ROOT_URLCONF', 'INSTALLED_APPS', 'REST_FRAMEWORK', 'SWAGGER_SETTINGS', 'FAST_JSON',
+    'HEALTH_FAST_SERIALIZERS', 'HEALTH_ASYNC_VIEWS', 'JWT_STATELESS_AUTH', 'JWT_PROFILE_CLAIMS',
+)
+
+_lock = threading.Lock()
+_artifacts = {}  # (version, extension) -> (content, etag)
+
+
+def _source_dirs():
+    """The project's own packages: settings/URLconf and the apps under BASE_DIR."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    dirs = {Path(import_module(settings.ROOT_URLCONF).__file__).resolve().parent}
+    for app_config in apps.get_app_configs():
+        path = Path(app_config.path).resolve()
+        if path.is_relative_to(base_dir):
+            dirs.add(path)
+    return sorted(dirs)
+
+
+def settings_digest():
+    """Digest of the ``SCHEMA_SETTINGS`` values."""
+    digest = hashlib.sha256()
+    for name in SCHEMA_SETTINGS:
+        digest.update(f'{name}={getattr(settings, name, None)!r}\n'.encode())
+    return digest.hexdigest()[:8]
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """
+    ``API_SCHEMA_VERSION`` when set (e.g. the release's commit), otherwise a
+    digest of the project's Python sources and the versions of the packages
+    the schema is built with; either way followed by ``settings_digest()``,
+    so the same code deployed with other settings gets its own schema.
+    """
+    if settings.API_SCHEMA_VERSION:
+        return f'{settings.API_SCHEMA_VERSION}-{settings_digest()}'
+    digest = hashlib.sha256()
+    for directory in _source_dirs():
+        for path in sorted(directory.rglob('*.py')):
+            digest.update(str(path.relative_to(directory.parent)).encode())
+            digest.update(path.read_bytes())
+    for package in SCHEMA_PACKAGES:
+        try:
+            digest.update(f'{package}=={package_version(package)}'.encode())
+        except PackageNotFoundError:
+            pass
+    return f'{digest.hexdigest()[:16]}-{settings_digest()}'
+
+
+def artifact_path(extension, version=None):
+    return Path(settings.API_SCHEMA_DIR) / f'openapi-{version or code_version()}.{extension}'
+
+
+def build_schema():
+    """The schema as drf-yasg's ``Swagger`` object, as an anonymous request would see it."""
+    # Views pick serializers by request method, so they need a request to
+    # introspect; an empty url keeps its host out of the schema
+    request = Request(RequestFactory().get('/swagger.json'))
+    request.user = AnonymousUser()
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(API_INFO, url=swagger_settings.DEFAULT_API_URL or '')
+    return generator.get_schema(request=request, public=True)
+
+
+def render_schema(schema=None):
+    """``{extension: encoded schema}`` for every format served."""
+    schema = schema or build_schema()
+    return {extension: codec([]).encode(schema) for codec, extension in CODECS.items()}
+
+
+def write_artifacts(rendered, version=None):
+    """Write rendered schemas atomically; returns the paths written."""
+    paths = []
+    for extension, content in rendered.items():
+        path = artifact_path(extension, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f'.{path.name}.{os.getpid()}')
+        temporary.write_bytes(content)
+        os.replace(temporary, path)
+        paths.append(path)
+    return paths
+
+
+def get_artifact(extension):
+    """``(content, etag)`` of the schema for this code version, generating it at most once per process."""
+    key = (code_version(), extension)
+    artifact = _artifacts.get(key)
+    if artifact is not None:
+        return artifact
+    with _lock:
+        if key not in _artifacts:
+            try:
+                contents = {extension: artifact_path(extension).read_bytes()}
+            except FileNotFoundError:
+                contents = render_schema()
+                try:
+                    write_artifacts(contents)
+                except OSError:
+                    logger.warning("Could not save the OpenAPI schema to %s", settings.API_SCHEMA_DIR, exc_info=True)
+            for name, content in contents.items():
+                _artifacts[(key[0], name)] = (content, '"%s"' % hashlib.sha256(content).hexdigest()[:32])
+        return _artifacts[key]
+
+
+_SchemaView = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+
+class SchemaView(_SchemaView):
+    """drf-yasg's schema view, serving JSON and YAML from the cached artifact."""
+
+    def get(self, request, version='', format=None):
+        codec = getattr(request.accepted_renderer, 'codec_class', None)
+        if codec not in CODECS:
+            # The Swagger UI / ReDoc pages: cheap, they fetch the schema themselves
+            return super().get(request, version, format)
+
+        content, etag = get_artifact(CODECS[codec])
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+        response.headers['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.API_SCHEMA_MAX_AGE)
+        return response
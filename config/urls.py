@@ -1,22 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-# Swagger/OpenAPI schema configuration
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Healthcare Backend API",
-        default_version='v1',
-        description="A comprehensive healthcare management system API",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="bhuvan@healthcare.local"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from config.metrics import metrics_view
+from config.schema import SchemaView
 
 urlpatterns = [
     # Admin interface
@@ -26,11 +11,14 @@ urlpatterns = [
     path("api/v1/users/", include("users.urls")),
     path("api/v1/health/", include("health.urls")),
     
-    # API documentation
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # API documentation (schema cached per code version, see config.schema)
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', SchemaView.without_ui(cache_timeout=0), name='schema-json'),
+    path('swagger/', SchemaView.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('redoc/', SchemaView.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     
     # DRF browsable API
     path('api-auth/', include('rest_framework.urls')),
+    
+    # Prometheus metrics (REQUEST_METRICS)
+    path('metrics', metrics_view, name='metrics'),
 ]
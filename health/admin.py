@@ -3,13 +3,13 @@ from .models import Patient, Doctor, PatientDoctor
 
 @admin.register(Patient)
 class PatientAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "age", "gender", "created_by", "created_at")
+    list_display = ("id", "name", "age", "gender", "doctor_count", "created_by", "created_at")
     search_fields = ("name", "created_by__email")
     list_filter = ("gender", "created_at")
 
 @admin.register(Doctor)
 class DoctorAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "specialization", "email")
+    list_display = ("id", "name", "specialization", "email", "patient_count")
     search_fields = ("name", "email", "specialization")
 
 @admin.register(PatientDoctor)
@@ -0,0 +1,206 @@
+"""
+Aggregates over one user's patients and their assignments.
+
+Everything is computed by grouped queries, five in all, whose result size
+depends on the number of age buckets, genders, specializations and periods,
+not on the number of patients:
+
+- patients per (age bucket, gender): the age histogram, the gender breakdown
+  and the patient total;
+- patients per ``doctor_count`` (health.counters);
+- assignments, patients and doctors per doctor specialization;
+- new patients and new assignments per day, week or month.
+
+The result is cached per user in the ``health`` cache under the same version
+as the patient lists, so any write to the user's patients, their assignments
+or an assigned doctor invalidates it.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, F, IntegerField
+from django.db.models.functions import Cast, Trunc
+from django.utils import timezone
+
+from .cache import CACHE_ALIAS, read_from_primary_after_bump, user_cache_key, user_version
+from .models import Patient, PatientDoctor
+
+INTERVALS = ('day', 'week', 'month')
+DEFAULT_INTERVAL = 'month'
+DEFAULT_PERIODS = 12
+MAX_PERIODS = 366
+DEFAULT_AGE_BUCKET = 10
+
+
+def _period_start(now, interval, periods):
+    """Start of the oldest of ``periods`` intervals ending with the current one."""
+    now = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'day':
+        return now - timedelta(days=periods - 1)
+    if interval == 'week':
+        return now - timedelta(days=now.weekday() + 7 * (periods - 1))
+    month = now.year * 12 + now.month - 1 - (periods - 1)
+    return now.replace(year=month // 12, month=month % 12 + 1, day=1)
+
+
+def _next_period(start, interval):
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if interval == 'week':
+        return start + timedelta(days=7)
+    month = start.year * 12 + start.month
+    return start.replace(year=month // 12, month=month % 12 + 1)
+
+
+def _period_key(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def age_and_gender(patients, bucket_size):
+    """Age histogram (with a gender split per bucket), gender breakdown and total."""
+    rows = (
+        patients.order_by()
+        .annotate(bucket=Cast(F('age') / bucket_size, IntegerField()))
+        .values('bucket', 'gender')
+        .annotate(patients=Count('pk'))
+    )
+    buckets = {}
+    genders = {}
+    unknown_age = 0
+    for row in rows:
+        genders[row['gender']] = genders.get(row['gender'], 0) + row['patients']
+        if row['bucket'] is None:
+            unknown_age += row['patients']
+            continue
+        bucket = buckets.setdefault(row['bucket'], {'patients': 0, 'genders': {}})
+        bucket['patients'] += row['patients']
+        bucket['genders'][row['gender']] = row['patients']
+    return sum(genders.values()), {
+        'bucket_size': bucket_size,
+        'buckets': [
+            {
+                'from': index * bucket_size,
+                'to': (index + 1) * bucket_size - 1,
+                'patients': buckets[index]['patients'],
+                'genders': _gender_counts(buckets[index]['genders']),
+            }
+            for index in sorted(buckets)
+        ],
+        'unknown': unknown_age,
+    }, _gender_counts(genders)
+
+
+def _gender_counts(counts):
+    """``{gender: patients}`` as a list, largest first; patients without a gender have ``null``."""
+    return [
+        {'gender': gender, 'patients': count}
+        for gender, count in sorted(counts.items(), key=lambda item: (-item[1], item[0] or ''))
+    ]
+
+
+def doctors_per_patient(patients):
+    rows = patients.order_by().values('doctor_count').annotate(patients=Count('pk')).order_by('doctor_count')
+    return [{'doctors': row['doctor_count'], 'patients': row['patients']} for row in rows]
+
+
+def specialization_workload(links):
+    """Assignments, distinct patients and distinct doctors per doctor specialization."""
+    rows = (
+        links.order_by()
+        .values('doctor__specialization')
+        .annotate(
+            assignments=Count('pk'),
+            patients=Count('patient', distinct=True),
+            doctors=Count('doctor', distinct=True),
+        )
+        .order_by('-assignments', 'doctor__specialization')
+    )
+    return [
+        {
+            'specialization': row['doctor__specialization'],
+            'assignments': row['assignments'],
+            'patients': row['patients'],
+            'doctors': row['doctors'],
+        }
+        for row in rows
+    ]
+
+
+def _counts_per_period(queryset, interval, since):
+    rows = (
+        queryset.filter(created_at__gte=since)
+        .order_by()
+        .annotate(period=Trunc('created_at', interval))
+        .values('period')
+        .annotate(count=Count('pk'))
+    )
+    return {_period_key(row['period']): row['count'] for row in rows}
+
+
+def growth(patients, links, interval, periods, totals):
+    """
+    New patients and assignments per period over the last ``periods``
+    intervals, with running totals; empty periods are included.
+    """
+    since = _period_start(timezone.now(), interval, periods)
+    new_patients = _counts_per_period(patients, interval, since)
+    new_links = _counts_per_period(links, interval, since)
+    # Running totals start from what existed before the window
+    total_patients = totals['patients'] - sum(new_patients.values())
+    total_links = totals['assignments'] - sum(new_links.values())
+    series = []
+    start = since
+    for _ in range(periods):
+        key = start.date()
+        total_patients += new_patients.get(key, 0)
+        total_links += new_links.get(key, 0)
+        series.append({
+            'period': key.isoformat(),
+            'patients': new_patients.get(key, 0),
+            'assignments': new_links.get(key, 0),
+            'total_patients': total_patients,
+            'total_assignments': total_links,
+        })
+        start = _next_period(start, interval)
+    return {'interval': interval, 'since': since.isoformat(), 'periods': series}
+
+
+def patient_analytics(user, interval=DEFAULT_INTERVAL, periods=DEFAULT_PERIODS, age_bucket=DEFAULT_AGE_BUCKET):
+    """The analytics payload for ``user``'s patients."""
+    patients = Patient.objects.filter(created_by=user)
+    links = PatientDoctor.objects.filter(patient__created_by=user)
+
+    total_patients, ages, genders = age_and_gender(patients, age_bucket)
+    specializations = specialization_workload(links)
+    totals = {
+        'patients': total_patients,
+        'assignments': sum(row['assignments'] for row in specializations),
+        # A doctor has one specialization, so these add up to distinct doctors
+        'doctors': sum(row['doctors'] for row in specializations),
+    }
+    return {
+        'totals': totals,
+        'age': ages,
+        'gender': genders,
+        'doctors_per_patient': doctors_per_patient(patients),
+        'specializations': specializations,
+        'growth': growth(patients, links, interval, periods, totals),
+        'generated_at': timezone.now().isoformat(),
+    }
+
+
+def cached_patient_analytics(user, **options):
+    """``patient_analytics`` through the ``health`` cache, for HEALTH_ANALYTICS_CACHE_TIMEOUT seconds."""
+    timeout = settings.HEALTH_ANALYTICS_CACHE_TIMEOUT
+    if not timeout:
+        return patient_analytics(user, **options)
+    digest = hashlib.sha256(repr(sorted(options.items())).encode()).hexdigest()[:16]
+    key = user_cache_key('analytics', user.pk, digest)
+    data = caches[CACHE_ALIAS].get(key)
+    if data is None:
+        read_from_primary_after_bump(user_version(user.pk))
+        data = patient_analytics(user, **options)
+        caches[CACHE_ALIAS].set(key, data, timeout)
+    return data
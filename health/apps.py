@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class HealthConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "health"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        # Connection counters behind config.database.connection_stats()
+        from config import database  # noqa: F401
+        # Query timer behind the request metrics
+        from config import metrics  # noqa: F401
@@ -0,0 +1,156 @@
+"""
+Async read paths for the health viewsets.
+
+With ``HEALTH_ASYNC_VIEWS`` on, ``list`` and ``retrieve`` (and HEAD) are
+served by coroutines that authenticate, filter, paginate and fetch through
+the async ORM, so under ASGI a worker keeps serving other requests while it
+waits on the database instead of parking a thread per request. Every other
+action runs the regular sync view in a thread (``sync_to_async``).
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views.decorators.csrf import csrf_exempt
+from django_filters.filters import QuerySetRequestMixin
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import exceptions
+from rest_framework.response import Response
+
+ASYNC_ACTIONS = ('list', 'retrieve')
+
+
+class AsyncReadMixin:
+    """
+    Coroutine ``list``/``retrieve`` for a ModelViewSet, enabled by
+    ``HEALTH_ASYNC_VIEWS`` when the URLconf is loaded.
+
+    Mixins that wrap ``list``/``retrieve`` provide ``alist``/``aretrieve``
+    counterparts and call ``super()`` the same way, so this one goes last,
+    just before the viewset base.
+    """
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.HEALTH_ASYNC_VIEWS:
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            action = actions.get(request.method.lower())
+            if action is None and request.method == 'HEAD':
+                action = actions.get('get')
+            if action not in ASYNC_ACTIONS:
+                return await sync_view(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = dict(actions, head=actions.get('head', actions.get('get')))
+            for method, name in self.action_map.items():
+                setattr(self, method, getattr(self, name))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        for attribute in ('__name__', '__qualname__', '__doc__', '__module__', 'cls', 'initkwargs', 'actions'):
+            setattr(async_view, attribute, getattr(view, attribute))
+        return csrf_exempt(async_view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """``dispatch`` for the async actions; returns a rendered response."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            self.initial(request, *args, **kwargs)
+            response = await getattr(self, f'a{self.action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.render(self.response)
+
+    async def aperform_authentication(self, request):
+        """
+        Authenticate up front with each authenticator's ``aauthenticate``
+        (its sync ``authenticate`` in a thread otherwise), so ``initial()``
+        finds ``request.user`` already set.
+        """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+    def render(self, response):
+        # Render here rather than in a worker thread (what Django's handler
+        # does for template responses) and hand back a plain HttpResponse
+        if not isinstance(response, Response):
+            return response
+        response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        rendered.cookies = response.cookies
+        return rendered
+
+    async def afilter_queryset(self, queryset):
+        # Model choice filters (?created_by=, ?patient=, ?doctor=) look their
+        # value up while validating; run the backends in a thread for those
+        if self.filters_query_database(queryset):
+            return await sync_to_async(self.filter_queryset)(queryset)
+        return self.filter_queryset(queryset)
+
+    def filters_query_database(self, queryset):
+        for backend in self.filter_backends:
+            if not issubclass(backend, DjangoFilterBackend):
+                continue
+            filterset_class = backend().get_filterset_class(self, queryset)
+            if filterset_class is None:
+                continue
+            for name, filter_ in filterset_class.base_filters.items():
+                if isinstance(filter_, QuerySetRequestMixin) and name in self.request.query_params:
+                    return True
+        return False
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404('No %s matches the given query.' % queryset.model._meta.object_name)
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer([obj async for obj in queryset], many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
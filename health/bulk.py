@@ -0,0 +1,228 @@
+import json
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty
+
+from .cache import invalidate_users_on_commit
+from .counters import refresh_doctor_counts, refresh_patient_counts
+from .models import Doctor, Patient, PatientDoctor
+from .serializers import PatientCreateSerializer
+from .signals import record_assignment_tombstones
+
+
+def import_fields():
+    """The writable fields of PatientCreateSerializer, bound once per import."""
+    serializer = PatientCreateSerializer()
+    return [
+        (name, field, getattr(serializer, f'validate_{name}', None))
+        for name, field in serializer.fields.items() if not field.read_only
+    ]
+
+
+def clean_patient_row(row, fields):
+    """
+    Validate one imported row with the fields of PatientCreateSerializer.
+
+    Returns ``(values, errors)``. CSV rows arrive as strings, so blank values
+    (and nulls) of optional fields mean "not provided" and get the model default.
+    """
+    if not isinstance(row, dict):
+        return None, {'non_field_errors': ['Expected an object with patient fields.']}
+
+    errors = {}
+    values = {}
+    for name, field, validate in fields:
+        value = row.get(name, empty)
+        if value in (None, '') and not field.required:
+            value = empty
+        try:
+            value = field.run_validation(value)
+            if validate is not None:
+                value = validate(value)
+        except SkipField:
+            continue
+        except serializers.ValidationError as exc:
+            errors[name] = exc.detail
+        else:
+            values[name] = value
+    return (None, errors) if errors else (values, None)
+
+
+def bulk_import_batch_size(requested=None):
+    limit = settings.HEALTH_BULK_MAX_BATCH_SIZE
+    try:
+        size = int(requested) if requested else settings.HEALTH_BULK_BATCH_SIZE
+    except (TypeError, ValueError):
+        size = settings.HEALTH_BULK_BATCH_SIZE
+    return min(max(size, 1), limit)
+
+
+def import_patients(rows, user, batch_size):
+    """
+    Insert ``rows`` as patients owned by ``user``, yielding the NDJSON report.
+
+    Rows are validated and inserted one batch at a time, each batch in its own
+    transaction, so a database error only fails the rows of that batch. Each
+    row's line is yielded as soon as its batch is committed, one line per input
+    row in input order, followed by a summary; the report is never held in
+    memory. A client that stops reading stops the import after the last
+    committed batch, and the lines it did receive name every row created.
+    """
+    started = time.perf_counter()
+    fields = import_fields()
+    created = failed = 0
+    for offset in range(0, len(rows), batch_size):
+        results = []
+        pending = []
+        for index, row in enumerate(rows[offset:offset + batch_size], start=offset):
+            values, errors = clean_patient_row(row, fields)
+            if errors:
+                results.append({'row': index, 'status': 'error', 'errors': errors})
+            else:
+                result = {'row': index, 'status': 'created'}
+                results.append(result)
+                pending.append((result, Patient(created_by=user, **values)))
+
+        try:
+            with transaction.atomic():
+                patients = Patient.objects.bulk_create([patient for _, patient in pending])
+                invalidate_users_on_commit([user.pk])
+        except (DatabaseError, ValueError) as exc:
+            # ValueError: values the driver refuses before they reach the database
+            for result, _ in pending:
+                result.update(status='error', errors={'non_field_errors': [str(exc)]})
+        else:
+            for (result, _), patient in zip(pending, patients):
+                result['id'] = patient.pk
+
+        for result in results:
+            if result['status'] == 'created':
+                created += 1
+            else:
+                failed += 1
+            yield json.dumps(result) + '\n'
+
+    elapsed = time.perf_counter() - started
+    yield json.dumps({'summary': {
+        'rows': len(rows),
+        'created': created,
+        'failed': failed,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(len(rows) / elapsed, 1) if elapsed else None,
+    }}) + '\n'
+
+
+def _resolve_pairs(pairs, user):
+    """
+    De-duplicate ``(patient_id, doctor_id)`` pairs and check they exist.
+
+    One query each for the user's patients and for doctors. Returns the usable
+    pairs, the missing ones with a reason, and the pairs already assigned.
+    """
+    pairs = list(dict.fromkeys((pair['patient_id'], pair['doctor_id']) for pair in pairs))
+    patient_ids = set(
+        Patient.objects.filter(created_by=user, id__in={p for p, _ in pairs}).values_list('id', flat=True)
+    )
+    doctor_ids = set(Doctor.objects.filter(id__in={d for _, d in pairs}).values_list('id', flat=True))
+
+    found, missing = [], []
+    for patient_id, doctor_id in pairs:
+        if patient_id not in patient_ids:
+            missing.append({'patient_id': patient_id, 'doctor_id': doctor_id, 'reason': 'Patient not found'})
+        elif doctor_id not in doctor_ids:
+            missing.append({'patient_id': patient_id, 'doctor_id': doctor_id, 'reason': 'Doctor not found'})
+        else:
+            found.append((patient_id, doctor_id))
+
+    existing = {}
+    if found:
+        existing = {
+            (patient_id, doctor_id): link_id
+            for link_id, patient_id, doctor_id in PatientDoctor.objects.filter(
+                patient_id__in={p for p, _ in found}, doctor_id__in={d for _, d in found}
+            ).values_list('id', 'patient_id', 'doctor_id')
+        }
+    return found, missing, existing
+
+
+def _pair(patient_id, doctor_id):
+    return {'patient_id': patient_id, 'doctor_id': doctor_id}
+
+
+def _refresh_counts(pairs):
+    """Recount the assignment counters of the patients and doctors in ``pairs``."""
+    refresh_patient_counts(Patient.objects.filter(id__in={p for p, _ in pairs}))
+    refresh_doctor_counts(Doctor.objects.filter(id__in={d for _, d in pairs}))
+
+
+def _insert_links(pairs):
+    """
+    INSERT the ``(patient_id, doctor_id)`` pairs, skipping ones that already
+    exist (including ones a concurrent request inserted after they were
+    checked), and return the pairs this statement actually inserted.
+    """
+    using = router.db_for_write(PatientDoctor)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = PatientDoctor._meta
+    columns = [opts.get_field(name).column for name in ('patient', 'doctor', 'created_at', 'updated_at')]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    batch_size = connection.ops.bulk_batch_size(columns, pairs) or len(pairs)
+
+    inserted = []
+    with connection.cursor() as cursor:
+        for offset in range(0, len(pairs), batch_size):
+            batch = pairs[offset:offset + batch_size]
+            cursor.execute(
+                f"INSERT INTO {quote(opts.db_table)} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(batch))} "
+                f"ON CONFLICT DO NOTHING RETURNING {quote(columns[0])}, {quote(columns[1])}",
+                [value for patient_id, doctor_id in batch for value in (patient_id, doctor_id, now, now)],
+            )
+            inserted.extend(tuple(row) for row in cursor.fetchall())
+    return inserted
+
+
+def assign_doctors(pairs, user):
+    """
+    Create the missing assignments in one INSERT and report the pairs it
+    actually inserted; the rest (already assigned, or assigned concurrently)
+    are skipped.
+    """
+    found, missing, existing = _resolve_pairs(pairs, user)
+    new = [pair for pair in found if pair not in existing]
+    inserted = set()
+    if new:
+        with transaction.atomic():
+            inserted = set(_insert_links(new))
+            if inserted:
+                _refresh_counts(inserted)
+                invalidate_users_on_commit([user.pk])
+    return {
+        'created': [_pair(*pair) for pair in found if pair in inserted],
+        'skipped': [_pair(*pair) for pair in found if pair not in inserted],
+        'missing': missing,
+    }
+
+
+def unassign_doctors(pairs, user):
+    """Delete the existing assignments in one DELETE, tombstone them in one INSERT and recount."""
+    found, missing, existing = _resolve_pairs(pairs, user)
+    deleted = [pair for pair in found if pair in existing]
+    if deleted:
+        link_ids = [existing[pair] for pair in deleted]
+        with transaction.atomic():
+            # Not a single-instance delete, so the pre_delete handler skips these
+            PatientDoctor.objects.filter(id__in=link_ids).delete()
+            record_assignment_tombstones((link_id, user.pk) for link_id in link_ids)
+            _refresh_counts(deleted)
+        invalidate_users_on_commit([user.pk])
+    return {
+        'deleted': [_pair(*pair) for pair in deleted],
+        'skipped': [_pair(*pair) for pair in found if pair not in existing],
+        'missing': missing,
+    }
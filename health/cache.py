@@ -0,0 +1,149 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+
+from config.replicas import read_from_primary_after
+
+CACHE_ALIAS = 'health'
+DOCTORS_VERSION_KEY = 'doctors:version'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'patients:version:{user_id}'
+
+
+def _version(key):
+    # Seeded from the clock rather than 0 so that an evicted version key can
+    # never bring back entries cached under an older version.
+    _cache().add(key, time.time_ns(), None)
+    return _cache().get(key)
+
+
+async def _aversion(key):
+    await _cache().aadd(key, time.time_ns(), None)
+    return await _cache().aget(key)
+
+
+def _bump(key):
+    # A fresh clock value rather than incr(): the file backend's incr is a
+    # read-then-write, so two workers bumping at once could land on the same
+    # version and keep a list one of them cached in between.
+    _cache().set(key, time.time_ns(), None)
+
+
+def cache_is_process_local():
+    """True when the ``health`` cache lives in this process only, so other workers never see its invalidations."""
+    return isinstance(_cache(), LocMemCache)
+
+
+def read_from_primary_after_bump(version):
+    """
+    Before computing data to cache or tag under ``version``: read from the
+    primary while a replica may still miss the write that bumped it, or the
+    old rows would be stored under the new version. Versions are clock values.
+    """
+    if version is not None:
+        read_from_primary_after(version / 1e9)
+
+
+def user_version(user_id):
+    """Version of everything cached from ``user_id``'s patients; ``None`` if the cache can't keep it."""
+    return _version(_version_key(user_id))
+
+
+async def auser_version(user_id):
+    return await _aversion(_version_key(user_id))
+
+
+def doctors_version():
+    """Version of the doctor list, bumped by every write to a doctor (including its patient_count)."""
+    return _version(DOCTORS_VERSION_KEY)
+
+
+async def adoctors_version():
+    return await _aversion(DOCTORS_VERSION_KEY)
+
+
+def user_cache_key(kind, user_id, digest):
+    """Key of a cached ``kind`` of data derived from ``user_id``'s patients, dropped with their lists."""
+    return f'patients:{kind}:{user_id}:{user_version(user_id)}:{digest}'
+
+
+def patient_list_cache_key(request):
+    """Key for one user's view of one patient list URL (path, query string and host)."""
+    digest = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+    return user_cache_key('list', request.user.pk, digest)
+
+
+async def apatient_list_cache_key(request):
+    """``patient_list_cache_key`` through the cache's async API."""
+    user_id = request.user.pk
+    digest = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+    return f'patients:list:{user_id}:{await auser_version(user_id)}:{digest}'
+
+
+def invalidate_users(user_ids):
+    """Drop every cached patient list of ``user_ids`` by bumping their versions."""
+    for user_id in set(user_ids):
+        _bump(_version_key(user_id))
+
+
+def invalidate_users_on_commit(user_ids):
+    """Invalidate once the surrounding transaction commits, so readers can't re-cache old rows."""
+    user_ids = set(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: invalidate_users(user_ids))
+
+
+def invalidate_doctors_on_commit():
+    """Bump the doctor list version once the surrounding transaction commits."""
+    transaction.on_commit(lambda: _bump(DOCTORS_VERSION_KEY))
+
+
+class PatientListCacheMixin:
+    """
+    Serve ``list`` from the ``health`` cache, per user and URL.
+
+    Entries expire after ``HEALTH_CACHE_TIMEOUT`` seconds. They are
+    invalidated by the signal handlers in ``health.signals`` whenever anything
+    the lists show changes. That covers the user's patients, their assignments
+    and the user's username. It also covers shared rows: saving or deleting a
+    doctor invalidates every user with a patient assigned to it. Writes that
+    skip signals (``QuerySet.update``, bulk writes) invalidate explicitly, or
+    only touch fields the lists leave out (``Doctor.patient_count``).
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.HEALTH_CACHE_TIMEOUT:
+            return super().list(request, *args, **kwargs)
+        key = patient_list_cache_key(request)
+        data = _cache().get(key)
+        if data is not None:
+            return Response(data)
+        read_from_primary_after_bump(user_version(request.user.pk))
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            _cache().set(key, response.data, settings.HEALTH_CACHE_TIMEOUT)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        if not settings.HEALTH_CACHE_TIMEOUT:
+            return await super().alist(request, *args, **kwargs)
+        key = await apatient_list_cache_key(request)
+        data = await _cache().aget(key)
+        if data is not None:
+            return Response(data)
+        read_from_primary_after_bump(await auser_version(request.user.pk))
+        response = await super().alist(request, *args, **kwargs)
+        if response.status_code == 200:
+            await _cache().aset(key, response.data, settings.HEALTH_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .cache import cache_is_process_local
+
+
+@register(Tags.caches, deploy=True)
+def check_health_cache(app_configs, **kwargs):
+    """Warn when cached patient lists can't be invalidated across worker processes."""
+    if settings.HEALTH_CACHE_TIMEOUT and cache_is_process_local():
+        return [Warning(
+            "The health cache is per-process (locmem): a write only invalidates the cached "
+            "patient lists of the worker that handled it, so other workers serve stale lists.",
+            hint="Set HEALTH_CACHE_BACKEND=file (one host) or redis (several hosts), "
+                 "or run a single worker process.",
+            id='health.W001',
+        )]
+    return []
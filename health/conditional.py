@@ -0,0 +1,123 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+
+from .cache import auser_version, cache_is_process_local, read_from_primary_after_bump, user_version
+
+
+class ConditionalGetMixin:
+    """
+    ETag validators for ``list`` and ``retrieve``. Matching ``If-None-Match``
+    headers get a 304 without serializing anything.
+
+    A list's ETag hashes ``get_list_version()`` with the user, URL and media
+    type, so checking it costs no query whatever the size of the list. The
+    version lives in the ``health`` cache and is bumped by every write that can
+    change the list (health.signals); by default it is the user's patient list
+    version. Lists get no ETag without a cache that keeps versions (``dummy``)
+    or one that other workers can't see (``locmem``): a version bumped in one
+    process would leave the others answering 304 with a stale list. Lists
+    rendered just after a bump read from the primary, so a lagging replica
+    can't tag old rows with the new version.
+
+    A detail's ETag comes from one aggregate query over the rows it is built
+    from: the latest of ``conditional_timestamps`` and the distinct counts of
+    ``conditional_counts``, so removals change it too.
+
+    No Last-Modified is sent: a timestamp can't tell that rows were removed.
+    """
+    conditional_timestamps = ('updated_at',)
+    conditional_counts = ()
+
+    def get_conditional_lookups(self):
+        return self.conditional_timestamps, self.conditional_counts
+
+    def get_list_version(self):
+        return user_version(self.request.user.pk)
+
+    async def aget_list_version(self):
+        return await auser_version(self.request.user.pk)
+
+    def list(self, request, *args, **kwargs):
+        etag = None
+        if not cache_is_process_local():
+            version = self.get_list_version()
+            read_from_primary_after_bump(version)
+            etag = self.get_list_etag(request, version)
+        return self.conditional_response(etag, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        state = self.get_retrieve_queryset(kwargs).order_by().aggregate(**self.get_validator_aggregates())
+        etag = self.get_retrieve_etag(request, state)
+        return self.conditional_response(etag, super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        etag = None
+        if not cache_is_process_local():
+            version = await self.aget_list_version()
+            read_from_primary_after_bump(version)
+            etag = self.get_list_etag(request, version)
+        return await self.aconditional_response(etag, super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        state = await self.get_retrieve_queryset(kwargs).order_by().aaggregate(**self.get_validator_aggregates())
+        etag = self.get_retrieve_etag(request, state)
+        return await self.aconditional_response(etag, super().aretrieve, request, *args, **kwargs)
+
+    def get_retrieve_queryset(self, kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+
+    def conditional_response(self, etag, handler, request, *args, **kwargs):
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return self.add_validators(response, etag)
+
+    async def aconditional_response(self, etag, handler, request, *args, **kwargs):
+        if etag is None:
+            return await handler(request, *args, **kwargs)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+        return self.add_validators(response, etag)
+
+    def add_validators(self, response, etag):
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response.setdefault('Cache-Control', 'private, no-cache')
+        return response
+
+    def get_validator_aggregates(self):
+        timestamps, counts = self.get_conditional_lookups()
+        aggregates = {'rows': Count('pk', distinct=True)}
+        aggregates.update({f'max_{i}': Max(lookup) for i, lookup in enumerate(timestamps)})
+        aggregates.update({f'count_{i}': Count(lookup, distinct=True) for i, lookup in enumerate(counts)})
+        return aggregates
+
+    def get_list_etag(self, request, version):
+        """ETag of a list from its version; ``None`` when there is no version to go by."""
+        if version is None:
+            return None
+        return self.make_etag(request, ('list', version))
+
+    def get_retrieve_etag(self, request, state):
+        """ETag of a detail from the aggregated ``state`` of its rows."""
+        if not state['rows']:
+            # Let retrieve raise its usual 404
+            return None
+        return self.make_etag(request, sorted(state.items()))
+
+    def make_etag(self, request, state):
+        fingerprint = repr((
+            state,
+            getattr(request.user, 'pk', None),
+            request.get_full_path(),
+            getattr(request, 'accepted_media_type', None),
+        ))
+        return '"%s"' % hashlib.sha256(fingerprint.encode()).hexdigest()[:32]
@@ -0,0 +1,90 @@
+"""
+Denormalized assignment counters: ``Patient.doctor_count`` and
+``Doctor.patient_count``.
+
+Single assignments move both counters by one in the transaction of the
+write (``adjust_counts``, called from health.signals); bulk writes recount the rows
+they touched from PatientDoctor (``refresh_patient_counts`` /
+``refresh_doctor_counts``), which is also how ``manage.py reconcile_counters``
+repairs drift.
+
+A patient's counter change bumps its ``updated_at``: the patient belongs to the
+user whose assignment changed, so the changes feed and detail ETags follow it
+and their cached lists are invalidated anyway. A doctor's doesn't. Doctors
+are shared, and bumping their ``updated_at`` would change what every other
+user's patients show without invalidating those users' caches. Instead the
+doctor list version (health.cache) is bumped, and ``patient_count`` is left
+out wherever a doctor is nested or synced.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .cache import invalidate_doctors_on_commit
+from .models import Doctor, Patient, PatientDoctor
+
+
+def _shift(field, delta):
+    return Greatest(F(field) + delta, Value(0))
+
+
+def adjust_counts(patient_id, doctor_id, delta):
+    """Add ``delta`` to one patient's doctor_count and one doctor's patient_count."""
+    Patient.objects.filter(pk=patient_id).update(doctor_count=_shift('doctor_count', delta), updated_at=timezone.now())
+    Doctor.objects.filter(pk=doctor_id).update(patient_count=_shift('patient_count', delta))
+    invalidate_doctors_on_commit()
+
+
+def shift_patient_counts(patients, delta):
+    """Add ``delta`` to the doctor_count of the ``patients`` queryset, in one UPDATE."""
+    return patients.update(doctor_count=_shift('doctor_count', delta), updated_at=timezone.now())
+
+
+def shift_doctor_counts(doctors, delta):
+    """Add ``delta`` to the patient_count of the ``doctors`` queryset, in one UPDATE."""
+    invalidate_doctors_on_commit()
+    return doctors.update(patient_count=_shift('patient_count', delta))
+
+
+def _assignment_count(field):
+    # Correlated COUNT(*) of the outer row's assignments
+    links = PatientDoctor.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(links.annotate(total=Count('pk')).values('total')), 0, output_field=IntegerField())
+
+
+def patient_count_expression():
+    return _assignment_count('doctor')
+
+
+def doctor_count_expression():
+    return _assignment_count('patient')
+
+
+def stale_patients(patients):
+    """The ``patients`` whose doctor_count disagrees with their assignments."""
+    return patients.alias(actual=doctor_count_expression()).exclude(doctor_count=F('actual'))
+
+
+def stale_doctors(doctors):
+    """The ``doctors`` whose patient_count disagrees with their assignments."""
+    return doctors.alias(actual=patient_count_expression()).exclude(patient_count=F('actual'))
+
+
+def refresh_patient_counts(patients):
+    """
+    Recount doctor_count for the ``patients`` queryset in one UPDATE that only
+    writes the rows whose count was wrong; returns how many. Invalidating the
+    owners' cached lists is left to the caller.
+    """
+    return stale_patients(patients).update(doctor_count=doctor_count_expression(), updated_at=timezone.now())
+
+
+def refresh_doctor_counts(doctors):
+    """
+    Recount patient_count for the ``doctors`` queryset in one UPDATE that only
+    writes the rows whose count was wrong; returns how many.
+    """
+    updated = stale_doctors(doctors).update(patient_count=patient_count_expression())
+    if updated:
+        invalidate_doctors_on_commit()
+    return updated
@@ -0,0 +1,195 @@
+"""
+Read-only serializers for the hot list endpoints.
+
+Each one reproduces the output of a DRF serializer from ``.values()`` rows:
+the field list, order and formats are compiled once from the DRF serializer,
+so the JSON is byte-identical, but rendering a row is a dict lookup per field
+instead of a model instance plus a ``get_attribute``/``to_representation``
+call per field. Nested lists are fetched in one query per page.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework import relations
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from config.metrics import timed_serialization
+
+from .models import PatientDoctor
+from .serializers import AssignedDoctorSerializer, DoctorSerializer, PatientDoctorSerializer, PatientSerializer
+
+# Fields whose to_representation is the identity for what the database returns
+PASSTHROUGH_FIELDS = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.IntegerField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if not settings.USE_TZ or output_format is None or output_format.lower() != drf_fields.ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(getattr(field, 'timezone', None) or timezone.get_current_timezone()).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+class FastSerializer:
+    """
+    ``FastSerializer(rows, many=True).data`` renders ``.values(*columns)``
+    rows exactly like ``serializer_class`` renders the matching instances.
+
+    ``string_columns`` maps StringRelatedFields to the column holding their
+    ``str()``; ``nested`` names SerializerMethodFields filled in two steps:
+    ``load_<name>(rows)`` returns the queryset to fetch and ``group_<name>()``
+    turns its rows into a dict keyed by primary key. ``adata()`` is ``data``
+    for async views, fetching through the async ORM.
+    """
+    serializer_class = None
+    string_columns = {}
+    nested = ()
+    _compiled = None
+
+    def __init__(self, rows, many=False):
+        self.rows = rows if many else [rows]
+        self.many = many
+
+    @classmethod
+    def compile(cls):
+        if cls.__dict__.get('_compiled') is None:
+            plan = []
+            for name, field in cls.serializer_class().fields.items():
+                if field.write_only:
+                    continue
+                if name in cls.nested:
+                    plan.append((name, None, None))
+                elif isinstance(field, relations.StringRelatedField):
+                    if name not in cls.string_columns:
+                        raise ImproperlyConfigured(f"{cls.__name__}.string_columns has no column for '{name}'")
+                    plan.append((name, cls.string_columns[name], None))
+                elif isinstance(field, relations.PrimaryKeyRelatedField):
+                    plan.append((name, field.source, None))
+                elif isinstance(field, drf_fields.DateTimeField):
+                    plan.append((name, field.source.replace('.', '__'), _datetime_converter(field)))
+                elif isinstance(field, PASSTHROUGH_FIELDS):
+                    plan.append((name, field.source.replace('.', '__'), None))
+                else:
+                    plan.append((name, field.source.replace('.', '__'), field.to_representation))
+            cls._compiled = plan
+        return cls._compiled
+
+    @classmethod
+    def columns(cls):
+        return [column for _, column, _ in cls.compile() if column is not None]
+
+    @classmethod
+    def values(cls, queryset):
+        """``queryset`` as the rows this serializer renders, keeping annotations such as search_rank."""
+        return queryset.prefetch_related(None).values(*cls.columns(), *queryset.query.annotations)
+
+    def render_row(self, row, plan, nested):
+        item = {}
+        for name, column, convert in plan:
+            if column is None:
+                item[name] = nested[name].get(row['id'], [])
+                continue
+            value = row[column]
+            item[name] = convert(value) if convert is not None and value is not None else value
+        return item
+
+    @property
+    def data(self):
+        plan = self.compile()
+        rows = list(self.rows)
+        nested = {}
+        if rows:
+            for name in self.nested:
+                links = getattr(self, f'load_{name}')(rows)
+                nested[name] = timed_serialization(getattr(self, f'group_{name}'), links)
+        return timed_serialization(self.render, rows, plan, nested)
+
+    async def adata(self):
+        plan = self.compile()
+        rows = [row async for row in self.rows] if hasattr(self.rows, 'aiterator') else list(self.rows)
+        nested = {}
+        if rows:
+            for name in self.nested:
+                links = [link async for link in getattr(self, f'load_{name}')(rows)]
+                nested[name] = timed_serialization(getattr(self, f'group_{name}'), links)
+        return timed_serialization(self.render, rows, plan, nested)
+
+    def render(self, rows, plan, nested):
+        items = [self.render_row(row, plan, nested) for row in rows]
+        return items if self.many else items[0]
+
+
+class FastDoctorSerializer(FastSerializer):
+    serializer_class = DoctorSerializer
+
+
+class FastAssignedDoctorSerializer(FastSerializer):
+    serializer_class = AssignedDoctorSerializer
+
+
+class FastPatientSerializer(FastSerializer):
+    serializer_class = PatientSerializer
+    string_columns = {'created_by': 'created_by__username'}
+    nested = ('doctors',)
+
+    def load_doctors(self, rows):
+        """Assigned doctors of every patient on the page, in one query and in assignment order."""
+        return PatientDoctor.objects.filter(patient_id__in=[row['id'] for row in rows]).order_by('id').values_list(
+            'patient_id', *(f'doctor__{column}' for column in FastAssignedDoctorSerializer.columns())
+        )
+
+    def group_doctors(self, links):
+        doctor_columns = FastAssignedDoctorSerializer.columns()
+        doctors = defaultdict(list)
+        for patient_id, *values in links:
+            doctors[patient_id].append(dict(zip(doctor_columns, values)))
+        return {
+            patient_id: FastAssignedDoctorSerializer(rows, many=True).data
+            for patient_id, rows in doctors.items()
+        }
+
+
+class FastPatientDoctorSerializer(FastSerializer):
+    serializer_class = PatientDoctorSerializer
+
+
+class FastListMixin:
+    """
+    Serve ``list`` through ``fast_serializer_class`` when ``HEALTH_FAST_SERIALIZERS``
+    is on; the DRF serializer still handles writes and detail views.
+    """
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.HEALTH_FAST_SERIALIZERS or self.fast_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.fast_serializer_class.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.fast_serializer_class(page, many=True).data)
+        return Response(self.fast_serializer_class(queryset, many=True).data)
+
+    async def alist(self, request, *args, **kwargs):
+        if not settings.HEALTH_FAST_SERIALIZERS or self.fast_serializer_class is None:
+            return await super().alist(request, *args, **kwargs)
+        queryset = self.fast_serializer_class.values(await self.afilter_queryset(self.get_queryset()))
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(await self.fast_serializer_class(page, many=True).adata())
+        return Response(await self.fast_serializer_class(queryset, many=True).adata())
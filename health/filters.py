@@ -0,0 +1,76 @@
+import operator
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from rest_framework import filters
+
+SEARCH_CONFIG = 'english'
+
+
+class HealthSearchFilter(filters.SearchFilter):
+    """
+    Ranked, index-backed search for the health viewsets.
+
+    Every row DRF's SearchFilter would match still matches: each term must be
+    contained (ILIKE, served by trigram indexes on PostgreSQL) in one of
+    ``search_fields``. On PostgreSQL rows also match the view's
+    ``search_vector`` (weighted full-text, kept up to date by a trigger) and,
+    through pg_trgm, misspellings of ``search_trigram_fields``. Results are
+    annotated with ``search_rank``.
+
+    Other databases fall back to DRF's icontains search, ranking rows whose
+    trigram fields match above the rest.
+    """
+    rank_annotation = 'search_rank'
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        trigram_fields = getattr(view, 'search_trigram_fields', [])
+        if connections[queryset.db].vendor == 'postgresql':
+            text = ' '.join(search_terms)
+            vector = getattr(view, 'search_vector', None)
+            rank = Value(0.0)
+            conditions = self.term_conditions(queryset, search_fields, search_terms)
+            if vector:
+                query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+                conditions |= Q(**{vector: query})
+                rank = rank + SearchRank(F(vector), query)
+            for field in trigram_fields:
+                conditions |= Q(**{f'{field}__trigram_similar': text})
+                rank = rank + TrigramSimilarity(field, text)
+            return queryset.filter(conditions).annotate(**{self.rank_annotation: rank})
+
+        rank = Value(0.0)
+        if trigram_fields:
+            rank = Case(
+                When(self.term_conditions(queryset, trigram_fields, search_terms), then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        queryset = queryset.filter(self.term_conditions(queryset, search_fields, search_terms))
+        return queryset.annotate(**{self.rank_annotation: rank})
+
+    def term_conditions(self, queryset, search_fields, search_terms):
+        """Every term must match at least one of the fields (DRF's SearchFilter semantics)."""
+        lookups = [self.construct_search(str(field), queryset) for field in search_fields]
+        return reduce(operator.and_, (
+            reduce(operator.or_, (Q(**{lookup: term}) for lookup in lookups))
+            for term in search_terms
+        ))
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """Order search results by relevance unless the client asks for an explicit ordering."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        rank = HealthSearchFilter.rank_annotation
+        if rank in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return [f'-{rank}', *(ordering or [])]
+        return ordering
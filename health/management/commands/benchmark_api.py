@@ -0,0 +1,389 @@
+"""
+Benchmark every endpoint of health/urls.py and users/urls.py through the test
+client, against the data already in the database (see generate_dataset).
+
+Requests are made as ``--username`` (by default the generated user owning the
+most patients), ``--requests`` times per case after ``--warmup`` unmeasured
+ones, one at a time. Writes run in a transaction that is rolled back after
+each request, so every iteration sees the same data and the database is left
+as it was. Reports throughput, latency percentiles and the query count of each
+case; routes and methods without a case are listed as not covered. A case
+answering anything but its expected status fails the command once the
+results are reported, since its timings measure an error page.
+
+``--output`` saves the results as JSON, with the code revision, database,
+relevant settings and dataset size, and ``--compare`` diffs a run against such
+a file: cases whose p50 grew by more than ``--threshold`` or that run more
+queries are flagged, and ``--fail-on-regression`` makes them an error.
+"""
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from health import urls as health_urls
+from health.models import Doctor, Patient, PatientDoctor
+from health.pagination import approximate_count
+from users import urls as users_urls
+
+User = get_user_model()
+
+HEALTH = '/api/v1/health'
+USERS = '/api/v1/users'
+# Settings that change what the endpoints do; recorded with every run
+RECORDED_SETTINGS = (
+    'FAST_JSON', 'HEALTH_FAST_SERIALIZERS', 'HEALTH_ASYNC_VIEWS', 'HEALTH_CACHE_TIMEOUT',
+    'HEALTH_ANALYTICS_CACHE_TIMEOUT', 'JWT_STATELESS_AUTH', 'JWT_PROFILE_CLAIMS', 'POSTGRES_CONNECTIONS', 'DATABASE_REPLICAS', 'PASSWORD_HASH_ITERATIONS', 'REQUEST_METRICS',
+)
+
+
+class Case:
+    def __init__(self, route, method, path, data=None, variant='', status=200):
+        self.route = route
+        self.method = method
+        self.path = path
+        self.data = data
+        self.status = status
+        self.name = f'{method} {route}' + (f' ({variant})' if variant else '')
+
+    @property
+    def writes(self):
+        return self.method not in ('GET', 'HEAD', 'OPTIONS')
+
+
+def percentile(latencies, fraction):
+    """Nearest-rank percentile of sorted ``latencies``."""
+    return latencies[max(math.ceil(len(latencies) * fraction) - 1, 0)]
+
+
+def routes():
+    """``{route name: HTTP methods}`` of every view in the health and users URLconfs."""
+    found = {}
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                callback = pattern.callback
+                actions = getattr(callback, 'actions', None)
+                if actions:
+                    methods = set(actions)
+                else:
+                    view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+                    methods = {method for method in view_class.http_method_names if hasattr(view_class, method)}
+                found.setdefault(pattern.name, set()).update(
+                    method.upper() for method in methods - {'head', 'options', 'trace'}
+                )
+
+    walk(health_urls.urlpatterns)
+    walk(users_urls.urlpatterns)
+    return found
+
+
+def revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Benchmark every health and users endpoint (throughput, latency percentiles, queries)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Measured requests per case")
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--username', help="Default: the user owning the most generated patients")
+        parser.add_argument('--prefix', default='synthetic-', help="generate_dataset --prefix")
+        parser.add_argument('--password', default='synthetic-password', help="Password of --username, for login")
+        parser.add_argument('--endpoint', action='append',
+                            help="Only cases of this route name or case name (repeatable)")
+        parser.add_argument('--reads-only', action='store_true', help="Skip cases that write")
+        parser.add_argument('--no-cache', action='store_true', help="Switch off the patient list cache")
+        parser.add_argument('--output', help="Write the results as JSON to this file ('-' for stdout)")
+        parser.add_argument('--compare', help="JSON results of an earlier run to compare with")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="p50 increase counted as a regression (fraction, default 0.2)")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        user = self.user = self.get_user(options['username'], options['prefix'])
+        all_cases = self.cases(user, options['password'])
+        cases = self.select(all_cases, options)
+        # The test client sends Host: testserver, which production ALLOWED_HOSTS reject
+        settings_override = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+        if options['no_cache']:
+            settings_override.update(HEALTH_CACHE_TIMEOUT=0, HEALTH_ANALYTICS_CACHE_TIMEOUT=0)
+        with override_settings(**settings_override):
+            results = {case.name: self.run(case, options['requests'], options['warmup']) for case in cases}
+            report = self.report(user, options, results)
+
+        covered = {(case.method, case.route) for case in all_cases}
+        report['not_covered'] = sorted(
+            f'{method} {route}' for route, methods in routes().items() for method in methods
+            if (method, route) not in covered
+        )
+
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_results(report)
+            if options['output']:
+                with open(options['output'], 'w') as f:
+                    json.dump(report, f, indent=2)
+                self.stdout.write(f"Results written to {options['output']}")
+        failed = [name for name, result in report['endpoints'].items() if not result['ok']]
+        if baseline is not None:
+            regressions = self.compare(baseline, report, options['threshold'])
+            if regressions and options['fail_on_regression'] and not failed:
+                raise CommandError(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        if failed:
+            raise CommandError(f"{len(failed)} case(s) answered an unexpected status: {', '.join(failed)}")
+
+    def get_user(self, username, prefix):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {username!r}")
+        owner = (
+            Patient.objects.filter(created_by__username__startswith=prefix)
+            .values_list('created_by', flat=True).order_by('created_by')[:1]
+        )
+        # generate_dataset gives its first user the most patients
+        user = User.objects.filter(pk__in=owner).first()
+        if user is None:
+            raise CommandError(f"No patients owned by {prefix}* users; run generate_dataset or pass --username")
+        return user
+
+    def cases(self, user, password):
+        link = (
+            PatientDoctor.objects.filter(patient__created_by=user).select_related('patient', 'doctor')
+            .order_by('-patient__created_at', '-id').first()
+        )
+        if link is None:
+            raise CommandError(f"{user.username} has no patients with doctors; run generate_dataset")
+        patient, doctor = link.patient, link.doctor
+        other = Doctor.objects.exclude(patient_links__patient=patient).order_by('id').first()
+        term = patient.name.split()[0]
+        pair = [{'patient_id': patient.pk, 'doctor_id': other.pk}]
+        assigned = [{'patient_id': patient.pk, 'doctor_id': doctor.pk}]
+        new_patient = {'name': 'Benchmark Patient', 'age': 40, 'gender': 'Female', 'notes': 'Benchmark notes'}
+        new_doctor = {
+            'name': 'Benchmark Doctor', 'specialization': 'Cardiology', 'email': 'benchmark-doctor@example.com',
+            'phone': '+91 90000 00000',
+        }
+        strong_password = 'Bench-mark-2024!'
+        return [
+            # users/urls.py
+            Case('register', 'POST', f'{USERS}/auth/register/', {
+                'username': 'api-benchmark-user', 'email': 'api-benchmark-user@example.com',
+                'password': strong_password, 'password_confirm': strong_password,
+            }, status=201),
+            Case('token_obtain_pair', 'POST', f'{USERS}/auth/login/',
+                 {'username': user.username, 'password': password}),
+            Case('token_refresh', 'POST', f'{USERS}/auth/token/refresh/', {'refresh': str(RefreshToken.for_user(user))}),
+            Case('profile', 'GET', f'{USERS}/profile/'),
+            Case('profile', 'PUT', f'{USERS}/profile/',
+                 {'email': user.email, 'first_name': 'Bench', 'last_name': 'Mark'}),
+            Case('profile', 'PATCH', f'{USERS}/profile/', {'first_name': 'Bench'}),
+            Case('user_profile', 'GET', f'{USERS}/profile/me/'),
+            Case('change_password', 'POST', f'{USERS}/profile/change-password/',
+                 {'old_password': password, 'new_password': strong_password}),
+            # health/urls.py
+            Case('api-root', 'GET', f'{HEALTH}/'),
+            Case('changes', 'GET', f'{HEALTH}/changes/'),
+            Case('analytics', 'GET', f'{HEALTH}/analytics/'),
+            Case('analytics', 'GET', f'{HEALTH}/analytics/?interval=day&periods=90', variant='daily'),
+            Case('patient-list', 'GET', f'{HEALTH}/patients/'),
+            Case('patient-list', 'GET', f'{HEALTH}/patients/?pagination=cursor', variant='cursor'),
+            Case('patient-list', 'GET', f'{HEALTH}/patients/?search={term}', variant='search'),
+            Case('patient-list', 'GET', f'{HEALTH}/patients/?ordering=name', variant='ordering'),
+            Case('patient-list', 'GET', f'{HEALTH}/patients/?gender=Female', variant='filter'),
+            Case('patient-export', 'GET', f'{HEALTH}/patients/export/'),
+            Case('patient-export', 'GET', f'{HEALTH}/patients/export/?stream=ndjson', variant='ndjson'),
+            Case('patient-list', 'POST', f'{HEALTH}/patients/', new_patient, status=201),
+            Case('patient-detail', 'GET', f'{HEALTH}/patients/{patient.pk}/'),
+            Case('patient-detail', 'PUT', f'{HEALTH}/patients/{patient.pk}/', new_patient),
+            Case('patient-detail', 'PATCH', f'{HEALTH}/patients/{patient.pk}/', {'age': 41}),
+            Case('patient-detail', 'DELETE', f'{HEALTH}/patients/{patient.pk}/', status=204),
+            Case('patient-bulk-create', 'POST', f'{HEALTH}/patients/bulk_create/',
+                 [dict(new_patient, name=f'Benchmark Patient {i}') for i in range(100)]),
+            Case('patient-assign-doctors', 'POST', f'{HEALTH}/patients/assign_doctors/', {'pairs': pair}),
+            Case('patient-unassign-doctors', 'DELETE', f'{HEALTH}/patients/unassign_doctors/', {'pairs': assigned}),
+            Case('patient-assign-doctor', 'POST', f'{HEALTH}/patients/{patient.pk}/assign_doctor/',
+                 {'doctor_id': other.pk}, status=201),
+            Case('patient-unassign-doctor', 'DELETE', f'{HEALTH}/patients/{patient.pk}/unassign_doctor/',
+                 {'doctor_id': doctor.pk}),
+            Case('doctor-list', 'GET', f'{HEALTH}/doctors/'),
+            Case('doctor-list', 'GET', f'{HEALTH}/doctors/?search={doctor.name.split()[0]}', variant='search'),
+            Case('doctor-list', 'GET', f'{HEALTH}/doctors/?specialization={doctor.specialization}', variant='filter'),
+            Case('doctor-list', 'POST', f'{HEALTH}/doctors/', new_doctor, status=201),
+            Case('doctor-detail', 'GET', f'{HEALTH}/doctors/{doctor.pk}/'),
+            Case('doctor-detail', 'PUT', f'{HEALTH}/doctors/{doctor.pk}/', dict(new_doctor, email=doctor.email)),
+            Case('doctor-detail', 'PATCH', f'{HEALTH}/doctors/{doctor.pk}/', {'phone': '+91 90000 00001'}),
+            Case('doctor-detail', 'DELETE', f'{HEALTH}/doctors/{doctor.pk}/', status=204),
+            Case('doctor-patients', 'GET', f'{HEALTH}/doctors/{doctor.pk}/patients/'),
+            Case('doctor-patients', 'GET', f'{HEALTH}/doctors/{doctor.pk}/patients/?stream=ndjson', variant='stream'),
+            Case('patientdoctor-list', 'GET', f'{HEALTH}/patient-doctors/'),
+            Case('patientdoctor-export', 'GET', f'{HEALTH}/patient-doctors/export/'),
+            Case('patientdoctor-list', 'POST', f'{HEALTH}/patient-doctors/',
+                 {'patient': patient.pk, 'doctor': other.pk}, status=201),
+            Case('patientdoctor-detail', 'GET', f'{HEALTH}/patient-doctors/{link.pk}/'),
+            Case('patientdoctor-detail', 'PUT', f'{HEALTH}/patient-doctors/{link.pk}/',
+                 {'patient': patient.pk, 'doctor': doctor.pk}),
+            Case('patientdoctor-detail', 'PATCH', f'{HEALTH}/patient-doctors/{link.pk}/', {'doctor': doctor.pk}),
+            Case('patientdoctor-detail', 'DELETE', f'{HEALTH}/patient-doctors/{link.pk}/', status=204),
+        ]
+
+    def select(self, cases, options):
+        if options['reads_only']:
+            cases = [case for case in cases if not case.writes]
+        if options['endpoint']:
+            wanted = set(options['endpoint'])
+            cases = [case for case in cases if case.route in wanted or case.name in wanted]
+            if not cases:
+                raise CommandError(f"No cases for {', '.join(sorted(wanted))}")
+        return cases
+
+    def send(self, client, case):
+        """One request, rolled back when it writes; returns (status, seconds)."""
+        with ExitStack() as stack:
+            if case.writes:
+                stack.enter_context(transaction.atomic())
+            started = time.perf_counter()
+            response = client.generic(
+                case.method, case.path,
+                json.dumps(case.data) if case.data is not None else '',
+                content_type='application/json',
+            )
+            try:
+                response.getvalue()
+            finally:
+                response.close()
+            elapsed = time.perf_counter() - started
+            if case.writes:
+                transaction.set_rollback(True)
+        return response.status_code, elapsed
+
+    def run(self, case, requests, warmup):
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        for _ in range(warmup):
+            self.send(client, case)
+        # Count queries on a request of its own: capturing slows queries down
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in settings.DATABASES]
+            status, _ = self.send(client, case)
+        queries = sum(len(context) for context in captured)
+
+        statuses = {}
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            code, elapsed = self.send(client, case)
+            statuses[code] = statuses.get(code, 0) + 1
+            latencies.append(elapsed)
+        total = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'route': case.route,
+            'method': case.method,
+            'path': case.path,
+            'expected_status': case.status,
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+            'ok': status == case.status and list(statuses) == [case.status],
+            'requests': requests,
+            'requests_per_second': round(requests / total, 1),
+            'latency_ms': {
+                'min': round(latencies[0] * 1000, 3),
+                'mean': round(statistics.fmean(latencies) * 1000, 3),
+                'p50': round(percentile(latencies, 0.5) * 1000, 3),
+                'p90': round(percentile(latencies, 0.9) * 1000, 3),
+                'p99': round(percentile(latencies, 0.99) * 1000, 3),
+                'max': round(latencies[-1] * 1000, 3),
+            },
+            'queries': queries,
+        }
+
+    def report(self, user, options, results):
+        return {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'settings': {name: getattr(settings, name, None) for name in RECORDED_SETTINGS},
+            'options': {'requests': options['requests'], 'warmup': options['warmup'], 'no_cache': options['no_cache']},
+            'dataset': {
+                'users': approximate_count(User.objects.all()),
+                'patients': approximate_count(Patient.objects.all()),
+                'doctors': approximate_count(Doctor.objects.all()),
+                'assignments': approximate_count(PatientDoctor.objects.all()),
+                'user': user.username,
+                'user_patients': Patient.objects.filter(created_by=user).count(),
+            },
+            'endpoints': results,
+        }
+
+    def print_results(self, report):
+        self.stdout.write(
+            f"{'case':<48} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'queries':>7}  status"
+        )
+        for name, result in report['endpoints'].items():
+            latency = result['latency_ms']
+            statuses = ', '.join(f'{code}x{count}' for code, count in result['statuses'].items())
+            line = (
+                f"{name:<48} {result['requests_per_second']:>8.1f} {latency['p50']:>9.2f} "
+                f"{latency['p90']:>9.2f} {latency['p99']:>9.2f} {result['queries']:>7}  {statuses}"
+            )
+            if not result['ok']:
+                line = self.style.WARNING(f"{line} (expected {result['expected_status']})")
+            self.stdout.write(line)
+        if report['not_covered']:
+            self.stdout.write(self.style.WARNING(f"Not covered: {', '.join(report['not_covered'])}"))
+
+    def compare(self, baseline, report, threshold):
+        """Print the changes against ``baseline``; returns the names of regressed cases."""
+        self.stdout.write(
+            f"\nCompared with {baseline.get('revision') or 'baseline'} ({baseline.get('created', '?')}):"
+        )
+        regressions = []
+        for name, result in report['endpoints'].items():
+            before = baseline.get('endpoints', {}).get(name)
+            if before is None:
+                self.stdout.write(f"{name:<48} new")
+                continue
+            old_p50, new_p50 = before['latency_ms']['p50'], result['latency_ms']['p50']
+            change = (new_p50 - old_p50) / old_p50 if old_p50 else 0.0
+            line = (
+                f"{name:<48} p50 {old_p50:>8.2f} -> {new_p50:>8.2f} ms ({change:+7.1%})  "
+                f"queries {before['queries']:>3} -> {result['queries']:>3}"
+            )
+            if change > threshold or result['queries'] > before['queries']:
+                regressions.append(name)
+                line = self.style.ERROR(f"{line}  REGRESSION")
+            self.stdout.write(line)
+        return regressions
@@ -0,0 +1,225 @@
+"""
+Compare the health read endpoints served three ways, at a given concurrency:
+
+* ``wsgi``: Django's WSGI handler on a pool of ``--concurrency`` threads,
+  the way a threaded WSGI server runs it;
+* ``asgi-sync``: the ASGI handler with the regular sync views, which Django
+  runs one at a time on its thread-sensitive executor;
+* ``asgi-async``: the ASGI handler with ``HEALTH_ASYNC_VIEWS`` on, driven by
+  ``--concurrency`` concurrent coroutines.
+
+Requests go straight to the handlers (no server or sockets), so the numbers
+show the cost of each request path and how it overlaps database waits, not
+a server's. Reports requests per second and p50 / p99 latency. The seeded
+users, patients and doctors are committed (WSGI threads use their own
+connections) and deleted afterwards.
+"""
+import asyncio
+import itertools
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from types import ModuleType
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test.utils import override_settings
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.tokens import AccessToken
+
+from health import urls as health_urls
+from health.models import Doctor, Patient, PatientDoctor, Tombstone
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'asgi-benchmark-'
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+
+
+def build_urlconf():
+    """The health API's routes, with views built under the current HEALTH_ASYNC_VIEWS."""
+    router = DefaultRouter()
+    for prefix, viewset, basename in health_urls.router.registry:
+        router.register(prefix, viewset, basename)
+    urlconf = ModuleType('benchmark_urls')
+    urlconf.urlpatterns = [path('api/v1/health/', include((router.urls, health_urls.app_name)))]
+    return urlconf
+
+
+class Command(BaseCommand):
+    help = "Benchmark the health read endpoints under WSGI and ASGI (sync and async views)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES, action='append',
+                            help="Mode to run (repeatable; default: all)")
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--users', type=int, default=4)
+        parser.add_argument('--patients', type=int, default=200, help="Patients per user")
+        parser.add_argument('--doctors', type=int, default=50)
+        parser.add_argument('--no-cache', action='store_true', help="Switch off the patient list cache")
+
+    def handle(self, *args, **options):
+        self.seed(options['users'], options['patients'], options['doctors'])
+        try:
+            settings_override = {'HEALTH_CACHE_TIMEOUT': 0} if options['no_cache'] else {}
+            with override_settings(**settings_override):
+                for mode in options['mode'] or MODES:
+                    self.run(mode, options['requests'], options['concurrency'])
+        finally:
+            self.cleanup()
+
+    def seed(self, users, patients, doctors):
+        self.users = [User.objects.create_user(username=f'{USERNAME_PREFIX}{i}', password=None) for i in range(users)]
+        self.doctors = Doctor.objects.bulk_create(
+            Doctor(name=f"Doctor {i}", specialization='General', email=f"{USERNAME_PREFIX}{i}@example.com")
+            for i in range(doctors)
+        )
+        self.patients = Patient.objects.bulk_create(
+            Patient(name=f"Patient {i}", age=i % 100, gender='Female', notes='Notes', created_by=user)
+            for user in self.users for i in range(patients)
+        )
+        PatientDoctor.objects.bulk_create(
+            PatientDoctor(patient=patient, doctor=self.doctors[i % len(self.doctors)])
+            for i, patient in enumerate(self.patients)
+        )
+        self.tokens = [f'Bearer {AccessToken.for_user(user)}' for user in self.users]
+
+    def cleanup(self):
+        doctor_ids = [doctor.pk for doctor in self.doctors]
+        user_ids = [user.pk for user in self.users]
+        User.objects.filter(pk__in=user_ids).delete()
+        Doctor.objects.filter(pk__in=doctor_ids).delete()
+        # Don't leave the benchmark's deletes in the changes feed
+        Tombstone.objects.filter(owner_id__in=user_ids).delete()
+        Tombstone.objects.filter(model=Tombstone.DOCTOR, object_id__in=doctor_ids).delete()
+
+    def targets(self):
+        """(path, query string, Authorization header) per request, cycling over users and endpoints."""
+        paths = []
+        for user, token in zip(self.users, self.tokens):
+            patient = next(patient for patient in self.patients if patient.created_by_id == user.pk)
+            paths += [
+                ('/api/v1/health/patients/', '', token),
+                ('/api/v1/health/patients/', 'pagination=cursor', token),
+                (f'/api/v1/health/patients/{patient.pk}/', '', token),
+                ('/api/v1/health/doctors/', '', token),
+                ('/api/v1/health/patient-doctors/', '', token),
+            ]
+        return itertools.cycle(paths)
+
+    def run(self, mode, requests, concurrency):
+        with override_settings(ROOT_URLCONF=build_urlconf(), HEALTH_ASYNC_VIEWS=mode == 'asgi-async'):
+            send = self.wsgi if mode == 'wsgi' else self.asgi
+            # Warm up every target once (imports, compiled serializers, caches)
+            targets = self.targets()
+            send([next(targets) for _ in range(len(self.users) * 5)], 1)
+
+            started = time.perf_counter()
+            latencies = send([next(targets) for _ in range(requests)], concurrency)
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        self.stdout.write(
+            f"{mode:<11} {requests} requests, concurrency {concurrency}: "
+            f"{requests / elapsed:>8.1f} requests/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p99 {latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000:.1f} ms"
+        )
+
+    def expect_success(self, status, target):
+        if status != 200:
+            raise CommandError(f"GET {target[0]}?{target[1]} returned {status}")
+
+    def wsgi(self, targets, concurrency):
+        handler = WSGIHandler()
+
+        def request(target):
+            path_info, query_string, token = target
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'SCRIPT_NAME': '',
+                'PATH_INFO': path_info,
+                'QUERY_STRING': query_string,
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': token,
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': BytesIO(),
+                'wsgi.url_scheme': 'http',
+            }
+            statuses = []
+            started = time.perf_counter()
+            response = handler(environ, lambda status, headers: statuses.append(int(status.split()[0])))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            latency = time.perf_counter() - started
+            self.expect_success(statuses[0], target)
+            return latency
+
+        def timed(target):
+            try:
+                return request(target)
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(timed, targets))
+
+    def asgi(self, targets, concurrency):
+        handler = ASGIHandler()
+        pending = iter(targets)
+
+        async def request(target):
+            path_info, query_string, token = target
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path_info,
+                'raw_path': path_info.encode(),
+                'query_string': query_string.encode(),
+                'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'authorization', token.encode())],
+                'client': ('127.0.0.1', 0),
+                'server': ('localhost', 80),
+            }
+            messages = []
+            body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+            async def receive():
+                if body:
+                    return body.pop()
+                # The client never disconnects; Django cancels this wait once it has responded
+                await asyncio.Event().wait()
+
+            async def send(message):
+                messages.append(message)
+
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            latency = time.perf_counter() - started
+            self.expect_success(messages[0]['status'], target)
+            return latency
+
+        async def worker(latencies):
+            for target in pending:
+                latencies.append(await request(target))
+
+        async def main():
+            latencies = []
+            await asyncio.gather(*(worker(latencies) for _ in range(concurrency)))
+            return latencies
+
+        return asyncio.run(main())
@@ -0,0 +1,84 @@
+"""
+Measure bulk patient import throughput in rows per second.
+
+Posts a generated payload to PatientViewSet.bulk_create, and for comparison
+creates a smaller sample through the one-row-per-request POST /patients/ path.
+All rows are rolled back afterwards.
+"""
+import csv
+import io
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from health.views import PatientViewSet
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark bulk patient import (rows/second) against single-row creation."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--format', choices=['json', 'ndjson', 'csv'], default='json')
+        parser.add_argument('--single-rows', type=int, default=200,
+                            help="Rows created one request at a time for the baseline (0 to skip)")
+
+    def handle(self, *args, **options):
+        rows = [
+            {'name': f"Patient {i}", 'age': i % 100, 'gender': 'Female' if i % 2 else 'Male', 'notes': ''}
+            for i in range(options['rows'])
+        ]
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username='bulk-import-benchmark', password='unused')
+
+                body, content_type = self.encode(rows, options['format'])
+                request = factory.post(f"/?batch_size={options['batch_size']}", body, content_type=content_type)
+                force_authenticate(request, user=user)
+                view = PatientViewSet.as_view({'post': 'bulk_create'}, **PatientViewSet.bulk_create.kwargs)
+                started = time.perf_counter()
+                response = view(request)
+                report = b''.join(response.streaming_content).decode().splitlines()
+                bulk_seconds = time.perf_counter() - started
+                summary = json.loads(report[-1])['summary']
+                self.report('bulk_create', summary['created'], bulk_seconds)
+
+                single = rows[:options['single_rows']]
+                if single:
+                    view = PatientViewSet.as_view({'post': 'create'})
+                    started = time.perf_counter()
+                    for row in single:
+                        request = factory.post('/', row, format='json')
+                        force_authenticate(request, user=user)
+                        view(request)
+                    self.report('single create', len(single), time.perf_counter() - started)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def encode(self, rows, fmt):
+        if fmt == 'ndjson':
+            return ''.join(json.dumps(row) + '\n' for row in rows), 'application/x-ndjson'
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+            return buffer.getvalue(), 'text/csv'
+        return json.dumps(rows), 'application/json'
+
+    def report(self, label, count, seconds):
+        rate = count / seconds if seconds else float('inf')
+        self.stdout.write(f"{label:<14} {count:>8} rows in {seconds:8.3f}s  {rate:>10.1f} rows/s")
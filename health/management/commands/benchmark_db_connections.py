@@ -0,0 +1,146 @@
+"""
+Per-request latency of the health API under each POSTGRES_CONNECTIONS mode.
+
+Sends ``--requests`` authenticated GETs through Django's WSGI handler from a
+pool of ``--concurrency`` threads, once per mode, switching the connection
+settings of the default database in between. Reports requests per second,
+p50 / p99 latency, the connections opened and, for "pool", how long requests
+waited for a connection. "pool" needs PostgreSQL with psycopg 3 and is
+skipped otherwise. The benchmark user is deleted afterwards.
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.database import connection_stats, reset_connection_stats
+
+User = get_user_model()
+
+USERNAME = 'db-connections-benchmark'
+MODES = {
+    'new': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-request latency with new, persistent and pooled database connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=list(MODES), action='append',
+                            help="Mode to run (repeatable; default: all)")
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--pool-size', type=int, default=4,
+                            help="max_size of the pool in 'pool' mode (below --concurrency to see waits)")
+        parser.add_argument('--path', default='/api/v1/health/doctors/?page_size=5')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=USERNAME, password=None)
+        self.token = f'Bearer {AccessToken.for_user(user)}'
+        self.handler = WSGIHandler()
+        original = dict(connections.settings[DEFAULT_DB_ALIAS])
+        try:
+            for mode in options['mode'] or MODES:
+                if mode == 'pool' and not self.supports_pool():
+                    self.stdout.write(f"{mode:<11} skipped: needs PostgreSQL with psycopg 3 and psycopg_pool")
+                    continue
+                self.configure(original, mode, options['pool_size'])
+                try:
+                    self.run(mode, options)
+                finally:
+                    self.configure(original, None, None)
+        finally:
+            User.objects.filter(pk=user.pk).delete()
+
+    def supports_pool(self):
+        if connection.vendor != 'postgresql':
+            return False
+        try:
+            import psycopg  # noqa: F401
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def configure(self, original, mode, pool_size):
+        """Point new connections of the default alias at ``mode`` (``None`` restores the settings)."""
+        if connection.vendor == 'postgresql':
+            connection.close_pool()
+        connections.close_all()
+        options = {key: value for key, value in original.get('OPTIONS', {}).items() if key != 'pool'}
+        if mode == 'pool':
+            options['pool'] = {'min_size': 1, 'max_size': pool_size, 'timeout': 30}
+        # Shared with existing connection objects, which build new connections from it
+        settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+        settings_dict.clear()
+        settings_dict.update(original)
+        if mode is not None:
+            settings_dict.update(MODES[mode], OPTIONS=options)
+
+    def run(self, mode, options):
+        concurrency = options['concurrency']
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            # Warm up, then count from zero
+            list(pool.map(self.request, [options['path']] * concurrency))
+            reset_connection_stats()
+            started = time.perf_counter()
+            latencies = list(pool.map(self.request, [options['path']] * options['requests']))
+            elapsed = time.perf_counter() - started
+            stats = connection_stats()
+            # Close every worker thread's connection before the pool threads go away
+            barrier = threading.Barrier(concurrency)
+            list(pool.map(lambda _: (barrier.wait(), connections.close_all()), range(concurrency)))
+
+        latencies.sort()
+        line = (
+            f"{mode:<11} {options['requests']} requests, concurrency {concurrency}: "
+            f"{options['requests'] / elapsed:>8.1f} requests/s, "
+            f"p50 {statistics.median(latencies) * 1000:.2f} ms, "
+            f"p99 {latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000:.2f} ms, "
+            f"connections opened {stats.get('connections_num', stats['connections_created'])}"
+        )
+        if 'requests_wait_ms' in stats:
+            line += (
+                f", waited for a connection {stats['requests_queued']}x "
+                f"(avg {stats['requests_wait_ms_avg']:.1f} ms, total {stats['requests_wait_ms']} ms)"
+            )
+        self.stdout.write(line)
+
+    def request(self, path):
+        path_info, _, query_string = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path_info,
+            'QUERY_STRING': query_string,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'HTTP_AUTHORIZATION': self.token,
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': BytesIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        statuses = []
+        started = time.perf_counter()
+        response = self.handler(environ, lambda status, headers: statuses.append(int(status.split()[0])))
+        try:
+            b''.join(response)
+        finally:
+            # request_finished: closes or keeps the connection, per CONN_MAX_AGE
+            response.close()
+        latency = time.perf_counter() - started
+        if statuses[0] != 200:
+            raise CommandError(f"GET {path} returned {statuses[0]}")
+        return latency
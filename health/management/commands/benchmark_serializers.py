@@ -0,0 +1,94 @@
+"""
+Compare the DRF serializers behind the health list endpoints with their
+health.fast_serializers counterparts, in rows per second.
+
+Both paths fetch and render the same seeded rows (including the query for
+nested doctors); the command fails if their JSON differs by a single byte.
+All seeded rows are rolled back afterwards.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from health.fast_serializers import FastDoctorSerializer, FastPatientDoctorSerializer, FastPatientSerializer
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark fast read-only serializers against the DRF serializers (rows/second)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--doctors-per-patient', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'], options['doctors_per_patient'])
+                for fast in (FastPatientSerializer, FastDoctorSerializer, FastPatientDoctorSerializer):
+                    self.compare(fast, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def seed(self, rows, doctors_per_patient):
+        user = User.objects.create_user(username='serializer-benchmark', password='unused')
+        doctors = Doctor.objects.bulk_create(
+            Doctor(name=f"Doctor {i}", specialization='General', email=f"serializer-{i}@example.com")
+            for i in range(max(doctors_per_patient, 1) * 10)
+        )
+        patients = Patient.objects.bulk_create(
+            Patient(name=f"Patient {i}", age=i % 100, gender='Female', notes='Notes', created_by=user)
+            for i in range(rows)
+        )
+        PatientDoctor.objects.bulk_create(
+            PatientDoctor(patient=patient, doctor=doctors[(i + j) % len(doctors)])
+            for i, patient in enumerate(patients) for j in range(doctors_per_patient)
+        )
+        self.user = user
+
+    def queryset(self, model):
+        if model is Patient:
+            return Patient.objects.filter(created_by=self.user).defer('search_vector').order_by('id')
+        if model is PatientDoctor:
+            return PatientDoctor.objects.filter(patient__created_by=self.user).order_by('id')
+        return Doctor.objects.order_by('id')
+
+    def compare(self, fast, repeat):
+        drf = fast.serializer_class
+        queryset = self.queryset(drf.Meta.model)
+        setup = getattr(drf, 'setup_eager_loading', lambda queryset: queryset)
+        renderer = JSONRenderer()
+
+        def render_drf():
+            return renderer.render(drf(setup(queryset.all()), many=True).data)
+
+        def render_fast():
+            return renderer.render(fast(fast.values(queryset.all()), many=True).data)
+
+        expected, actual = render_drf(), render_fast()
+        if expected != actual:
+            raise CommandError(f"{fast.__name__} output differs from {drf.__name__}")
+
+        rows = queryset.count()
+        drf_seconds = min(self.timed(render_drf) for _ in range(repeat))
+        fast_seconds = min(self.timed(render_fast) for _ in range(repeat))
+        self.stdout.write(
+            f"{drf.__name__:<24} {rows / drf_seconds:>10.0f} rows/s   "
+            f"{fast.__name__:<28} {rows / fast_seconds:>10.0f} rows/s   x{drf_seconds / fast_seconds:.1f}"
+        )
+
+    def timed(self, render):
+        started = time.perf_counter()
+        render()
+        return time.perf_counter() - started
@@ -0,0 +1,123 @@
+"""
+Check that every health API action runs in a fixed number of SQL queries.
+
+Each action is driven through its viewset against a small and a large seeded
+dataset. The command fails if an action goes over its budget or if its query
+count grows with the number of patients, doctors or assignments. Response
+caching is switched off so the uncached path is measured. All seeded rows are
+rolled back afterwards. health.tests.test_query_budgets asserts the same
+budgets under ``manage.py test``.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from health.models import Doctor, Patient, PatientDoctor
+from health.views import DoctorViewSet, PatientDoctorViewSet, PatientViewSet
+
+User = get_user_model()
+
+# (viewset, action, method) -> maximum number of queries. Detail reads include
+# the aggregate query behind their ETag (list ETags need none); deletes include
+# the INSERT of their changes-feed tombstones; assignment writes include the
+# UPDATEs of the patient and doctor counters (health.counters).
+BUDGETS = {
+    (PatientViewSet, 'list', 'get'): 3,
+    (PatientViewSet, 'retrieve', 'get'): 3,
+    (PatientViewSet, 'create', 'post'): 1,
+    (PatientViewSet, 'partial_update', 'patch'): 4,
+    (PatientViewSet, 'destroy', 'delete'): 7,
+    (PatientViewSet, 'assign_doctor', 'post'): 7,
+    (PatientViewSet, 'unassign_doctor', 'delete'): 7,
+    # These two count the SAVEPOINT / RELEASE pair of their atomic block under this harness
+    (PatientViewSet, 'assign_doctors', 'post'): 8,
+    (PatientViewSet, 'unassign_doctors', 'delete'): 10,
+    (DoctorViewSet, 'list', 'get'): 2,
+    (DoctorViewSet, 'retrieve', 'get'): 4,
+    (DoctorViewSet, 'patients', 'get'): 3,
+    (PatientDoctorViewSet, 'list', 'get'): 2,
+    (PatientDoctorViewSet, 'retrieve', 'get'): 2,
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Check the SQL query budget of every health API action."
+
+    @override_settings(HEALTH_CACHE_TIMEOUT=0)
+    def handle(self, *args, **options):
+        small = self.measure(patients=3, doctors_per_patient=1)
+        large = self.measure(patients=30, doctors_per_patient=4)
+
+        failures = []
+        for key, budget in BUDGETS.items():
+            viewset, action, _ = key
+            label = f"{viewset.__name__}.{action}"
+            self.stdout.write(f"{label:<36} {small[key]:>3} / {large[key]:>3} (budget {budget})")
+            if large[key] > budget:
+                failures.append(f"{label} ran {large[key]} queries, budget is {budget}")
+            elif large[key] != small[key]:
+                failures.append(f"{label} grows with data: {small[key]} -> {large[key]} queries")
+
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All health actions are within their query budgets."))
+
+    def measure(self, patients, doctors_per_patient):
+        counts = {}
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username='query-budget', password='unused')
+                doctors = Doctor.objects.bulk_create(
+                    Doctor(name=f"Doctor {i}", email=f"budget-{i}@example.com")
+                    for i in range(doctors_per_patient + 1)
+                )
+                rows = Patient.objects.bulk_create(
+                    Patient(name=f"Patient {i}", age=40, created_by=user) for i in range(patients)
+                )
+                PatientDoctor.objects.bulk_create(
+                    PatientDoctor(patient=patient, doctor=doctor)
+                    for patient in rows for doctor in doctors[:doctors_per_patient]
+                )
+                patient, doctor, spare = rows[0], doctors[0], doctors[-1]
+                link = PatientDoctor.objects.filter(patient=patient, doctor=doctor).get()
+                pairs = {'pairs': [{'patient_id': row.pk, 'doctor_id': spare.pk} for row in rows]}
+
+                calls = {
+                    (PatientViewSet, 'list', 'get'): ({}, None),
+                    (PatientViewSet, 'retrieve', 'get'): ({'pk': patient.pk}, None),
+                    (PatientViewSet, 'create', 'post'): ({}, {'name': 'New', 'age': 30}),
+                    (PatientViewSet, 'partial_update', 'patch'): ({'pk': patient.pk}, {'notes': 'x'}),
+                    (PatientViewSet, 'assign_doctor', 'post'): ({'pk': patient.pk}, {'doctor_id': spare.pk}),
+                    (PatientViewSet, 'unassign_doctor', 'delete'): ({'pk': patient.pk}, {'doctor_id': spare.pk}),
+                    (PatientViewSet, 'assign_doctors', 'post'): ({}, pairs),
+                    (PatientViewSet, 'unassign_doctors', 'delete'): ({}, pairs),
+                    (PatientViewSet, 'destroy', 'delete'): ({'pk': rows[-1].pk}, None),
+                    (DoctorViewSet, 'list', 'get'): ({}, None),
+                    (DoctorViewSet, 'retrieve', 'get'): ({'pk': doctor.pk}, None),
+                    (DoctorViewSet, 'patients', 'get'): ({'pk': doctor.pk}, None),
+                    (PatientDoctorViewSet, 'list', 'get'): ({}, None),
+                    (PatientDoctorViewSet, 'retrieve', 'get'): ({'pk': link.pk}, None),
+                }
+                for key, (kwargs, data) in calls.items():
+                    counts[key] = self.count_queries(user, *key, kwargs, data)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return counts
+
+    def count_queries(self, user, viewset, action, method, kwargs, data):
+        request = getattr(APIRequestFactory(SERVER_NAME='localhost'), method)('/', data, format='json')
+        force_authenticate(request, user=user)
+        view = viewset.as_view({method: action})
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request, **kwargs)
+            response.render()
+        if response.status_code >= 400:
+            raise CommandError(f"{viewset.__name__}.{action} returned {response.status_code}: {response.data}")
+        return len(queries)
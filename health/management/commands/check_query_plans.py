@@ -0,0 +1,133 @@
+"""
+Check that the health list endpoints are served from indexes.
+
+Seeds a large dataset inside a transaction that is rolled back, refreshes the
+planner statistics, drives each list endpoint (first and second cursor page)
+through its viewset and runs EXPLAIN on every SELECT it issued. The command
+fails if any plan falls back to a sequential scan. Works on PostgreSQL and
+SQLite; health.tests.test_query_plans runs the same check on PostgreSQL under
+``manage.py test``.
+"""
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from health.counters import refresh_doctor_counts
+from health.models import Doctor, Patient, PatientDoctor
+from health.views import AnalyticsView, DoctorViewSet, PatientDoctorViewSet, PatientViewSet
+
+User = get_user_model()
+
+SPECIALIZATIONS = ['Cardiology', 'Dermatology', 'Neurology', 'Oncology', 'Pediatrics', 'Radiology']
+GENDERS = ['Female', 'Male', 'Other']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Fail if any health list endpoint falls back to a sequential scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--patients', type=int, default=50000, help="Total patients across all users")
+        parser.add_argument('--doctors', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                user, doctor = self.seed(options)
+                for label, view, kwargs, query in self.cases(doctor):
+                    for plan_line in self.check_endpoint(user, label, view, kwargs, query):
+                        failures.append(f"{label}: {plan_line}")
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError("Sequential scans found:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All health list endpoints use indexes."))
+
+    def cases(self, doctor):
+        patients = PatientViewSet.as_view({'get': 'list'})
+        doctors = DoctorViewSet.as_view({'get': 'list'})
+        links = PatientDoctorViewSet.as_view({'get': 'list'})
+        return [
+            ('patient-list', patients, {}, ''),
+            ('patient-list by name', patients, {}, 'ordering=name'),
+            ('patient-list by gender', patients, {}, 'gender=Female'),
+            ('patient-list by doctor count', patients, {}, 'doctor_count__gte=2&ordering=-doctor_count'),
+            ('patient-list search', patients, {}, 'search=patient'),
+            ('doctor-list', doctors, {}, ''),
+            ('doctor-list by specialization', doctors, {}, 'specialization=Cardiology'),
+            ('doctor-list by patient count', doctors, {}, 'patient_count__gte=50&ordering=-patient_count'),
+            ('doctor-patients', DoctorViewSet.as_view({'get': 'patients'}), {'pk': doctor.pk}, ''),
+            ('patientdoctor-list', links, {}, ''),
+            ('patientdoctor-list by doctor', links, {}, f'doctor={doctor.pk}'),
+            ('analytics', AnalyticsView.as_view(), {}, 'interval=day&periods=30'),
+        ]
+
+    def check_endpoint(self, user, label, view, kwargs, query):
+        query = f"pagination=cursor&{query}".rstrip('&')
+        scans = []
+        for page in ('first page', 'second page'):
+            request = APIRequestFactory(SERVER_NAME='localhost').get(f'/?{query}')
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request, **kwargs)
+                response.render()
+            if response.status_code != 200:
+                raise CommandError(f"{label} returned {response.status_code}")
+            for captured in queries:
+                if captured['sql'].lstrip().upper().startswith('SELECT'):
+                    scans.extend(f"{page}: {line}" for line in self.sequential_scans(captured['sql']))
+            if not response.data.get('next'):
+                break
+            query = urlsplit(response.data['next']).query
+        self.stdout.write(f"{label:<32} {'SEQ SCAN' if scans else 'ok'}")
+        return scans
+
+    def sequential_scans(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"EXPLAIN {sql}")
+                return [row[0].strip() for row in cursor.fetchall() if 'Seq Scan' in row[0]]
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [
+                row[-1] for row in cursor.fetchall()
+                if row[-1].startswith('SCAN ') and ' USING ' not in row[-1]
+            ]
+
+    def seed(self, options):
+        batch_size = options['batch_size']
+        users = User.objects.bulk_create(
+            User(username=f'query-plan-{i}', password='!') for i in range(options['users'])
+        )
+        doctors = Doctor.objects.bulk_create(
+            (Doctor(name=f"Doctor {i}", email=f"query-plan-{i}@example.com",
+                    specialization=SPECIALIZATIONS[i % len(SPECIALIZATIONS)])
+             for i in range(options['doctors'])),
+            batch_size=batch_size,
+        )
+        patients = Patient.objects.bulk_create(
+            (Patient(name=f"Patient {i}", age=i % 90, gender=GENDERS[i % len(GENDERS)],
+                     created_by=users[i % len(users)], doctor_count=2)
+             for i in range(options['patients'])),
+            batch_size=batch_size,
+        )
+        PatientDoctor.objects.bulk_create(
+            (PatientDoctor(patient=patient, doctor=doctors[(i * 7 + k) % len(doctors)])
+             for i, patient in enumerate(patients) for k in range(2)),
+            batch_size=batch_size,
+        )
+        refresh_doctor_counts(Doctor.objects.filter(pk__in=[doctor.pk for doctor in doctors]))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return users[0], doctors[0]
@@ -0,0 +1,216 @@
+"""
+Generate a synthetic dataset of users, doctors, patients and assignments.
+
+Sized by ``--patients`` (10k to 10M and beyond); users and doctors default to
+one per 100 and one per 50 patients. Patients are spread unevenly over their
+owners (a few users own many), and each gets 0 to ``2 * --assignments``
+distinct doctors. Rows are written with ``bulk_create`` in batches of
+``--batch-size``, one transaction per batch, so memory stays flat and an
+interrupted run keeps what it committed.
+
+Generated users share one password (``--password``, hashed once) so the
+benchmark_api command can log in as them. Every generated row is recognizable
+by ``--prefix`` (in usernames and doctor emails); ``--clear`` deletes the rows
+of an earlier run with that prefix before generating.
+"""
+import itertools
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from health.counters import refresh_doctor_counts
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+FIRST_NAMES = (
+    'Aarav', 'Aditi', 'Ananya', 'Arjun', 'Diya', 'Emma', 'Farhan', 'Grace', 'Ishaan', 'Kavya', 'Liam', 'Meera',
+    'Mohammed', 'Noah', 'Olivia', 'Priya', 'Rahul', 'Riya', 'Rohan', 'Saanvi', 'Sara', 'Vikram', 'Zara', 'Zoya',
+)
+LAST_NAMES = (
+    'Agarwal', 'Bhat', 'Brown', 'Das', 'Fernandes', 'Gupta', 'Iyer', 'Joshi', 'Kapoor', 'Khan', 'Kumar', 'Menon',
+    'Nair', 'Patel', 'Rao', 'Reddy', 'Shetty', 'Singh', 'Smith', 'Thomas', 'Verma', 'Williams',
+)
+GENDERS = ('Female', 'Male', 'Other', None)
+GENDER_WEIGHTS = (48, 48, 2, 2)
+SPECIALIZATIONS = (
+    'Cardiology', 'Dermatology', 'Endocrinology', 'ENT', 'Gastroenterology', 'General Medicine', 'Gynecology',
+    'Nephrology', 'Neurology', 'Oncology', 'Ophthalmology', 'Orthopedics', 'Pediatrics', 'Psychiatry',
+    'Pulmonology', 'Radiology', 'Urology',
+)
+CONDITIONS = (
+    'asthma', 'back pain', 'diabetes', 'hypertension', 'migraine', 'seasonal allergies', 'thyroid disorder',
+    'arthritis', 'anemia', 'high cholesterol', 'insomnia', 'eczema',
+)
+NOTES = (
+    "Follow-up for {condition} in {weeks} weeks.",
+    "History of {condition}; currently stable.",
+    "Referred for {condition}. Bring previous reports.",
+    "Reports {condition}, review medication at next visit.",
+    "",
+)
+
+
+def name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, doctors, patients and assignments with bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=10000)
+        parser.add_argument('--users', type=int, help="Default: one per 100 patients")
+        parser.add_argument('--doctors', type=int, help="Default: one per 50 patients (at least 10)")
+        parser.add_argument('--assignments', type=float, default=2,
+                            help="Average doctors per patient")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help="Same seed, same dataset")
+        parser.add_argument('--prefix', default='synthetic-',
+                            help="Marks generated usernames and doctor emails")
+        parser.add_argument('--password', default='synthetic-password',
+                            help="Password of every generated user")
+        parser.add_argument('--clear', action='store_true',
+                            help="Delete rows generated earlier with this prefix first")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if not prefix:
+            raise CommandError("--prefix can't be empty")
+        self.rng = random.Random(options['seed'])
+        self.batch_size = max(options['batch_size'], 1)
+        patients = options['patients']
+        users = options['users'] or max(patients // 100, 1)
+        doctors = options['doctors'] or max(patients // 50, 10)
+
+        if options['clear']:
+            self.clear(prefix)
+        elif User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users named {prefix}* already exist; pass --clear to replace them")
+
+        started = time.perf_counter()
+        user_ids = self.create_users(prefix, users, options['password'])
+        doctor_ids = self.create_doctors(prefix, doctors)
+        created, assignments = self.create_patients(patients, user_ids, doctor_ids, options['assignments'])
+        elapsed = time.perf_counter() - started
+        rows = len(user_ids) + len(doctor_ids) + created + assignments
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(user_ids)} users, {len(doctor_ids)} doctors, {created} patients and "
+            f"{assignments} assignments in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s)"
+        ))
+
+    def batches(self, iterable):
+        iterator = iter(iterable)
+        while batch := list(itertools.islice(iterator, self.batch_size)):
+            yield batch
+
+    def create_users(self, prefix, count, password):
+        # Hashing is deliberately slow: hash once, share the result
+        password = make_password(password)
+        user_ids = []
+        for batch in self.batches(range(count)):
+            users = User.objects.bulk_create(
+                User(
+                    username=f'{prefix}user-{i}',
+                    email=f'{prefix}user-{i}@example.com',
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    password=password,
+                )
+                for i in batch
+            )
+            user_ids += [user.pk for user in users]
+        return user_ids
+
+    def create_doctors(self, prefix, count):
+        doctor_ids = []
+        for batch in self.batches(range(count)):
+            doctors = Doctor.objects.bulk_create(
+                Doctor(
+                    name=name(self.rng),
+                    specialization=self.rng.choice(SPECIALIZATIONS),
+                    email=f'{prefix}doctor-{i}@example.com',
+                    phone=f'+91 {self.rng.randrange(70000, 99999)} {self.rng.randrange(10000, 99999)}',
+                )
+                for i in batch
+            )
+            doctor_ids += [doctor.pk for doctor in doctors]
+        return doctor_ids
+
+    def notes(self):
+        return self.rng.choice(NOTES).format(condition=self.rng.choice(CONDITIONS), weeks=self.rng.randint(1, 12))
+
+    def create_patients(self, count, user_ids, doctor_ids, assignments):
+        # Owner weights fall off with rank: the first users own most patients
+        owner_weights = list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(user_ids))))
+        max_doctors = min(round(assignments * 2), len(doctor_ids))
+        created = linked = 0
+        progress = time.perf_counter()
+        for batch in self.batches(range(count)):
+            owners = self.rng.choices(user_ids, cum_weights=owner_weights, k=len(batch))
+            genders = self.rng.choices(GENDERS, weights=GENDER_WEIGHTS, k=len(batch))
+            assigned = [self.rng.sample(doctor_ids, self.rng.randint(0, max_doctors)) for _ in batch]
+            with transaction.atomic():
+                patients = Patient.objects.bulk_create(
+                    Patient(
+                        name=name(self.rng),
+                        age=self.rng.randint(0, 95),
+                        gender=gender,
+                        notes=self.notes(),
+                        created_by_id=owner,
+                        doctor_count=len(doctors),
+                    )
+                    for owner, gender, doctors in zip(owners, genders, assigned)
+                )
+                links = PatientDoctor.objects.bulk_create(
+                    PatientDoctor(patient_id=patient.pk, doctor_id=doctor_id)
+                    for patient, doctors in zip(patients, assigned)
+                    for doctor_id in doctors
+                )
+            created += len(patients)
+            linked += len(links)
+            if time.perf_counter() - progress >= 5:
+                progress = time.perf_counter()
+                self.stdout.write(f"  {created}/{count} patients, {linked} assignments")
+        self.recount_doctors(doctor_ids)
+        return created, linked
+
+    def recount_doctors(self, doctor_ids):
+        """Bring Doctor.patient_count up to date after writes that bypassed the counters."""
+        for batch in self.batches(doctor_ids):
+            with transaction.atomic():
+                refresh_doctor_counts(Doctor.objects.filter(pk__in=batch))
+
+    def clear(self, prefix):
+        """Delete the rows of an earlier run with ``prefix``, a batch at a time."""
+        owned = {
+            PatientDoctor: PatientDoctor.objects.filter(patient__created_by__username__startswith=prefix),
+            Patient: Patient.objects.filter(created_by__username__startswith=prefix),
+        }
+        # Doctors that keep existing lose these patients: recount them afterwards
+        assigned_doctors = set(owned[PatientDoctor].values_list('doctor_id', flat=True).distinct())
+        for model, queryset in owned.items():
+            ids = queryset.order_by().values_list('pk', flat=True)
+            while batch := list(ids[:self.batch_size]):
+                # Their owners go too, so there are no tombstones to record or
+                # caches to invalidate: skip the per-row delete signals
+                model.objects.filter(pk__in=batch)._raw_delete(queryset.db)
+        # Doctors are shared: delete them normally, so other users' clients get
+        # tombstones for them and for any of their own assignments to them
+        doctors = Doctor.objects.filter(email__startswith=prefix, email__endswith='@example.com')
+        ids = doctors.order_by().values_list('pk', flat=True)
+        deleted_doctors = 0
+        while batch := list(ids[:self.batch_size]):
+            Doctor.objects.filter(pk__in=batch).delete()
+            deleted_doctors += len(batch)
+        ids = User.objects.filter(username__startswith=prefix).order_by().values_list('pk', flat=True)
+        deleted_users = 0
+        while batch := list(ids[:self.batch_size]):
+            User.objects.filter(pk__in=batch).delete()
+            deleted_users += len(batch)
+        self.recount_doctors(list(Doctor.objects.filter(pk__in=assigned_doctors).values_list('pk', flat=True)))
+        self.stdout.write(f"Deleted {deleted_users} users and {deleted_doctors} doctors generated with {prefix!r}")
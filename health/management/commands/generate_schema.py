@@ -0,0 +1,46 @@
+"""
+Write the OpenAPI schema artifacts for the current code version.
+
+Run at deploy time (after collectstatic, before starting workers) so no
+request pays for generating the schema; workers read the files from
+API_SCHEMA_DIR on first use (config.schema). Artifacts of other versions are
+deleted unless ``--keep-old``.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.schema import CODECS, artifact_path, code_version, render_schema, write_artifacts
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema (JSON and YAML) into API_SCHEMA_DIR for the current code version."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-old', action='store_true',
+                            help="Keep artifacts of other code versions")
+        parser.add_argument('--check', action='store_true',
+                            help="Fail if the artifacts for this version are missing")
+
+    def handle(self, *args, **options):
+        version = code_version()
+        if options['check']:
+            missing = [str(artifact_path(extension)) for extension in CODECS.values()
+                       if not artifact_path(extension).exists()]
+            if missing:
+                raise CommandError(f"Schema {version} not generated: {', '.join(missing)}")
+            self.stdout.write(self.style.SUCCESS(f"Schema {version} is up to date"))
+            return
+
+        started = time.perf_counter()
+        paths = write_artifacts(render_schema())
+        elapsed = (time.perf_counter() - started) * 1000
+        for path in paths:
+            self.stdout.write(f"  {path} ({path.stat().st_size} bytes)")
+        self.stdout.write(self.style.SUCCESS(f"Generated schema {version} in {elapsed:.0f} ms"))
+
+        if not options['keep_old']:
+            for path in paths[0].parent.glob('openapi-*.*'):
+                if path not in paths:
+                    path.unlink(missing_ok=True)
+                    self.stdout.write(f"  removed {path.name}")
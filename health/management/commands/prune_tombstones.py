@@ -0,0 +1,36 @@
+"""
+Delete changes-feed tombstones older than HEALTH_SYNC_TOMBSTONE_DAYS.
+
+Sync tokens issued before the cutoff are rejected with 410 Gone, so clients
+holding them start a full sync instead of missing the pruned deletes. A
+shorter ``--days`` is refused: tokens younger than the retention period are
+still accepted and would silently miss the deletes pruned under them.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from health.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete changes-feed tombstones past the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.HEALTH_SYNC_TOMBSTONE_DAYS,
+            help=f"Keep tombstones this many days (at least HEALTH_SYNC_TOMBSTONE_DAYS, "
+                 f"{settings.HEALTH_SYNC_TOMBSTONE_DAYS})"
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < settings.HEALTH_SYNC_TOMBSTONE_DAYS:
+            raise CommandError(
+                f"--days must be at least HEALTH_SYNC_TOMBSTONE_DAYS ({settings.HEALTH_SYNC_TOMBSTONE_DAYS}); "
+                "sync tokens that recent are still accepted and would miss the pruned deletes"
+            )
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted} tombstones older than {options['days']} days")
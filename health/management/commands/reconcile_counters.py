@@ -0,0 +1,64 @@
+"""
+Recompute the denormalized assignment counters from PatientDoctor.
+
+Walks patients and doctors in primary key order, ``--batch-size`` rows at a
+time with one transaction per batch, and rewrites only the counters that are
+wrong (see health.counters). Signals keep the counters exact for writes made
+through the ORM; run this after raw SQL or data fixes, or from cron to catch
+drift from concurrent edits. ``--dry-run`` only reports.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from health.cache import invalidate_users_on_commit
+from health.counters import refresh_doctor_counts, refresh_patient_counts, stale_doctors, stale_patients
+from health.models import Doctor, Patient
+
+
+class Command(BaseCommand):
+    help = "Recompute Patient.doctor_count and Doctor.patient_count from the assignments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help="Count wrong counters without fixing them")
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        dry_run = options['dry_run']
+        for model, field, refresh, stale in (
+            (Patient, 'doctor_count', refresh_patient_counts, stale_patients),
+            (Doctor, 'patient_count', refresh_doctor_counts, stale_doctors),
+        ):
+            started = time.perf_counter()
+            checked = wrong = 0
+            for first, last, size in self.ranges(model, batch_size):
+                rows = model.objects.filter(pk__gte=first, pk__lte=last)
+                if dry_run:
+                    wrong += stale(rows).count()
+                else:
+                    with transaction.atomic():
+                        if model is Patient:
+                            # Cached patient lists show doctor_count
+                            owners = stale(rows).values_list('created_by_id', flat=True).distinct()
+                            invalidate_users_on_commit(owners)
+                        wrong += refresh(rows)
+                checked += size
+            elapsed = time.perf_counter() - started
+            verb = "wrong" if dry_run else "fixed"
+            style = self.style.WARNING if wrong and dry_run else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{model.__name__}.{field}: {checked} rows checked, {wrong} {verb} in {elapsed:.1f} s"
+            ))
+
+    def ranges(self, model, batch_size):
+        """``(first_pk, last_pk, rows)`` of consecutive batches, by keyset on the primary key."""
+        ids = model.objects.order_by('pk').values_list('pk', flat=True)
+        last = None
+        while True:
+            batch = list((ids if last is None else ids.filter(pk__gt=last))[:batch_size])
+            if not batch:
+                return
+            last = batch[-1]
+            yield batch[0], last, len(batch)
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("health", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patientdoctor",
+            index=models.Index(fields=["doctor", "-created_at", "-id"], name="patientdoctor_doctor_recent"),
+        ),
+    ]
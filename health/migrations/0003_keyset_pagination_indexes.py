@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-17 04:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("health", "0002_patientdoctor_doctor_recent_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="doctor",
+            index=models.Index(fields=["name", "id"], name="doctor_name"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["created_by", "-created_at", "-id"], name="patient_owner_recent"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["created_by", "name", "id"], name="patient_owner_name"),
+        ),
+        migrations.AddIndex(
+            model_name="patientdoctor",
+            index=models.Index(fields=["-created_at", "-id"], name="patientdoctor_recent"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 04:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("health", "0003_keyset_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="doctor",
+            index=models.Index(fields=["specialization", "name", "id"], name="doctor_specialization_name"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["created_by", "gender"], name="patient_owner_gender"),
+        ),
+    ]
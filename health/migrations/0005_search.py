@@ -0,0 +1,66 @@
+# Generated by Django 5.1.4 on 2026-10-17 04:25
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION health_patient_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.notes, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER health_patient_search_vector
+    BEFORE INSERT OR UPDATE OF name, notes ON health_patient
+    FOR EACH ROW EXECUTE FUNCTION health_patient_search_vector_update()
+    """,
+    # Existing rows are backfilled in batches by 0008_search_backfill
+    "CREATE INDEX patient_search_vector ON health_patient USING gin (search_vector)",
+    "CREATE INDEX patient_name_trgm ON health_patient USING gin (name gin_trgm_ops)",
+    "CREATE INDEX doctor_name_trgm ON health_doctor USING gin (name gin_trgm_ops)",
+    "CREATE INDEX doctor_email_trgm ON health_doctor USING gin (email gin_trgm_ops)",
+    "CREATE INDEX doctor_specialization_trgm ON health_doctor USING gin (specialization gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS doctor_specialization_trgm",
+    "DROP INDEX IF EXISTS doctor_email_trgm",
+    "DROP INDEX IF EXISTS doctor_name_trgm",
+    "DROP INDEX IF EXISTS patient_name_trgm",
+    "DROP INDEX IF EXISTS patient_search_vector",
+    "DROP TRIGGER IF EXISTS health_patient_search_vector ON health_patient",
+    "DROP FUNCTION IF EXISTS health_patient_search_vector_update()",
+]
+
+
+def run_on_postgres(statements):
+    # Full-text and trigram search only exist on PostgreSQL; other databases
+    # use the icontains fallback in health.filters.HealthSearchFilter.
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("health", "0004_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_on_postgres(POSTGRES_FORWARD), run_on_postgres(POSTGRES_REVERSE)),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-17 04:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("health", "0005_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model", models.CharField(choices=[("patient", "Patient"), ("doctor", "Doctor"), ("assignment", "Assignment")], max_length=20)),
+                ("object_id", models.BigIntegerField()),
+                ("owner_id", models.BigIntegerField(blank=True, null=True)),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="doctor",
+            index=models.Index(fields=["updated_at", "id"], name="doctor_changes"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["created_by", "updated_at", "id"], name="patient_owner_changes"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["owner_id", "id"], name="tombstone_owner"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["deleted_at"], name="tombstone_deleted_at"),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-17 05:16
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counts(apps, schema_editor):
+    # One UPDATE per table with a correlated count; manage.py reconcile_counters
+    # does the same in batches for tables too large to update at once
+    PatientDoctor = apps.get_model("health", "PatientDoctor")
+    for model_name, field, link_field in (
+        ("Patient", "doctor_count", "patient"),
+        ("Doctor", "patient_count", "doctor"),
+    ):
+        links = PatientDoctor.objects.filter(**{link_field: OuterRef("pk")}).order_by().values(link_field)
+        count = Coalesce(Subquery(links.annotate(total=Count("pk")).values("total")), 0, output_field=IntegerField())
+        apps.get_model("health", model_name).objects.update(**{field: count})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("health", "0006_changes_feed"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="doctor",
+            name="patient_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="doctor_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="doctor",
+            index=models.Index(fields=["patient_count", "id"], name="doctor_patient_count"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["created_by", "doctor_count", "id"], name="patient_owner_doctor_count"),
+        ),
+    ]
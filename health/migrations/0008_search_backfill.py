@@ -0,0 +1,54 @@
+from django.db import migrations
+
+BATCH_SIZE = 5000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # Fill search_vector for rows that predate the trigger, one id range per
+    # statement so no single UPDATE rewrites the whole table or holds its locks
+    # for long. The trigger (0005_search) computes the vector on "SET name = name".
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT min(id), max(id) FROM health_patient WHERE search_vector IS NULL")
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+        for start in range(low, high + 1, BATCH_SIZE):
+            cursor.execute(
+                "UPDATE health_patient SET name = name "
+                "WHERE id >= %s AND id < %s AND search_vector IS NULL",
+                [start, start + BATCH_SIZE],
+            )
+
+
+def create_notes_index(apps, schema_editor):
+    # ILIKE on notes (HealthSearchFilter keeps icontains matching); built
+    # concurrently so writes to patients aren't blocked meanwhile
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS patient_notes_trgm "
+        "ON health_patient USING gin (notes gin_trgm_ops)"
+    )
+
+
+def drop_notes_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS patient_notes_trgm")
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own; CREATE INDEX CONCURRENTLY can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ("health", "0007_assignment_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(create_notes_index, drop_notes_index),
+    ]
@@ -0,0 +1,39 @@
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Max, Min
+
+BATCH_SIZE = 5000
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing assignments were last changed when they were created. One id
+    # range per UPDATE so the table isn't rewritten in a single statement.
+    PatientDoctor = apps.get_model("health", "PatientDoctor")
+    bounds = PatientDoctor.objects.aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return
+    for start in range(bounds["low"], bounds["high"] + 1, BATCH_SIZE):
+        PatientDoctor.objects.filter(id__gte=start, id__lt=start + BATCH_SIZE).update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ("health", "0008_search_backfill"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patientdoctor",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="patientdoctor",
+            index=models.Index(fields=["updated_at", "id"], name="patientdoctor_changes"),
+        ),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 
 User = get_user_model()
 
@@ -11,6 +12,22 @@ class Patient(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="patients")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted name (A) + notes (B) tsvector, maintained by a PostgreSQL trigger
+    # and GIN-indexed together with trigram indexes (see migration 0005)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Number of assigned doctors, maintained by health.counters
+    doctor_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Owner-scoped listing in the default and name orderings (keyset pagination)
+            models.Index(fields=["created_by", "-created_at", "-id"], name="patient_owner_recent"),
+            models.Index(fields=["created_by", "name", "id"], name="patient_owner_name"),
+            models.Index(fields=["created_by", "gender"], name="patient_owner_gender"),
+            models.Index(fields=["created_by", "doctor_count", "id"], name="patient_owner_doctor_count"),
+            # Changes feed
+            models.Index(fields=["created_by", "updated_at", "id"], name="patient_owner_changes"),
+        ]
 
     def __str__(self):
         return f"{self.name} (id={self.id})"
@@ -22,6 +39,17 @@ class Doctor(models.Model):
     phone = models.CharField(max_length=50, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Number of assigned patients, maintained by health.counters
+    patient_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["name", "id"], name="doctor_name"),
+            models.Index(fields=["patient_count", "id"], name="doctor_patient_count"),
+            models.Index(fields=["specialization", "name", "id"], name="doctor_specialization_name"),
+            # Changes feed
+            models.Index(fields=["updated_at", "id"], name="doctor_changes"),
+        ]
 
     def __str__(self):
         return f"Dr. {self.name}"
@@ -30,9 +58,54 @@ class PatientDoctor(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name="doctor_links")
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name="patient_links")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Moves to another patient or doctor (PUT/PATCH) reach the changes feed through this
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("patient", "doctor")
+        indexes = [
+            # Keyset pagination of a doctor's patients (DoctorViewSet.patients)
+            models.Index(fields=["doctor", "-created_at", "-id"], name="patientdoctor_doctor_recent"),
+            models.Index(fields=["-created_at", "-id"], name="patientdoctor_recent"),
+            # Changes feed
+            models.Index(fields=["updated_at", "id"], name="patientdoctor_changes"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Keep the INSERT/UPDATE and the counter updates of the post_save
+        # handlers (health.signals) in one transaction; deletes already are
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.patient_id} -> {self.doctor_id}"
+
+
+class Tombstone(models.Model):
+    """A hard-deleted patient, doctor or assignment, kept for the changes feed."""
+    PATIENT = "patient"
+    DOCTOR = "doctor"
+    ASSIGNMENT = "assignment"
+    MODEL_CHOICES = [
+        (PATIENT, "Patient"),
+        (DOCTOR, "Doctor"),
+        (ASSIGNMENT, "Assignment"),
+    ]
+
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    # User who owned the deleted patient or assignment; NULL for doctors,
+    # which are visible to everyone. Not a foreign key so tombstones can be
+    # written while the owner itself is being deleted.
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner_id", "id"], name="tombstone_owner"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_at"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted"
@@ -0,0 +1,260 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import cached_property
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def approximate_count(queryset):
+    """Row estimate from the PostgreSQL planner; exact COUNT(*) on other databases."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+async def aapproximate_count(queryset):
+    if connections[queryset.db].vendor != 'postgresql':
+        return await queryset.acount()
+    plan = json.loads(await queryset.order_by().aexplain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def wants_approximate_count(request):
+    return request.query_params.get('count') == 'approximate'
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on the view's ordering plus a primary key tiebreaker.
+
+    Each page is fetched with ``WHERE (ordering, pk) > cursor LIMIT page_size``,
+    so it costs the same at any depth and never runs COUNT(*) unless the client
+    asks for ``?count=approximate``.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare(queryset, request, view)
+        self.count = approximate_count(queryset) if wants_approximate_count(request) else None
+        return self.finish(list(self.window(queryset)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare(queryset, request, view)
+        self.count = await aapproximate_count(queryset) if wants_approximate_count(request) else None
+        return self.finish([row async for row in self.window(queryset)])
+
+    def prepare(self, queryset, request, view):
+        """Resolve the ordering and cursor; returns the ordered queryset (no query yet)."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.with_tiebreaker(queryset, self.get_ordering(request, queryset, view))
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.position, self.reverse = self.decode_cursor(request, queryset)
+        return queryset.order_by(*self.ordering)
+
+    def window(self, queryset):
+        """The rows of this page plus one, to tell whether there is another."""
+        if self.position is not None:
+            queryset = queryset.filter(self.seek(self.position, self.reverse))
+        if self.reverse:
+            queryset = queryset.reverse()
+        return queryset[:self.page_size + 1]
+
+    def finish(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.has_next = self.position is not None if self.reverse else has_more
+        self.has_previous = has_more if self.reverse else self.position is not None
+        self.first_position = self.position_of(rows[0]) if rows else None
+        self.last_position = self.position_of(rows[-1]) if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = self.ordering
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view) or ordering
+                break
+        if ordering is None:
+            ordering = getattr(view, 'ordering', None) or ('pk',)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+    def with_tiebreaker(self, queryset, ordering):
+        pk = queryset.model._meta.pk.name
+        names = [name.lstrip('-') for name in ordering]
+        for name in names:
+            if name == 'pk' or name in queryset.query.annotations:
+                continue
+            if queryset.model._meta.get_field(name).null:
+                raise ValidationError({'ordering': f"Cursor pagination cannot order by nullable field '{name}'."})
+        if 'pk' in names or pk in names:
+            return ordering
+        return ordering + (('-' if ordering[-1].startswith('-') else '') + pk,)
+
+    def seek(self, position, reverse):
+        """Rows strictly after ``position`` in the ordering (before it when ``reverse``)."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip('-')
+            descending = name.startswith('-') != reverse
+            condition |= equal & Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def position_of(self, obj):
+        if isinstance(obj, dict):
+            # .values() rows (health.fast_serializers)
+            return [obj['id' if field == 'pk' else field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def encode_cursor(self, position, reverse):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        token = json.dumps({'p': values, 'r': int(reverse)}, separators=(',', ':'), default=str)
+        return urlsafe_b64encode(token.encode()).decode()
+
+    def decode_cursor(self, request, queryset):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(token.encode()))
+            values = data['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [self.to_python(queryset, field, value) for field, value in zip(self.fields, values)]
+            return position, bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, queryset, field, value):
+        if field in queryset.query.annotations:
+            # Annotations such as search_rank are plain JSON numbers
+            return value
+        if field == 'pk':
+            return queryset.model._meta.pk.to_python(value)
+        return queryset.model._meta.get_field(field).to_python(value)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_position, False))
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.first_position, True))
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class HealthPagination(PageNumberPagination):
+    """
+    Page-number pagination unless the client opts into keyset pagination
+    with ``?pagination=cursor`` (or follows a ``?cursor=`` link).
+
+    ``?count=approximate`` swaps the exact COUNT(*) for a planner estimate.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get('pagination') == 'cursor' or self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.django_paginator_class = (
+            ApproximateCountPaginator if wants_approximate_count(request) else DjangoPaginator
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` with the COUNT and page queries run through the async ORM."""
+        self.keyset = None
+        if request.query_params.get('pagination') == 'cursor' or self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = DjangoPaginator(queryset, page_size)
+        # Paginator.count is a cached_property: fill it so page() doesn't query
+        paginator.count = await (aapproximate_count(queryset) if wants_approximate_count(request) else queryset.acount())
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        self.page.object_list = [row async for row in self.page.object_list]
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class DoctorPatientsPagination(KeysetPagination):
+    """Keyset pagination over a doctor's PatientDoctor links, newest first."""
+    page_size = 50
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        # The doctor viewset's OrderingFilter targets Doctor fields, not links
+        return self.ordering
@@ -1,11 +1,40 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from config.metrics import TimedSerializerMixin
 from .models import Patient, Doctor, PatientDoctor
 
 User = get_user_model()
 
 
-class DoctorSerializer(serializers.ModelSerializer):
+def check_age(value):
+    if value is not None and (value < 0 or value > 150):
+        raise serializers.ValidationError("Age must be between 0 and 150.")
+    return value
+
+
+def _doctor_links(patient):
+    """Patient's links with doctors in assignment order, reusing a prefetch when the view made one."""
+    if 'doctor_links' in getattr(patient, '_prefetched_objects_cache', {}):
+        return patient.doctor_links.all()
+    return patient.doctor_links.select_related('doctor').order_by('id')
+
+
+def _patient_links(doctor):
+    """Doctor's links with patients, reusing a prefetch when the view made one."""
+    if 'patient_links' in getattr(doctor, '_prefetched_objects_cache', {}):
+        return doctor.patient_links.all()
+    return with_linked_patients(doctor.patient_links.all())
+
+
+def with_linked_patients(queryset):
+    """Join PatientDoctor links to everything PatientSerializer renders for the patient."""
+    return queryset.select_related('patient__created_by').defer('patient__search_vector').prefetch_related(
+        Prefetch('patient__doctor_links', queryset=PatientDoctor.objects.select_related('doctor').order_by('id'))
+    )
+
+
+class DoctorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Doctor
         fields = '__all__'
@@ -18,44 +47,61 @@ class DoctorSerializer(serializers.ModelSerializer):
         return value
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class AssignedDoctorSerializer(DoctorSerializer):
+    """
+    A doctor nested in a patient or synced through the changes feed. Leaves
+    out patient_count: other users' assignments change it without touching
+    the doctor's updated_at (health.counters).
+    """
+    class Meta:
+        model = Doctor
+        exclude = ('patient_count',)
+
+
+class PatientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by = serializers.StringRelatedField(read_only=True)
     doctors = serializers.SerializerMethodField(read_only=True)
     
     class Meta:
         model = Patient
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('created_by', 'created_at', 'updated_at')
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('created_by').prefetch_related(
+            Prefetch('doctor_links', queryset=PatientDoctor.objects.select_related('doctor').order_by('id'))
+        )
+    
     def get_doctors(self, obj):
-        doctors = [link.doctor for link in obj.doctor_links.all()]
-        return DoctorSerializer(doctors, many=True).data
+        doctors = [link.doctor for link in _doctor_links(obj)]
+        return AssignedDoctorSerializer(doctors, many=True).data
         
     def validate_age(self, value):
-        if value is not None and (value < 0 or value > 150):
-            raise serializers.ValidationError("Age must be between 0 and 150.")
-        return value
+        return check_age(value)
 
 
-class PatientCreateSerializer(serializers.ModelSerializer):
+class PatientCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Patient
         fields = ('name', 'age', 'gender', 'notes')
         
     def validate_age(self, value):
-        if value is not None and (value < 0 or value > 150):
-            raise serializers.ValidationError("Age must be between 0 and 150.")
-        return value
+        return check_age(value)
 
 
-class PatientDoctorSerializer(serializers.ModelSerializer):
+class PatientDoctorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     patient_name = serializers.CharField(source='patient.name', read_only=True)
     doctor_name = serializers.CharField(source='doctor.name', read_only=True)
     
     class Meta:
         model = PatientDoctor
         fields = '__all__'
-        read_only_fields = ('created_at',)
+        read_only_fields = ('created_at', 'updated_at')
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('patient', 'doctor')
         
     def validate(self, attrs):
         patient = attrs.get('patient')
@@ -79,22 +125,51 @@ class AssignDoctorSerializer(serializers.Serializer):
         return value
 
 
-class PatientDetailSerializer(serializers.ModelSerializer):
+class AssignmentPairSerializer(serializers.Serializer):
+    patient_id = serializers.IntegerField()
+    doctor_id = serializers.IntegerField()
+
+
+class BulkAssignmentSerializer(serializers.Serializer):
+    pairs = AssignmentPairSerializer(many=True, allow_empty=False, max_length=10000)
+
+
+class PatientChangeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Patient row for the changes feed; assignments and doctors sync as their own streams."""
+    created_by = serializers.StringRelatedField(read_only=True)
+    
+    class Meta:
+        model = Patient
+        exclude = ('search_vector',)
+
+
+class AssignmentChangeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """PatientDoctor row for the changes feed."""
+    
+    class Meta:
+        model = PatientDoctor
+        fields = ('id', 'patient', 'doctor', 'created_at', 'updated_at')
+
+
+class PatientDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by = serializers.StringRelatedField(read_only=True)
     assigned_doctors = serializers.SerializerMethodField()
     
     class Meta:
         model = Patient
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('created_by', 'created_at', 'updated_at')
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return PatientSerializer.setup_eager_loading(queryset)
+    
     def get_assigned_doctors(self, obj):
-        doctor_links = obj.doctor_links.all()
-        doctors = [link.doctor for link in doctor_links]
-        return DoctorSerializer(doctors, many=True).data
+        doctors = [link.doctor for link in _doctor_links(obj)]
+        return AssignedDoctorSerializer(doctors, many=True).data
 
 
-class DoctorDetailSerializer(serializers.ModelSerializer):
+class DoctorDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     assigned_patients = serializers.SerializerMethodField()
     
     class Meta:
@@ -102,7 +177,11 @@ class DoctorDetailSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        patient_links = with_linked_patients(PatientDoctor.objects.all())
+        return queryset.prefetch_related(Prefetch('patient_links', queryset=patient_links))
+    
     def get_assigned_patients(self, obj):
-        patient_links = obj.patient_links.all()
-        patients = [link.patient for link in patient_links]
+        patients = [link.patient for link in _patient_links(obj)]
         return PatientSerializer(patients, many=True).data
\ No newline at end of file
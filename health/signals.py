@@ -0,0 +1,136 @@
+"""
+Side effects of writes to patients, doctors and assignments: invalidate the
+per-user patient list cache and the doctor list version, record tombstones for the changes feed and keep
+the assignment counters (health.counters) in step.
+
+Handlers only react to single-instance saves and deletes. Cascades are
+covered by the handler of the object that started them, and bulk writes
+(bulk_create, QuerySet.update/delete) do the same explicitly in health.bulk.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_doctors_on_commit, invalidate_users_on_commit
+from .counters import adjust_counts, shift_doctor_counts, shift_patient_counts
+from .models import Doctor, Patient, PatientDoctor, Tombstone
+
+
+def _patient_owner(link):
+    if PatientDoctor.patient.is_cached(link):
+        return link.patient.created_by_id
+    return Patient.objects.filter(pk=link.patient_id).values_list('created_by_id', flat=True).first()
+
+
+def _doctor_patient_owners(doctor):
+    return Patient.objects.filter(doctor_links__doctor=doctor).values_list('created_by_id', flat=True).distinct()
+
+
+def _tombstones(model, objects):
+    """Unsaved tombstones for ``(object_id, owner_id)`` pairs of one model."""
+    return [Tombstone(model=model, object_id=object_id, owner_id=owner_id) for object_id, owner_id in objects]
+
+
+def record_assignment_tombstones(links):
+    """Tombstone ``(assignment_id, owner_id)`` pairs in one INSERT."""
+    Tombstone.objects.bulk_create(_tombstones(Tombstone.ASSIGNMENT, links))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_renamed_owner(sender, instance, created, update_fields=None, **kwargs):
+    # Patient rows show their owner's username (created_by); skip saves that
+    # can't have changed it, such as the last_login update on every login
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    invalidate_users_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=Patient)
+def invalidate_patient_owner(sender, instance, **kwargs):
+    invalidate_users_on_commit([instance.created_by_id])
+
+
+@receiver(pre_delete, sender=Patient)
+def record_patient_tombstones(sender, instance, **kwargs):
+    # The patient and the assignments its delete cascades to, in one INSERT
+    owner = instance.created_by_id
+    links = list(instance.doctor_links.values_list('pk', flat=True))
+    Tombstone.objects.bulk_create(
+        _tombstones(Tombstone.PATIENT, [(instance.pk, owner)])
+        + _tombstones(Tombstone.ASSIGNMENT, [(link_id, owner) for link_id in links])
+    )
+    if links:
+        shift_doctor_counts(Doctor.objects.filter(patient_links__patient=instance), -1)
+
+
+@receiver(post_delete, sender=Patient)
+def invalidate_deleted_patient_owner(sender, instance, **kwargs):
+    invalidate_users_on_commit([instance.created_by_id])
+
+
+@receiver(pre_save, sender=PatientDoctor)
+def remember_assigned_pair(sender, instance, **kwargs):
+    # An update may move the assignment to another patient or doctor
+    if not instance._state.adding:
+        instance._counted_pair = PatientDoctor.objects.filter(pk=instance.pk).values_list(
+            'patient_id', 'doctor_id'
+        ).first()
+
+
+@receiver(post_save, sender=PatientDoctor)
+def count_saved_assignment(sender, instance, created, **kwargs):
+    pair = (instance.patient_id, instance.doctor_id)
+    if created:
+        adjust_counts(*pair, 1)
+    else:
+        previous = getattr(instance, '_counted_pair', None)
+        if previous is not None and previous != pair:
+            adjust_counts(*previous, -1)
+            adjust_counts(*pair, 1)
+    instance._counted_pair = pair
+
+
+@receiver(post_save, sender=PatientDoctor)
+def invalidate_assignment_owner(sender, instance, **kwargs):
+    owner = _patient_owner(instance)
+    if owner is not None:
+        invalidate_users_on_commit([owner])
+
+
+@receiver(pre_delete, sender=PatientDoctor)
+def record_assignment_tombstone(sender, instance, origin=None, **kwargs):
+    if origin is not None and origin is not instance:
+        return
+    owner = _patient_owner(instance)
+    Tombstone.objects.create(model=Tombstone.ASSIGNMENT, object_id=instance.pk, owner_id=owner)
+    if owner is not None:
+        invalidate_users_on_commit([owner])
+
+
+@receiver(post_delete, sender=PatientDoctor)
+def decrement_assignment_counts(sender, instance, origin=None, **kwargs):
+    # Cascades adjust the surviving side in the Patient / Doctor handlers
+    if origin is None or origin is instance:
+        adjust_counts(instance.patient_id, instance.doctor_id, -1)
+
+
+@receiver(post_save, sender=Doctor)
+def invalidate_doctor_patient_owners(sender, instance, created, **kwargs):
+    # Doctors are shared: every user with a patient assigned to this one has
+    # it nested in their cached lists
+    invalidate_doctors_on_commit()
+    if not created:
+        invalidate_users_on_commit(_doctor_patient_owners(instance))
+
+
+@receiver(pre_delete, sender=Doctor)
+def record_doctor_tombstones(sender, instance, **kwargs):
+    # Resolve the assignments and their owners before the cascade removes them
+    links = list(instance.patient_links.values_list('pk', 'patient__created_by_id'))
+    Tombstone.objects.bulk_create(
+        _tombstones(Tombstone.DOCTOR, [(instance.pk, None)]) + _tombstones(Tombstone.ASSIGNMENT, links)
+    )
+    if links:
+        shift_patient_counts(Patient.objects.filter(doctor_links__doctor=instance), -1)
+    invalidate_users_on_commit(owner_id for _, owner_id in links)
+    invalidate_doctors_on_commit()
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from config.fastjson import iter_json_array, iter_json_lines
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+JSON_CONTENT_TYPE = 'application/json'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+STREAM_CHUNK_SIZE = 1000
+
+_END = object()
+
+
+class BatchStreamingResponse(StreamingHttpResponse):
+    """
+    A StreamingHttpResponse over a sync generator that stays streamed under
+    ASGI.
+
+    Django serves a sync iterator to an ASGI server by collecting it with
+    ``sync_to_async(list)``, i.e. the whole export in memory before the first
+    byte is sent. Here each chunk is pulled on its own, on the request's
+    thread-sensitive sync thread: the server-side cursor stays on the
+    connection that opened it, and the batch serializers keep using the sync
+    ORM. WSGI servers iterate the generator directly, as before.
+    """
+
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+        parts = self.streaming_content
+        next_part = sync_to_async(next)
+        while (part := await next_part(parts, _END)) is not _END:
+            yield part
+
+
+def iter_batches(queryset, chunk_size=STREAM_CHUNK_SIZE):
+    """Walk a queryset with a server-side cursor, yielding lists of rows."""
+    batch = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) == chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_response(queryset, serialize, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream ``queryset`` as newline-delimited JSON.
+
+    ``serialize`` turns a batch of rows into a list of dicts, so nested data
+    can be fetched once per batch rather than once per row.
+    """
+    batches = (serialize(batch) for batch in iter_batches(queryset, chunk_size))
+    if settings.FAST_JSON:
+        lines = iter_json_lines(batches)
+    else:
+        lines = (
+            ''.join(json.dumps(item, cls=DjangoJSONEncoder) + '\n' for item in items)
+            for items in batches
+        )
+    return BatchStreamingResponse(lines, content_type=NDJSON_CONTENT_TYPE)
+
+
+def json_array_response(queryset, serialize, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream ``queryset`` as a single JSON array, encoded one batch at a time."""
+    batches = (serialize(batch) for batch in iter_batches(queryset, chunk_size))
+    return BatchStreamingResponse(iter_json_array(batches), content_type=JSON_CONTENT_TYPE)
+
+
+def csv_response(queryset, header, serialize, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream ``queryset`` as CSV: the ``header`` row, then the rows
+    ``serialize`` makes of each batch, written one batch per chunk.
+    """
+    def chunks():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        for batch in iter_batches(queryset, chunk_size):
+            writer.writerows(serialize(batch))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        # Header only: nothing matched
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return BatchStreamingResponse(chunks(), content_type=CSV_CONTENT_TYPE)
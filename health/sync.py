@@ -0,0 +1,138 @@
+"""
+Changes feed: what happened to a user's patients, their assignments and the
+doctors since a sync token.
+
+Every stream is read in (timestamp, id) order from the position stored in the
+token, so a client that keeps following ``next_token`` sees each upsert and
+tombstone once. Rows touched within the last ``HEALTH_SYNC_LAG_SECONDS`` are
+left for the next call: their transactions may still be committing behind
+rows that are already visible.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import Doctor, Patient, PatientDoctor, Tombstone
+from .serializers import AssignedDoctorSerializer, AssignmentChangeSerializer, PatientChangeSerializer
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Sync token is older than the tombstone retention period; start a full sync.'
+    default_code = 'sync_token_expired'
+
+
+def _streams(user):
+    """Upsert streams as (name, queryset, timestamp field, serializer, tombstone model)."""
+    return (
+        (
+            'patients',
+            Patient.objects.filter(created_by=user).select_related('created_by').defer('search_vector'),
+            'updated_at',
+            PatientChangeSerializer,
+            Tombstone.PATIENT,
+        ),
+        ('doctors', Doctor.objects.all(), 'updated_at', AssignedDoctorSerializer, Tombstone.DOCTOR),
+        (
+            'assignments',
+            PatientDoctor.objects.filter(patient__created_by=user),
+            'updated_at',
+            AssignmentChangeSerializer,
+            Tombstone.ASSIGNMENT,
+        ),
+    )
+
+
+def _tombstones(user):
+    return Tombstone.objects.filter(Q(owner_id=user.pk) | Q(owner_id__isnull=True))
+
+
+def encode_token(state):
+    return urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode()).decode()
+
+
+def decode_token(token):
+    """Positions per stream from ``token``; ``None`` for a first (full) sync."""
+    if not token:
+        return None
+    try:
+        state = json.loads(urlsafe_b64decode(token.encode()))
+        issued = parse_datetime(state['at'])
+        positions = {}
+        for name in ('patients', 'doctors', 'assignments'):
+            position = state[name]
+            positions[name] = None if position is None else (parse_datetime(position[0]), int(position[1]))
+            if position is not None and positions[name][0] is None:
+                raise ValueError
+        tombstone = int(state['tombstones'])
+    except (TypeError, ValueError, KeyError):
+        raise ValidationError({'since': ['Invalid sync token.']})
+    if issued is None:
+        raise ValidationError({'since': ['Invalid sync token.']})
+    if issued < timezone.now() - timedelta(days=settings.HEALTH_SYNC_TOMBSTONE_DAYS):
+        raise SyncTokenExpired()
+    return positions, tombstone
+
+
+def changes_since(user, token=None, limit=DEFAULT_LIMIT):
+    """
+    Upserts and deletes after ``token`` for ``user``, at most ``limit`` per stream.
+
+    One query per stream. A first sync returns every live row and no deletes;
+    its tombstone position starts at the latest tombstone already visible.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.HEALTH_SYNC_LAG_SECONDS)
+    decoded = decode_token(token)
+    tombstones = _tombstones(user).filter(deleted_at__lte=cutoff)
+    if decoded is None:
+        positions = dict.fromkeys(('patients', 'doctors', 'assignments'))
+        tombstone_position = tombstones.aggregate(last=Max('id'))['last'] or 0
+    else:
+        positions, tombstone_position = decoded
+
+    payload = {}
+    has_more = False
+    next_positions = {}
+    for name, queryset, timestamp, serializer_class, _ in _streams(user):
+        queryset = queryset.filter(**{f'{timestamp}__lte': cutoff}).order_by(timestamp, 'id')
+        position = positions[name]
+        if position is not None:
+            queryset = queryset.filter(
+                Q(**{f'{timestamp}__gt': position[0]}) | Q(**{timestamp: position[0], 'id__gt': position[1]})
+            )
+        rows = list(queryset[:limit + 1])
+        has_more |= len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            position = (getattr(rows[-1], timestamp), rows[-1].pk)
+        next_positions[name] = None if position is None else [position[0].isoformat(), position[1]]
+        payload[name] = {'upserts': serializer_class(rows, many=True).data, 'deletes': []}
+
+    deleted = list(
+        tombstones.filter(id__gt=tombstone_position).order_by('id').values_list('id', 'model', 'object_id')[:limit + 1]
+    )
+    has_more |= len(deleted) > limit
+    deleted = deleted[:limit]
+    if deleted:
+        tombstone_position = deleted[-1][0]
+    stream_of = {model: name for name, _, _, _, model in _streams(user)}
+    for _, model, object_id in deleted:
+        payload[stream_of[model]]['deletes'].append(object_id)
+
+    payload['has_more'] = has_more
+    payload['next_token'] = encode_token({
+        'at': timezone.now().isoformat(),
+        **next_positions,
+        'tombstones': tombstone_position,
+    })
+    return payload
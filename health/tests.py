@@ -1,5 +0,0 @@
-"""
-This file intentionally left minimal for production builds.
-Unit tests were removed from the deployable codebase to avoid shipping test logic.
-(Keeping an empty placeholder avoids import errors from test discovery.)
-"""
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from health import bulk
+from health.models import Doctor, Patient, PatientDoctor, Tombstone
+
+User = get_user_model()
+
+
+class BatchAssignmentTests(APITestCase):
+    """``POST patients/assign_doctors/`` and ``DELETE patients/unassign_doctors/``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='assignments', password='unused')
+        stranger = User.objects.create_user(username='assignments-stranger', password='unused')
+        cls.asha = Patient.objects.create(name="Asha", age=34, created_by=cls.user)
+        cls.ravi = Patient.objects.create(name="Ravi", age=50, created_by=cls.user)
+        cls.foreign = Patient.objects.create(name="Someone else's", age=60, created_by=stranger)
+        cls.rao = Doctor.objects.create(name="Dr. Rao", email="rao@example.com")
+        cls.iyer = Doctor.objects.create(name="Dr. Iyer", email="iyer@example.com")
+        PatientDoctor.objects.create(patient=cls.asha, doctor=cls.rao)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def pairs(self, *pairs):
+        return {'pairs': [{'patient_id': patient.pk, 'doctor_id': doctor.pk} for patient, doctor in pairs]}
+
+    def test_assign(self):
+        data = self.pairs((self.asha, self.iyer), (self.ravi, self.rao), (self.asha, self.rao), (self.asha, self.iyer))
+        response = self.client.post(reverse('health:patient-assign-doctors'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], self.pairs((self.asha, self.iyer), (self.ravi, self.rao))['pairs'])
+        self.assertEqual(response.data['skipped'], self.pairs((self.asha, self.rao))['pairs'])
+        self.assertEqual(response.data['missing'], [])
+        self.assertEqual(PatientDoctor.objects.count(), 3)
+        self.assertEqual(Patient.objects.get(pk=self.asha.pk).doctor_count, 2)
+        self.assertEqual(Doctor.objects.get(pk=self.rao.pk).patient_count, 2)
+
+    def test_missing_patients_and_doctors(self):
+        data = {'pairs': [
+            {'patient_id': self.foreign.pk, 'doctor_id': self.rao.pk},
+            {'patient_id': self.ravi.pk, 'doctor_id': 0},
+        ]}
+        response = self.client.post(reverse('health:patient-assign-doctors'), data, format='json')
+
+        self.assertEqual(
+            [pair['reason'] for pair in response.data['missing']], ['Patient not found', 'Doctor not found']
+        )
+        self.assertEqual(response.data['created'], [])
+        self.assertFalse(PatientDoctor.objects.filter(patient=self.foreign).exists())
+
+    def test_pair_assigned_concurrently_is_skipped(self):
+        resolve = bulk._resolve_pairs
+
+        def stale_resolve(pairs, user):
+            # As if another request assigned the pair right after it was checked
+            found, missing, _ = resolve(pairs, user)
+            return found, missing, {}
+
+        with mock.patch.object(bulk, '_resolve_pairs', stale_resolve):
+            data = self.pairs((self.asha, self.rao), (self.ravi, self.iyer))
+            response = self.client.post(reverse('health:patient-assign-doctors'), data, format='json')
+
+        self.assertEqual(response.data['created'], self.pairs((self.ravi, self.iyer))['pairs'])
+        self.assertEqual(response.data['skipped'], self.pairs((self.asha, self.rao))['pairs'])
+        self.assertEqual(Patient.objects.get(pk=self.asha.pk).doctor_count, 1)
+
+    def test_unassign(self):
+        link = PatientDoctor.objects.get(patient=self.asha, doctor=self.rao)
+        data = self.pairs((self.asha, self.rao), (self.ravi, self.rao))
+        response = self.client.delete(reverse('health:patient-unassign-doctors'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], self.pairs((self.asha, self.rao))['pairs'])
+        self.assertEqual(response.data['skipped'], self.pairs((self.ravi, self.rao))['pairs'])
+        self.assertFalse(PatientDoctor.objects.exists())
+        self.assertTrue(Tombstone.objects.filter(model=Tombstone.ASSIGNMENT, object_id=link.pk).exists())
+        self.assertEqual(Patient.objects.get(pk=self.asha.pk).doctor_count, 0)
+        self.assertEqual(Doctor.objects.get(pk=self.rao.pk).patient_count, 0)
+
+    def test_empty_pairs(self):
+        response = self.client.post(reverse('health:patient-assign-doctors'), {'pairs': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
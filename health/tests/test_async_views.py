@@ -0,0 +1,110 @@
+from types import ModuleType
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import include, path, resolve, reverse
+from rest_framework import status
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from health import urls as health_urls
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+
+def async_urlconf():
+    """The health routes with their views built under HEALTH_ASYNC_VIEWS, at the same paths."""
+    router = DefaultRouter()
+    with override_settings(HEALTH_ASYNC_VIEWS=True):
+        for prefix, viewset, basename in health_urls.router.registry:
+            router.register(prefix, viewset, basename)
+        urls = router.urls
+    urlconf = ModuleType('async_urls')
+    urlconf.urlpatterns = [path('api/v1/health/', include((urls, health_urls.app_name)))]
+    return urlconf
+
+
+@override_settings(HEALTH_CACHE_TIMEOUT=0)
+class AsyncViewTests(APITestCase):
+    """With HEALTH_ASYNC_VIEWS, ``list`` and ``retrieve`` answer exactly like the sync views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='async-views', password='unused')
+        stranger = User.objects.create_user(username='async-views-stranger', password='unused')
+        cls.rao = Doctor.objects.create(name="Dr. Rao", email="rao@example.com", specialization="Cardiology")
+        cls.iyer = Doctor.objects.create(name="Dr. Iyer", email="iyer@example.com", specialization="Neurology")
+        cls.patients = [
+            Patient.objects.create(name=f"Patient {i}", age=30 + i, gender=("Female", "Male")[i % 2],
+                                   notes="Asthma" if i % 3 == 0 else "", created_by=cls.user)
+            for i in range(5)
+        ]
+        cls.foreign = Patient.objects.create(name="Someone else's", age=60, created_by=stranger)
+        PatientDoctor.objects.create(patient=cls.patients[0], doctor=cls.rao)
+        PatientDoctor.objects.create(patient=cls.patients[0], doctor=cls.iyer)
+        PatientDoctor.objects.create(patient=cls.patients[1], doctor=cls.rao)
+
+    def setUp(self):
+        self.authorization = f'Bearer {AccessToken.for_user(self.user)}'
+        self.async_urls = async_urlconf()
+
+    def sync_get(self, url):
+        return self.client.get(url, headers={'Authorization': self.authorization})
+
+    async def async_get(self, url, method='get', **headers):
+        with override_settings(ROOT_URLCONF=self.async_urls):
+            return await getattr(self.async_client, method)(
+                url, headers={'Authorization': self.authorization, **headers}
+            )
+
+    async def assertSameResponse(self, url):
+        expected = await sync_to_async(self.sync_get)(url)
+        response = await self.async_get(url)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.get('ETag'), expected.get('ETag'))
+        return response
+
+    def test_views_are_coroutines(self):
+        for url in (reverse('health:patient-list'), reverse('health:doctor-detail', args=[self.rao.pk])):
+            self.assertTrue(iscoroutinefunction(resolve(url, self.async_urls).func))
+
+    async def test_patient_list(self):
+        url = reverse('health:patient-list')
+        for query in ('', '?page_size=2', '?gender=Female', '?search=Asthma', '?ordering=-age',
+                      '?doctor_count__gte=1', '?pagination=cursor&page_size=2'):
+            with self.subTest(query=query):
+                await self.assertSameResponse(url + query)
+
+    async def test_cursor_pages(self):
+        response = await self.assertSameResponse(reverse('health:patient-list') + '?pagination=cursor&page_size=2')
+        await self.assertSameResponse(response.json()['next'])
+
+    async def test_details(self):
+        await self.assertSameResponse(reverse('health:patient-detail', args=[self.patients[0].pk]))
+        await self.assertSameResponse(reverse('health:doctor-detail', args=[self.rao.pk]))
+
+    async def test_other_lists(self):
+        await self.assertSameResponse(reverse('health:doctor-list') + '?specialization=Cardiology')
+        await self.assertSameResponse(reverse('health:patientdoctor-list'))
+
+    async def test_errors(self):
+        await self.assertSameResponse(reverse('health:patient-detail', args=[self.foreign.pk]))
+        await self.assertSameResponse(reverse('health:patient-list') + '?gender=Unknown')
+        with override_settings(ROOT_URLCONF=self.async_urls):
+            response = await self.async_client.get(reverse('health:patient-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_head(self):
+        response = await self.async_get(reverse('health:patient-list'), method='head')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'')
+
+    async def test_not_modified(self):
+        url = reverse('health:patient-detail', args=[self.patients[0].pk])
+        etag = (await self.async_get(url))['ETag']
+        response = await self.async_get(url, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
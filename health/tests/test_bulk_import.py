@@ -0,0 +1,85 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from health.models import Patient
+
+User = get_user_model()
+
+
+class BulkImportTests(APITestCase):
+    """``POST patients/bulk_create/``: batched inserts with a streamed per-row report."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='bulk-import', password='unused')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.url = reverse('health:patient-bulk-create')
+
+    def report(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        return lines[:-1], lines[-1]['summary']
+
+    def test_json_rows(self):
+        rows = [{'name': f'Patient {i}', 'age': 20 + i, 'gender': 'Female'} for i in range(5)]
+        results, summary = self.report(self.client.post(f'{self.url}?batch_size=2', rows, format='json'))
+
+        self.assertEqual([result['row'] for result in results], list(range(5)))
+        self.assertEqual({result['status'] for result in results}, {'created'})
+        patients = Patient.objects.in_bulk([result['id'] for result in results])
+        self.assertEqual([patients[result['id']].name for result in results], [row['name'] for row in rows])
+        self.assertTrue(all(patient.created_by_id == self.user.pk for patient in patients.values()))
+        self.assertEqual((summary['rows'], summary['created'], summary['failed']), (5, 5, 0))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        rows = [
+            {'name': 'Valid', 'age': 40},
+            {'age': 40},
+            {'name': 'Too old', 'age': 200},
+            {'name': 'Nul\x00byte', 'age': 40},
+            'not an object',
+        ]
+        results, summary = self.report(self.client.post(self.url, rows, format='json'))
+
+        self.assertEqual([result['status'] for result in results], ['created', 'error', 'error', 'error', 'error'])
+        self.assertIn('name', results[1]['errors'])
+        self.assertIn('age', results[2]['errors'])
+        self.assertIn('name', results[3]['errors'])
+        self.assertIn('non_field_errors', results[4]['errors'])
+        self.assertEqual((summary['created'], summary['failed']), (1, 4))
+        self.assertEqual(list(Patient.objects.values_list('name', flat=True)), ['Valid'])
+
+    def test_csv_blank_values_are_not_provided(self):
+        upload = 'name,age,gender,notes\nAsha,34,Female,\nRavi,,,follow up\n'
+        results, summary = self.report(self.client.post(self.url, upload, content_type='text/csv'))
+
+        self.assertEqual(summary['created'], 2)
+        ravi = Patient.objects.get(pk=results[1]['id'])
+        self.assertEqual((ravi.age, ravi.gender, ravi.notes), (None, None, 'follow up'))
+
+    def test_ndjson_rows(self):
+        upload = '{"name": "Asha", "age": 34}\n\n{"name": "Ravi", "age": 50}\n'
+        _, summary = self.report(self.client.post(self.url, upload, content_type='application/x-ndjson'))
+        self.assertEqual(summary['created'], 2)
+
+    def test_report_streams_batch_by_batch(self):
+        rows = [{'name': f'Patient {i}', 'age': 30} for i in range(6)]
+        response = self.client.post(f'{self.url}?batch_size=2', rows, format='json')
+        lines = iter(response.streaming_content)
+
+        # The first line is sent once its batch is in, before the next one is inserted
+        self.assertEqual(json.loads(next(lines))['status'], 'created')
+        self.assertEqual(Patient.objects.count(), 2)
+        response.close()
+        self.assertEqual(Patient.objects.count(), 2)
+
+    def test_not_a_list(self):
+        response = self.client.post(self.url, {'name': 'Asha'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,109 @@
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from health.checks import check_health_cache
+from health.models import Doctor, Patient
+
+User = get_user_model()
+
+
+def health_cache(backend, location):
+    return {**settings.CACHES, 'health': {'BACKEND': backend, 'LOCATION': location}}
+
+
+class PatientListCacheTests(APITestCase):
+    """``GET patients/`` served from the ``health`` cache and invalidated by writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='list-cache', password='unused')
+        cls.patient = Patient.objects.create(name="Asha", age=34, created_by=cls.user)
+        cls.doctor = Doctor.objects.create(name="Dr. Rao", email="rao@example.com")
+
+    def setUp(self):
+        # A file cache of its own, so the test never reads lists cached by a dev server
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        cache_settings = override_settings(
+            CACHES=health_cache('django.core.cache.backends.filebased.FileBasedCache', location.name),
+            HEALTH_CACHE_TIMEOUT=60,
+        )
+        cache_settings.enable()
+        self.addCleanup(cache_settings.disable)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('health:patient-list')
+
+    def names(self, response):
+        return [patient['name'] for patient in response.data['results']]
+
+    def test_second_read_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def test_write_invalidates_cached_list(self):
+        self.assertEqual(self.names(self.client.get(self.url)), ["Asha"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'name': 'Ravi', 'age': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.names(self.client.get(self.url)), ["Ravi", "Asha"])
+
+    def test_assignment_invalidates_cached_list(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('health:patient-assign-doctor', args=[self.patient.pk]),
+                {'doctor_id': self.doctor.pk}, format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        doctors = self.client.get(self.url).data['results'][0]['doctors']
+        self.assertEqual([doctor['id'] for doctor in doctors], [self.doctor.pk])
+
+    def test_other_users_lists_stay_cached(self):
+        other = User.objects.create_user(username='list-cache-other', password='unused')
+        self.client.force_authenticate(other)
+        self.client.get(self.url)
+
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {'name': 'Ravi', 'age': 50}, format='json')
+
+        self.client.force_authenticate(other)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+
+class HealthCacheCheckTests(SimpleTestCase):
+    """``manage.py check --deploy`` warns about a per-process health cache."""
+
+    @override_settings(
+        CACHES=health_cache('django.core.cache.backends.locmem.LocMemCache', 'health-check'),
+        HEALTH_CACHE_TIMEOUT=60,
+    )
+    def test_locmem_warns(self):
+        self.assertEqual([warning.id for warning in check_health_cache(None)], ['health.W001'])
+
+    @override_settings(
+        CACHES=health_cache('django.core.cache.backends.locmem.LocMemCache', 'health-check'),
+        HEALTH_CACHE_TIMEOUT=0,
+    )
+    def test_locmem_without_list_caching_is_fine(self):
+        self.assertEqual(check_health_cache(None), [])
+
+    def test_file_is_fine(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(
+                CACHES=health_cache('django.core.cache.backends.filebased.FileBasedCache', location),
+                HEALTH_CACHE_TIMEOUT=60,
+            ):
+                self.assertEqual(check_health_cache(None), [])
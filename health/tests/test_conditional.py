@@ -0,0 +1,86 @@
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+
+class ConditionalGetTests(APITestCase):
+    """ETags on list and detail ``GET``s, and ``304 Not Modified`` for matching ``If-None-Match``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='conditional', password='unused')
+        cls.patient = Patient.objects.create(name="Asha", age=34, created_by=cls.user)
+        cls.doctor = Doctor.objects.create(name="Dr. Rao", email="rao@example.com")
+        PatientDoctor.objects.create(patient=cls.patient, doctor=cls.doctor)
+
+    def setUp(self):
+        # List versions in a file cache of their own, shared the way workers on one host share it
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        cache_settings = override_settings(CACHES={**settings.CACHES, 'health': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location.name,
+        }})
+        cache_settings.enable()
+        self.addCleanup(cache_settings.disable)
+        self.client.force_authenticate(self.user)
+
+    def assertNotModified(self, url):
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def test_patient_list(self):
+        url = reverse('health:patient-list')
+        etag = self.assertNotModified(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('health:patient-detail', args=[self.patient.pk]), {'notes': 'x'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_depends_on_url_and_user(self):
+        url = reverse('health:patient-list')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(f'{url}?ordering=name')['ETag'], etag)
+
+        self.client.force_authenticate(User.objects.create_user(username='conditional-other', password='unused'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_doctor_list(self):
+        url = reverse('health:doctor-list')
+        etag = self.assertNotModified(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('health:doctor-detail', args=[self.doctor.pk]), {'name': 'Dr. A. Rao'}, format='json')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_patient_detail_changes_when_an_assignment_is_removed(self):
+        url = reverse('health:patient-detail', args=[self.patient.pk])
+        etag = self.assertNotModified(url)
+
+        PatientDoctor.objects.filter(patient=self.patient).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_no_list_etag_with_a_per_process_cache(self):
+        with override_settings(CACHES={**settings.CACHES, 'health': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'conditional',
+        }}):
+            self.assertNotIn('ETag', self.client.get(reverse('health:patient-list')))
+            self.assertIn('ETag', self.client.get(reverse('health:patient-detail', args=[self.patient.pk])))
+
+    def test_no_last_modified(self):
+        self.assertNotIn('Last-Modified', self.client.get(reverse('health:patient-list')))
@@ -0,0 +1,71 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+
+class DoctorPatientsTests(APITestCase):
+    """``GET doctors/{id}/patients/``: keyset pages, or the whole list streamed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='doctor-patients', password='unused')
+        cls.doctor = Doctor.objects.create(name="Dr. Rao", email="rao@example.com", specialization="Cardiology")
+        cls.other = Doctor.objects.create(name="Dr. Iyer", email="iyer@example.com", specialization="Neurology")
+        cls.patients = Patient.objects.bulk_create(
+            Patient(name=f"Patient {i}", age=30 + i, gender="Female", created_by=cls.user) for i in range(7)
+        )
+        PatientDoctor.objects.bulk_create(PatientDoctor(patient=patient, doctor=cls.doctor) for patient in cls.patients)
+        PatientDoctor.objects.create(patient=cls.patients[0], doctor=cls.other)
+        # Newest assignment first
+        cls.expected = [patient.pk for patient in reversed(cls.patients)]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.url = reverse('health:doctor-patients', args=[self.doctor.pk])
+
+    def test_pages_cover_every_patient_once(self):
+        seen = []
+        url = f'{self.url}?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen += [patient['id'] for patient in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_page(self):
+        first = self.client.get(f'{self.url}?page_size=3')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_patients_carry_all_their_doctors(self):
+        response = self.client.get(self.url)
+        first = next(patient for patient in response.data['results'] if patient['id'] == self.patients[0].pk)
+        self.assertEqual({doctor['id'] for doctor in first['doctors']}, {self.doctor.pk, self.other.pk})
+
+    def test_ndjson_stream_matches_pages(self):
+        paged = self.client.get(f'{self.url}?page_size=50').data['results']
+        response = self.client.get(f'{self.url}?stream=ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], json.loads(json.dumps(paged)))
+
+    def test_json_stream_is_one_array(self):
+        response = self.client.get(f'{self.url}?stream=json')
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['id'] for row in rows], self.expected)
+
+    def test_stream_without_patients(self):
+        url = reverse('health:doctor-patients', args=[Doctor.objects.create(name="Dr. New", email="new@example.com").pk])
+        self.assertEqual(b''.join(self.client.get(f'{url}?stream=json').streaming_content), b'[]')
+        self.assertEqual(b''.join(self.client.get(f'{url}?stream=ndjson').streaming_content), b'')
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from health.export import ASSIGNMENT_COLUMNS, PATIENT_COLUMNS
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+
+@override_settings(HEALTH_CACHE_TIMEOUT=0)
+class ExportTests(APITestCase):
+    """``GET patients/export/`` and ``GET patientdoctor/export/`` with ``?stream=csv|ndjson``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='export', password='unused')
+        stranger = User.objects.create_user(username='export-stranger', password='unused')
+        cls.rao = Doctor.objects.create(name="Dr. Rao", email="rao@example.com", specialization="Cardiology")
+        cls.iyer = Doctor.objects.create(name="Dr. Iyer", email="iyer@example.com", phone="555-0100")
+        cls.asha = Patient.objects.create(name="Asha", age=34, gender="Female", notes="Says \"hi\", often",
+                                          created_by=cls.user)
+        cls.ravi = Patient.objects.create(name="Ravi", age=50, gender="Male", created_by=cls.user)
+        cls.meera = Patient.objects.create(name="Meera", age=8, gender="Female", created_by=cls.user)
+        foreign = Patient.objects.create(name="Someone else's", age=60, created_by=stranger)
+        PatientDoctor.objects.create(patient=cls.asha, doctor=cls.rao)
+        PatientDoctor.objects.create(patient=cls.asha, doctor=cls.iyer)
+        PatientDoctor.objects.create(patient=cls.ravi, doctor=cls.rao)
+        PatientDoctor.objects.create(patient=foreign, doctor=cls.rao)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def export(self, name, query=''):
+        response = self.client.get(reverse(name) + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def csv_rows(self, name, query=''):
+        response, content = self.export(name, query)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_patients_csv(self):
+        rows = self.csv_rows('health:patient-export', '?ordering=name')
+        self.assertEqual(list(rows[0]), [name for name, _, _ in PATIENT_COLUMNS])
+        self.assertEqual(
+            [(row['name'], row['doctor_name']) for row in rows],
+            [("Asha", "Dr. Rao"), ("Asha", "Dr. Iyer"), ("Meera", ""), ("Ravi", "Dr. Rao")],
+        )
+        self.assertEqual(rows[0]['notes'], 'Says "hi", often')
+        self.assertEqual(rows[1]['doctor_phone'], '555-0100')
+
+    def test_patients_ndjson_matches_the_list(self):
+        response, content = self.export('health:patient-export', '?stream=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        listed = self.client.get(reverse('health:patient-list'), {'page_size': 100}).data['results']
+        self.assertEqual([json.loads(line) for line in content.splitlines()], json.loads(json.dumps(listed)))
+
+    def test_filters_and_search_apply(self):
+        rows = self.csv_rows('health:patient-export', '?gender=Female&ordering=-age')
+        self.assertEqual(list(dict.fromkeys(row['name'] for row in rows)), ["Asha", "Meera"])
+        _, content = self.export('health:patient-export', '?stream=ndjson&search=Ravi')
+        self.assertEqual([json.loads(line)['name'] for line in content.splitlines()], ["Ravi"])
+
+    def test_assignments(self):
+        rows = self.csv_rows('health:patientdoctor-export', f'?doctor={self.rao.pk}')
+        self.assertEqual(list(rows[0]), [name for name, _, _ in ASSIGNMENT_COLUMNS])
+        self.assertEqual(sorted(row['patient_name'] for row in rows), ["Asha", "Ravi"])
+
+        _, content = self.export('health:patientdoctor-export', '?stream=ndjson')
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(set(lines[0]), {name for name, _, _ in ASSIGNMENT_COLUMNS})
+
+    def test_download_filename(self):
+        response, _ = self.export('health:patient-export', '?stream=ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="patients.ndjson"')
+        response, _ = self.export('health:patient-export')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="patients.csv"')
+
+    def test_empty_export(self):
+        self.client.force_authenticate(User.objects.create_user(username='export-empty', password='unused'))
+        _, content = self.export('health:patient-export')
+        self.assertEqual(content.splitlines(), [','.join(name for name, _, _ in PATIENT_COLUMNS)])
+        _, content = self.export('health:patient-export', '?stream=ndjson')
+        self.assertEqual(content, '')
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('health:patient-export'), {'stream': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from health.fast_serializers import FastDoctorSerializer, FastPatientDoctorSerializer, FastPatientSerializer
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+
+class FastSerializerTests(APITestCase):
+    """health.fast_serializers render the same JSON as the DRF serializers they stand in for."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='fast-serializers', password='unused')
+        cls.rao = Doctor.objects.create(name="Dr. Rao", email="rao@example.com", specialization="Cardiology")
+        cls.iyer = Doctor.objects.create(name="Dr. Iyer", email="iyer@example.com")
+        asha = Patient.objects.create(name="Asha", age=34, gender="Female", notes="Allergic to penicillin",
+                                      created_by=cls.user)
+        ravi = Patient.objects.create(name="Ravi", age=50, created_by=cls.user)
+        Patient.objects.create(name="Meera", age=0, created_by=cls.user)
+        PatientDoctor.objects.create(patient=asha, doctor=cls.rao)
+        PatientDoctor.objects.create(patient=asha, doctor=cls.iyer)
+        PatientDoctor.objects.create(patient=ravi, doctor=cls.rao)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assertSameJSON(self, fast, queryset):
+        drf = fast.serializer_class
+        setup = getattr(drf, 'setup_eager_loading', lambda queryset: queryset)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(fast(fast.values(queryset.all()), many=True).data),
+            renderer.render(drf(setup(queryset.all()), many=True).data),
+        )
+
+    def test_patients(self):
+        self.assertSameJSON(FastPatientSerializer, Patient.objects.defer('search_vector').order_by('id'))
+
+    def test_doctors(self):
+        self.assertSameJSON(FastDoctorSerializer, Doctor.objects.order_by('id'))
+
+    def test_assignments(self):
+        self.assertSameJSON(FastPatientDoctorSerializer, PatientDoctor.objects.order_by('id'))
+
+    def test_empty(self):
+        self.assertEqual(FastPatientSerializer([], many=True).data, [])
+
+    @override_settings(HEALTH_CACHE_TIMEOUT=0)
+    def test_list_endpoints_match(self):
+        for name in ('health:patient-list', 'health:doctor-list', 'health:patientdoctor-list'):
+            for query in ('', '?page_size=2', '?pagination=cursor'):
+                with self.subTest(endpoint=name, query=query):
+                    url = reverse(name) + query
+                    with override_settings(HEALTH_FAST_SERIALIZERS=True):
+                        fast = self.client.get(url)
+                    with override_settings(HEALTH_FAST_SERIALIZERS=False):
+                        drf = self.client.get(url)
+                    self.assertEqual(fast.status_code, 200)
+                    self.assertTrue(fast.data['results'])
+                    self.assertEqual(fast.content, drf.content)
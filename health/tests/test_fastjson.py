@@ -0,0 +1,110 @@
+import datetime
+import decimal
+import io
+import uuid
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from config import fastjson
+from config.fastjson import FastJSONParser, FastJSONRenderer
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+
+@skipUnless(fastjson.orjson, "orjson is not installed")
+class FastJSONRendererTests(SimpleTestCase):
+    """``FastJSONRenderer`` renders byte for byte what DRF's ``JSONRenderer`` does."""
+
+    def assertSameJSON(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_values(self):
+        self.assertSameJSON({
+            'id': 1,
+            'name': "Zoë 名前",
+            'ratio': 0.25,
+            'fee': decimal.Decimal('12.50'),
+            'active': True,
+            'notes': None,
+            'tags': ['a', 'b'],
+            'nested': {'deep': [{'x': 1}]},
+            'created_at': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'born': datetime.date(1990, 1, 2),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'message': gettext_lazy("Permission denied"),
+        })
+
+    def test_line_separators_are_escaped(self):
+        self.assertSameJSON({'notes': 'one\u2028two\u2029three'})
+
+    def test_indented_output_falls_back(self):
+        self.assertSameJSON({'id': 1, 'names': ['a']}, 'application/json; indent=4')
+
+    def test_none_is_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+@skipUnless(fastjson.orjson, "orjson is not installed")
+class FastJSONParserTests(SimpleTestCase):
+    """``FastJSONParser`` parses what DRF's ``JSONParser`` does and rejects the same input."""
+
+    def parse(self, parser, content, encoding='utf-8'):
+        return parser.parse(io.BytesIO(content), 'application/json', {'encoding': encoding})
+
+    def test_round_trip(self):
+        data = {'name': "Zoë", 'age': 34, 'doctors': [1, 2], 'notes': None, 'ratio': 0.5}
+        content = FastJSONRenderer().render(data)
+        self.assertEqual(self.parse(FastJSONParser(), content), data)
+        self.assertEqual(self.parse(FastJSONParser(), content), self.parse(JSONParser(), content))
+
+    def test_other_encoding(self):
+        self.assertEqual(self.parse(FastJSONParser(), '{"name": "Zoë"}'.encode('latin-1'), 'latin-1'), {'name': "Zoë"})
+
+    def test_invalid_json(self):
+        for content in (b'{"name": ', b'{"age": NaN}', b'[Infinity]', b'\xff'):
+            with self.subTest(content=content):
+                with self.assertRaises(ParseError):
+                    self.parse(FastJSONParser(), content)
+
+
+@skipUnless(fastjson.orjson, "orjson is not installed")
+@override_settings(HEALTH_CACHE_TIMEOUT=0)
+class FastJSONResponseTests(APITestCase):
+    """Real API responses, including error envelopes, render the same with either renderer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='fastjson', password='unused')
+        patient = Patient.objects.create(name="Asha", age=34, gender="Female", notes="Line\u2028break",
+                                         created_by=cls.user)
+        PatientDoctor.objects.create(patient=patient, doctor=Doctor.objects.create(name="Dr. Rao",
+                                                                                    email="rao@example.com"))
+        cls.patient = patient
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_responses(self):
+        urls = [
+            reverse('health:patient-list'),
+            reverse('health:patient-detail', args=[self.patient.pk]),
+            reverse('health:doctor-list'),
+            reverse('health:patient-detail', args=[0]),
+            reverse('health:changes') + '?since=bad',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).data
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
@@ -0,0 +1,42 @@
+import logging
+import logging.handlers
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from config.log import log_file_handler
+
+
+class LogFileHandlerTests(SimpleTestCase):
+    """``config.log.log_file_handler`` for each LOG_ROTATION."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, 'django.log')
+
+    def handler(self, rotation, **kwargs):
+        handler = log_file_handler(self.filename, rotation, **kwargs)
+        self.addCleanup(handler.close)
+        return handler
+
+    def emit(self, handler, message):
+        handler.emit(logging.LogRecord('test', logging.INFO, __file__, 0, message, None, None))
+
+    def test_external_rotation_reopens_a_moved_file(self):
+        handler = self.handler('external')
+        self.emit(handler, 'before')
+        os.rename(self.filename, f'{self.filename}.1')
+        self.emit(handler, 'after')
+
+        with open(f'{self.filename}.1') as rotated, open(self.filename) as current:
+            self.assertEqual((rotated.read(), current.read()), ('before\n', 'after\n'))
+
+    def test_in_process_rotation(self):
+        self.assertIsInstance(self.handler('size', max_bytes=1024), logging.handlers.RotatingFileHandler)
+        self.assertIsInstance(self.handler('time', when='midnight'), logging.handlers.TimedRotatingFileHandler)
+
+    def test_unknown_rotation(self):
+        with self.assertRaises(ValueError):
+            log_file_handler(self.filename, 'daily')
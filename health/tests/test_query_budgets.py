@@ -0,0 +1,137 @@
+"""
+Every health action runs a fixed number of SQL queries, however many
+patients, doctors and assignments it reads or writes.
+
+The dataset is big enough (30 patients with 4 doctors each) that a query per
+row would blow every budget. List caching is off so the uncached path is
+measured. Write actions count the SAVEPOINT / RELEASE pair of their atomic
+block, which TestCase turns into a savepoint.
+"""
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from health.models import Doctor, Patient, PatientDoctor
+
+User = get_user_model()
+
+PATIENTS = 30
+DOCTORS_PER_PATIENT = 4
+
+
+@override_settings(HEALTH_CACHE_TIMEOUT=0, HEALTH_ANALYTICS_CACHE_TIMEOUT=0)
+class QueryBudgetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='query-budget', password='unused')
+        doctors = Doctor.objects.bulk_create(
+            Doctor(name=f"Doctor {i}", email=f"budget-{i}@example.com", specialization="Cardiology")
+            for i in range(DOCTORS_PER_PATIENT + 1)
+        )
+        cls.patients = Patient.objects.bulk_create(
+            Patient(name=f"Patient {i}", age=40, gender="Female", created_by=cls.user) for i in range(PATIENTS)
+        )
+        PatientDoctor.objects.bulk_create(
+            PatientDoctor(patient=patient, doctor=doctor)
+            for patient in cls.patients for doctor in doctors[:DOCTORS_PER_PATIENT]
+        )
+        cls.patient, cls.doctor, cls.spare = cls.patients[0], doctors[0], doctors[-1]
+        cls.link = PatientDoctor.objects.get(patient=cls.patient, doctor=cls.doctor)
+        cls.pairs = {'pairs': [{'patient_id': patient.pk, 'doctor_id': cls.spare.pk} for patient in cls.patients]}
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assertQueries(self, budget, method, url, data=None, expected=status.HTTP_200_OK):
+        with self.assertNumQueries(budget):
+            response = getattr(self.client, method)(url, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, expected)
+        return response
+
+    # Patients
+
+    def test_patient_list(self):
+        self.assertQueries(3, 'get', reverse('health:patient-list'))
+
+    def test_patient_search(self):
+        self.assertQueries(3, 'get', reverse('health:patient-list') + '?search=Patient')
+
+    def test_patient_cursor_pages(self):
+        url = reverse('health:patient-list') + '?pagination=cursor&page_size=10'
+        response = self.assertQueries(2, 'get', url)
+        self.assertQueries(2, 'get', response.data['next'])
+
+    def test_patient_detail(self):
+        self.assertQueries(3, 'get', reverse('health:patient-detail', args=[self.patient.pk]))
+
+    def test_patient_create(self):
+        self.assertQueries(
+            1, 'post', reverse('health:patient-list'), {'name': 'New', 'age': 30}, status.HTTP_201_CREATED
+        )
+
+    def test_patient_update(self):
+        self.assertQueries(4, 'patch', reverse('health:patient-detail', args=[self.patient.pk]), {'notes': 'x'})
+
+    def test_patient_delete(self):
+        self.assertQueries(
+            7, 'delete', reverse('health:patient-detail', args=[self.patient.pk]),
+            expected=status.HTTP_204_NO_CONTENT
+        )
+
+    def test_assign_doctor(self):
+        self.assertQueries(
+            7, 'post', reverse('health:patient-assign-doctor', args=[self.patient.pk]),
+            {'doctor_id': self.spare.pk}, status.HTTP_201_CREATED
+        )
+
+    def test_unassign_doctor(self):
+        self.assertQueries(
+            7, 'delete', reverse('health:patient-unassign-doctor', args=[self.patient.pk]),
+            {'doctor_id': self.doctor.pk}
+        )
+
+    def test_assign_doctors(self):
+        response = self.assertQueries(8, 'post', reverse('health:patient-assign-doctors'), self.pairs)
+        self.assertEqual(len(response.data['created']), PATIENTS)
+
+    def test_unassign_doctors(self):
+        pairs = {'pairs': [{'patient_id': patient.pk, 'doctor_id': self.doctor.pk} for patient in self.patients]}
+        response = self.assertQueries(10, 'delete', reverse('health:patient-unassign-doctors'), pairs)
+        self.assertEqual(len(response.data['deleted']), PATIENTS)
+
+    def test_bulk_create(self):
+        rows = [{'name': f'Imported {i}', 'age': 30, 'gender': 'Male'} for i in range(250)]
+        # SAVEPOINT, INSERT and RELEASE per batch of 100
+        self.assertQueries(9, 'post', reverse('health:patient-bulk-create') + '?batch_size=100', rows)
+        self.assertEqual(Patient.objects.filter(name__startswith='Imported').count(), 250)
+
+    # Doctors and assignments
+
+    def test_doctor_list(self):
+        self.assertQueries(2, 'get', reverse('health:doctor-list'))
+
+    def test_doctor_detail(self):
+        self.assertQueries(4, 'get', reverse('health:doctor-detail', args=[self.doctor.pk]))
+
+    def test_doctor_patients(self):
+        self.assertQueries(3, 'get', reverse('health:doctor-patients', args=[self.doctor.pk]))
+
+    def test_assignment_list(self):
+        self.assertQueries(2, 'get', reverse('health:patientdoctor-list'))
+
+    def test_assignment_detail(self):
+        self.assertQueries(2, 'get', reverse('health:patientdoctor-detail', args=[self.link.pk]))
+
+    # Sync and analytics
+
+    def test_changes_feed(self):
+        response = self.assertQueries(5, 'get', reverse('health:changes'))
+        self.assertQueries(4, 'get', reverse('health:changes') + f"?since={response.data['next_token']}")
+
+    def test_analytics(self):
+        self.assertQueries(5, 'get', reverse('health:analytics'))
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from config import replicas
+from health.cache import read_from_primary_after_bump
+
+User = get_user_model()
+
+
+class PinKeyTests(TestCase):
+    """Clients are pinned to the primary per authenticated user, not per token."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='replica-pins', password='unused')
+        cls.other = User.objects.create_user(username='replica-pins-other', password='unused')
+
+    def key(self, authorization=None, address='10.0.0.1'):
+        headers = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+        return replicas._pin_key(RequestFactory().get('/', REMOTE_ADDR=address, **headers))
+
+    def test_every_token_of_a_user_shares_the_pin(self):
+        first = self.key(f'Bearer {AccessToken.for_user(self.user)}', address='10.0.0.1')
+        second = self.key(f'Bearer {RefreshToken.for_user(self.user).access_token}', address='10.0.0.2')
+        self.assertEqual(first, second)
+        self.assertEqual(first, f'replicas:pin:user:{self.user.pk}')
+
+    def test_users_have_their_own_pins(self):
+        self.assertNotEqual(
+            self.key(f'Bearer {AccessToken.for_user(self.user)}'),
+            self.key(f'Bearer {AccessToken.for_user(self.other)}'),
+        )
+
+    def test_invalid_tokens_fall_back_to_the_address(self):
+        anonymous = self.key()
+        self.assertEqual(self.key('Bearer not-a-token'), anonymous)
+        self.assertEqual(self.key('Bearer two parts'), anonymous)
+        self.assertNotEqual(self.key(address='10.0.0.2'), anonymous)
+
+
+@override_settings(REPLICA_LAG_CHECK_INTERVAL=60, REPLICA_MAX_LAG_SECONDS=5)
+class ReplicaLagTests(SimpleTestCase):
+    """A replica whose lag isn't known is skipped; the event loop measures it in a thread."""
+
+    def setUp(self):
+        patcher = mock.patch.dict(replicas._lag, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unknown_lag_in_the_event_loop(self):
+        measured = []
+
+        def measure(alias):
+            measured.append(alias)
+            return 0.5
+
+        async def lag():
+            return replicas.replica_lag('replica_0')
+
+        with mock.patch.object(replicas, '_measure_lag', measure), \
+                mock.patch.object(replicas, 'connections', mock.MagicMock()):
+            self.assertIsNone(asyncio.run(lag()))
+            for _ in range(100):
+                if 'replica_0' in replicas._lag:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(asyncio.run(lag()), 0.5)
+        self.assertEqual(measured, ['replica_0'])
+
+    def test_lag_outside_the_event_loop(self):
+        with mock.patch.object(replicas, '_measure_lag', return_value=7.0):
+            self.assertEqual(replicas.replica_lag('replica_0'), 7.0)
+        with override_settings(DATABASE_REPLICAS=['replica_0']):
+            self.assertEqual(replicas.healthy_replicas(), [])
+
+
+@override_settings(REPLICA_LAG_CHECK_INTERVAL=5, REPLICA_MAX_LAG_SECONDS=5)
+class ReadFromPrimaryAfterBumpTests(SimpleTestCase):
+    """Cache fills and list ETags right after a write read from the primary."""
+
+    def routing(self):
+        routing = replicas.RequestRouting(replica_allowed=True)
+        token = replicas._request_routing.set(routing)
+        self.addCleanup(replicas._request_routing.reset, token)
+        return routing
+
+    def test_recent_version(self):
+        routing = self.routing()
+        read_from_primary_after_bump(time.time_ns())
+        self.assertFalse(routing.replica_allowed)
+
+    def test_old_version(self):
+        routing = self.routing()
+        read_from_primary_after_bump(time.time_ns() - 60 * 10 ** 9)
+        self.assertTrue(routing.replica_allowed)
+
+    def test_no_version(self):
+        routing = self.routing()
+        read_from_primary_after_bump(None)
+        self.assertTrue(routing.replica_allowed)
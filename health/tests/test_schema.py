@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase, override_settings
+
+from config.schema import code_version, settings_digest
+
+
+class SchemaVersionTests(SimpleTestCase):
+    """The schema version changes with the settings the schema depends on."""
+
+    def setUp(self):
+        code_version.cache_clear()
+        self.addCleanup(code_version.cache_clear)
+
+    def test_settings_change_the_version(self):
+        with override_settings(FAST_JSON=False):
+            plain = settings_digest()
+        with override_settings(FAST_JSON=True):
+            self.assertNotEqual(settings_digest(), plain)
+        with override_settings(HEALTH_ASYNC_VIEWS=True, HEALTH_FAST_SERIALIZERS=False):
+            self.assertNotEqual(settings_digest(), plain)
+
+    def test_release_version_keeps_the_settings(self):
+        with override_settings(API_SCHEMA_VERSION='abc123', FAST_JSON=True):
+            self.assertEqual(code_version(), f'abc123-{settings_digest()}')
+
+    def test_source_version(self):
+        with override_settings(API_SCHEMA_VERSION=''):
+            self.assertTrue(code_version().endswith(f'-{settings_digest()}'))
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from health.models import Doctor, Patient, PatientDoctor, Tombstone
+from health.sync import encode_token
+
+User = get_user_model()
+
+
+@override_settings(HEALTH_SYNC_LAG_SECONDS=0)
+class ChangesFeedTests(APITestCase):
+    """``GET changes/``: upserts and deletes per stream since a sync token."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='sync', password='unused')
+        stranger = User.objects.create_user(username='sync-stranger', password='unused')
+        cls.asha = Patient.objects.create(name="Asha", age=34, created_by=cls.user)
+        cls.ravi = Patient.objects.create(name="Ravi", age=50, created_by=cls.user)
+        cls.foreign = Patient.objects.create(name="Someone else's", age=60, created_by=stranger)
+        cls.rao = Doctor.objects.create(name="Dr. Rao", email="rao@example.com")
+        cls.iyer = Doctor.objects.create(name="Dr. Iyer", email="iyer@example.com")
+        cls.link = PatientDoctor.objects.create(patient=cls.asha, doctor=cls.rao)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.url = reverse('health:changes')
+
+    def sync(self, token=None, **params):
+        if token:
+            params['since'] = token
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def ids(self, data, stream):
+        return [row['id'] for row in data[stream]['upserts']]
+
+    def test_full_sync(self):
+        data = self.sync()
+        self.assertCountEqual(self.ids(data, 'patients'), [self.asha.pk, self.ravi.pk])
+        self.assertCountEqual(self.ids(data, 'doctors'), [self.rao.pk, self.iyer.pk])
+        self.assertEqual(self.ids(data, 'assignments'), [self.link.pk])
+        self.assertEqual([data[stream]['deletes'] for stream in ('patients', 'doctors', 'assignments')], [[]] * 3)
+        self.assertFalse(data['has_more'])
+
+    def test_nothing_changed(self):
+        data = self.sync(self.sync()['next_token'])
+        self.assertEqual([self.ids(data, stream) for stream in ('patients', 'doctors', 'assignments')], [[]] * 3)
+
+    def test_updates_and_deletes(self):
+        token = self.sync()['next_token']
+        self.ravi.notes = "Follow up"
+        self.ravi.save()
+        asha_id = self.asha.pk
+        self.asha.delete()
+
+        data = self.sync(token)
+        self.assertEqual(self.ids(data, 'patients'), [self.ravi.pk])
+        self.assertEqual(data['patients']['deletes'], [asha_id])
+        self.assertEqual(data['assignments']['deletes'], [self.link.pk])
+
+    def test_moved_assignment_is_an_upsert(self):
+        token = self.sync()['next_token']
+        self.link.doctor = self.iyer
+        self.link.save()
+
+        data = self.sync(token)
+        self.assertEqual(data['assignments']['upserts'][0]['doctor'], self.iyer.pk)
+
+    def test_limit_pages_through_every_row(self):
+        Patient.objects.bulk_create(Patient(name=f"Patient {i}", age=40, created_by=self.user) for i in range(5))
+        data = self.sync(limit=3)
+        seen = self.ids(data, 'patients')
+        while data['has_more']:
+            data = self.sync(data['next_token'], limit=3)
+            seen += self.ids(data, 'patients')
+        self.assertEqual(seen, list(Patient.objects.filter(created_by=self.user).order_by('updated_at', 'id')
+                                    .values_list('id', flat=True)))
+
+    def test_invalid_token(self):
+        response = self.client.get(self.url, {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('since', response.data['error']['details'])
+
+    def test_invalid_limit(self):
+        response = self.client.get(self.url, {'limit': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(HEALTH_SYNC_TOMBSTONE_DAYS=30)
+    def test_expired_token(self):
+        token = encode_token({
+            'at': (timezone.now() - timedelta(days=31)).isoformat(),
+            'patients': None, 'doctors': None, 'assignments': None, 'tombstones': 0,
+        })
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.data['error']['message'].code, 'sync_token_expired')
+
+
+@override_settings(HEALTH_SYNC_TOMBSTONE_DAYS=30)
+class PruneTombstonesTests(TestCase):
+    """``manage.py prune_tombstones``."""
+
+    def test_prunes_past_retention(self):
+        old = Tombstone.objects.create(model=Tombstone.PATIENT, object_id=1)
+        Tombstone.objects.filter(pk=old.pk).update(deleted_at=timezone.now() - timedelta(days=31))
+        recent = Tombstone.objects.create(model=Tombstone.PATIENT, object_id=2)
+
+        call_command('prune_tombstones', days=30, stdout=StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list('pk', flat=True)), [recent.pk])
+
+    def test_refuses_less_than_retention(self):
+        with self.assertRaises(CommandError):
+            call_command('prune_tombstones', days=7, stdout=StringIO())
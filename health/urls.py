@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PatientViewSet, DoctorViewSet, PatientDoctorViewSet
+from .views import PatientViewSet, DoctorViewSet, PatientDoctorViewSet, ChangesView, AnalyticsView
 
 app_name = 'health'
 
@@ -11,5 +11,7 @@ router.register(r'doctors', DoctorViewSet)
 router.register(r'patient-doctors', PatientDoctorViewSet)
 
 urlpatterns = [
+    path('changes/', ChangesView.as_view(), name='changes'),
+    path('analytics/', AnalyticsView.as_view(), name='analytics'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
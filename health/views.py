@@ -1,12 +1,29 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from config.replicas import read_from_primary
+from .analytics import (
+    DEFAULT_AGE_BUCKET, DEFAULT_INTERVAL, DEFAULT_PERIODS, INTERVALS, MAX_PERIODS, cached_patient_analytics
+)
+from .async_views import AsyncReadMixin
+from .bulk import assign_doctors, bulk_import_batch_size, import_patients, unassign_doctors
+from .cache import PatientListCacheMixin, adoctors_version, doctors_version
+from .conditional import ConditionalGetMixin
+from .export import ExportMixin, export_assignments, export_patients
+from .fast_serializers import FastDoctorSerializer, FastListMixin, FastPatientDoctorSerializer, FastPatientSerializer
+from .filters import HealthSearchFilter, RankedOrderingFilter
 from .models import Patient, Doctor, PatientDoctor
+from .pagination import DoctorPatientsPagination, HealthPagination
+from .parsers import CSVParser, NDJSONParser
+from .streaming import NDJSON_CONTENT_TYPE, BatchStreamingResponse, json_array_response, ndjson_response
+from .sync import DEFAULT_LIMIT, MAX_LIMIT, changes_since
 from .serializers import (
     PatientSerializer,
     PatientCreateSerializer,
@@ -14,20 +31,45 @@ from .serializers import (
     DoctorSerializer,
     DoctorDetailSerializer,
     PatientDoctorSerializer,
-    AssignDoctorSerializer
+    AssignDoctorSerializer,
+    BulkAssignmentSerializer,
+    with_linked_patients
 )
 
+
+class EagerLoadingMixin:
+    """Apply the serializer's select/prefetch plan to querysets used for reads."""
+    eager_loading_actions = ('list', 'retrieve')
+    
+    def eager_load(self, queryset):
+        if self.action not in self.eager_loading_actions:
+            return queryset
+        setup = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+        return setup(queryset) if setup else queryset
+
  
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(ConditionalGetMixin, PatientListCacheMixin, FastListMixin, AsyncReadMixin, EagerLoadingMixin, ExportMixin, viewsets.ModelViewSet):
     """CRUD operations for patients"""
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
+    fast_serializer_class = FastPatientSerializer
+    export_rows = staticmethod(export_patients)
+    export_filename = 'patients'
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['gender', 'created_by']
+    pagination_class = HealthPagination
+    filter_backends = [DjangoFilterBackend, HealthSearchFilter, RankedOrderingFilter]
+    filterset_fields = {
+        'gender': ['exact'],
+        'created_by': ['exact'],
+        'doctor_count': ['exact', 'gte', 'lte'],
+    }
     search_fields = ['name', 'notes']
-    ordering_fields = ['name', 'age', 'created_at']
+    search_vector = 'search_vector'
+    search_trigram_fields = ['name']
+    ordering_fields = ['name', 'age', 'created_at', 'doctor_count']
     ordering = ['-created_at']
+    conditional_timestamps = ('updated_at', 'doctor_links__updated_at', 'doctor_links__doctor__updated_at')
+    conditional_counts = ('doctor_links',)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -44,11 +86,73 @@ class PatientViewSet(viewsets.ModelViewSet):
         if not user or not user.is_authenticated:
             return Patient.objects.none()
         # Users can only see their own patients
-        return Patient.objects.filter(created_by=user)
+        return self.eager_load(Patient.objects.filter(created_by=user).defer('search_vector'))
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
+    @swagger_auto_schema(
+        method='post',
+        request_body=PatientCreateSerializer(many=True),
+        manual_parameters=[
+            openapi.Parameter(
+                'batch_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                description='Rows inserted per batch'
+            ),
+        ],
+        consumes=['application/json', NDJSON_CONTENT_TYPE, 'text/csv'],
+        produces=[NDJSON_CONTENT_TYPE],
+        responses={
+            200: 'NDJSON report: one line per row, then a summary line',
+            400: 'Bad Request'
+        }
+    )
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser, CSVParser])
+    def bulk_create(self, request):
+        """Create many patients from a JSON array, NDJSON or CSV upload"""
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response(
+                {'error': 'Expected a list of patients'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        batch_size = bulk_import_batch_size(request.query_params.get('batch_size'))
+        return BatchStreamingResponse(
+            import_patients(rows, request.user, batch_size),
+            content_type=NDJSON_CONTENT_TYPE
+        )
+    
+    @swagger_auto_schema(
+        method='post',
+        request_body=BulkAssignmentSerializer,
+        responses={
+            200: openapi.Response('Pairs created, skipped (already assigned) and missing'),
+            400: 'Bad Request'
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def assign_doctors(self, request):
+        """Assign doctors to patients for many (patient_id, doctor_id) pairs at once"""
+        serializer = BulkAssignmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(assign_doctors(serializer.validated_data['pairs'], request.user))
+    
+    @swagger_auto_schema(
+        method='delete',
+        request_body=BulkAssignmentSerializer,
+        responses={
+            200: openapi.Response('Pairs deleted, skipped (not assigned) and missing'),
+            400: 'Bad Request'
+        }
+    )
+    @action(detail=False, methods=['delete'])
+    def unassign_doctors(self, request):
+        """Unassign doctors from patients for many (patient_id, doctor_id) pairs at once"""
+        serializer = BulkAssignmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(unassign_doctors(serializer.validated_data['pairs'], request.user))
+    
     @swagger_auto_schema(
         method='post',
         request_body=AssignDoctorSerializer,
@@ -106,7 +210,7 @@ class PatientViewSet(viewsets.ModelViewSet):
         
         try:
             doctor = Doctor.objects.get(id=doctor_id)
-            assignment = PatientDoctor.objects.get(patient=patient, doctor=doctor)
+            assignment = patient.doctor_links.get(doctor=doctor)
             assignment.delete()
             
             return Response(
@@ -125,42 +229,91 @@ class PatientViewSet(viewsets.ModelViewSet):
             )
 
 
-class DoctorViewSet(viewsets.ModelViewSet):
+class DoctorViewSet(ConditionalGetMixin, FastListMixin, AsyncReadMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     """CRUD operations for doctors"""
     queryset = Doctor.objects.all()
     serializer_class = DoctorSerializer
+    fast_serializer_class = FastDoctorSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['specialization']
+    pagination_class = HealthPagination
+    filter_backends = [DjangoFilterBackend, HealthSearchFilter, RankedOrderingFilter]
+    filterset_fields = {
+        'specialization': ['exact'],
+        'patient_count': ['exact', 'gte', 'lte'],
+    }
     search_fields = ['name', 'email', 'specialization']
-    ordering_fields = ['name', 'specialization', 'created_at']
+    search_trigram_fields = ['name']
+    ordering_fields = ['name', 'specialization', 'created_at', 'patient_count']
     ordering = ['name']
+    # DoctorDetailSerializer nests the assigned patients and their doctors
+    conditional_timestamps = (
+        'updated_at',
+        'patient_links__updated_at',
+        'patient_links__patient__updated_at',
+        'patient_links__patient__doctor_links__updated_at',
+        'patient_links__patient__doctor_links__doctor__updated_at',
+    )
+    conditional_counts = ('patient_links', 'patient_links__patient__doctor_links')
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return DoctorDetailSerializer
         return DoctorSerializer
     
+    def get_queryset(self):
+        return self.eager_load(super().get_queryset())
+    
+    def get_list_version(self):
+        return doctors_version()
+    
+    async def aget_list_version(self):
+        return await adoctors_version()
+    
+    @swagger_auto_schema(
+        method='get',
+        manual_parameters=[
+            openapi.Parameter(
+                'stream', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'json'],
+                description='Stream every patient as newline-delimited JSON or one JSON array instead of paging'
+            ),
+        ],
+        responses={200: PatientSerializer(many=True)}
+    )
     @action(detail=True, methods=['get'])
     def patients(self, request, pk=None):
         """Get all patients assigned to this doctor"""
         doctor = self.get_object()
-        patient_links = PatientDoctor.objects.filter(doctor=doctor)
-        patients = [link.patient for link in patient_links]
+        paginator = DoctorPatientsPagination()
+        patient_links = with_linked_patients(
+            PatientDoctor.objects.filter(doctor=doctor).order_by(*paginator.ordering)
+        )
+        
+        stream = {'ndjson': ndjson_response, 'json': json_array_response}.get(request.query_params.get('stream'))
+        if stream is not None:
+            return stream(
+                patient_links,
+                lambda links: PatientSerializer([link.patient for link in links], many=True).data
+            )
         
-        serializer = PatientSerializer(patients, many=True)
-        return Response(serializer.data)
+        page = paginator.paginate_queryset(patient_links, request, view=self)
+        serializer = PatientSerializer([link.patient for link in page], many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
-class PatientDoctorViewSet(viewsets.ModelViewSet):
+class PatientDoctorViewSet(ConditionalGetMixin, FastListMixin, AsyncReadMixin, EagerLoadingMixin, ExportMixin, viewsets.ModelViewSet):
     """Manage patient-doctor relationships"""
     queryset = PatientDoctor.objects.all()
     serializer_class = PatientDoctorSerializer
+    fast_serializer_class = FastPatientDoctorSerializer
+    export_rows = staticmethod(export_assignments)
+    export_filename = 'patient-doctors'
     permission_classes = [IsAuthenticated]
+    pagination_class = HealthPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['patient', 'doctor']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
+    conditional_timestamps = ('updated_at', 'patient__updated_at', 'doctor__updated_at')
     
     def get_queryset(self):
         # Avoid DB filters during schema generation or unauthenticated access
@@ -170,4 +323,87 @@ class PatientDoctorViewSet(viewsets.ModelViewSet):
         if not user or not user.is_authenticated:
             return PatientDoctor.objects.none()
         # Users can only see relationships for their own patients
-        return PatientDoctor.objects.filter(patient__created_by=user)
+        return self.eager_load(PatientDoctor.objects.filter(patient__created_by=user))
+
+
+class ChangesView(APIView):
+    """Incremental sync: upserts and deletes since a sync token"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description='next_token from the previous call; omit for a full sync'
+            ),
+            openapi.Parameter(
+                'limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                description=f'Rows per stream (default {DEFAULT_LIMIT}, max {MAX_LIMIT})'
+            ),
+        ],
+        responses={
+            200: openapi.Response('Upserts and deleted ids per stream, has_more and next_token'),
+            400: 'Bad Request',
+            410: 'Sync token expired; start a full sync'
+        }
+    )
+    def get(self, request):
+        """Get patients, doctors and assignments changed since the sync token"""
+        # Replica lag could exceed HEALTH_SYNC_LAG_SECONDS and skip rows for good
+        read_from_primary()
+        try:
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(changes_since(request.user, request.query_params.get('since'), limit))
+
+
+class AnalyticsView(APIView):
+    """Aggregates over the user's patients and their assignments"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'interval', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(INTERVALS),
+                description=f'Growth period (default {DEFAULT_INTERVAL})'
+            ),
+            openapi.Parameter(
+                'periods', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                description=f'Growth periods up to the current one (default {DEFAULT_PERIODS}, max {MAX_PERIODS})'
+            ),
+            openapi.Parameter(
+                'age_bucket', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                description=f'Width of the age histogram buckets in years (default {DEFAULT_AGE_BUCKET})'
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                'Totals, age histogram, gender breakdown, doctors per patient, '
+                'specialization workload and growth per period'
+            ),
+            400: 'Bad Request'
+        }
+    )
+    def get(self, request):
+        """Get age, gender, specialization and growth statistics for your patients"""
+        interval = request.query_params.get('interval', DEFAULT_INTERVAL)
+        if interval not in INTERVALS:
+            return Response(
+                {'error': f"interval must be one of: {', '.join(INTERVALS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            periods = min(max(int(request.query_params.get('periods', DEFAULT_PERIODS)), 1), MAX_PERIODS)
+            age_bucket = min(max(int(request.query_params.get('age_bucket', DEFAULT_AGE_BUCKET)), 1), 100)
+        except ValueError:
+            return Response(
+                {'error': 'periods and age_bucket must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(cached_patient_analytics(
+            request.user, interval=interval, periods=periods, age_bucket=age_bucket
+        ))
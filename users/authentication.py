@@ -0,0 +1,124 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import TokenUser, User
+
+CACHE_ALIAS = 'auth'
+
+# User fields that can be read straight from token claims (JWT_PROFILE_CLAIMS)
+PROFILE_CLAIMS = ('username', 'email', 'first_name', 'last_name')
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _state_key(user_id):
+    return f'users:state:{user_id}'
+
+
+def get_user_state(user_id):
+    """
+    ``(is_active, password_hash_md5)`` for ``user_id``, or ``None`` if the user
+    doesn't exist, cached for ``JWT_USER_STATE_TTL`` seconds.
+    """
+    key = _state_key(user_id)
+    state = _cache().get(key)
+    if state is None:
+        row = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list('is_active', 'password').first()
+        state = (row[0], get_md5_hash_password(row[1])) if row else False
+        _cache().set(key, state, settings.JWT_USER_STATE_TTL)
+    return state or None
+
+
+async def aget_user_state(user_id):
+    """``get_user_state`` through the async cache and ORM APIs."""
+    key = _state_key(user_id)
+    state = await _cache().aget(key)
+    if state is None:
+        row = await User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list('is_active', 'password').afirst()
+        state = (row[0], get_md5_hash_password(row[1])) if row else False
+        await _cache().aset(key, state, settings.JWT_USER_STATE_TTL)
+    return state or None
+
+
+def forget_user_state(user_id):
+    _cache().delete(_state_key(user_id))
+
+
+def _user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+
+def _check_user_state(validated_token, is_active, password_hash):
+    if not is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+        raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """
+    simplejwt's JWTAuthentication plus ``aauthenticate()``, which async views
+    (health.async_views) await to load the user through the async ORM.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = _user_id(validated_token)
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        _check_user_state(validated_token, user.is_active, get_md5_hash_password(user.password))
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that doesn't load the user row on every request.
+
+    ``request.user`` is a TokenUser built from the token's claims: its pk (and
+    profile fields, when the token carries them) are available for free and
+    anything else is loaded on first access. Revocation still applies: the
+    user's active flag and, with CHECK_REVOKE_TOKEN, password hash come from
+    a per-process cache that expires after ``JWT_USER_STATE_TTL`` seconds and
+    is cleared when this process saves or deletes the user.
+    """
+
+    def get_user(self, validated_token):
+        return self.token_user(validated_token, get_user_state(_user_id(validated_token)))
+
+    async def aget_user(self, validated_token):
+        return self.token_user(validated_token, await aget_user_state(_user_id(validated_token)))
+
+    def token_user(self, validated_token, state):
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        is_active, password_hash = state
+        _check_user_state(validated_token, is_active, password_hash)
+
+        field_claims = {User._meta.get_field(api_settings.USER_ID_FIELD).attname: api_settings.USER_ID_CLAIM}
+        field_claims.update((claim, claim) for claim in PROFILE_CLAIMS)
+        user = TokenUser.from_claims(validated_token, field_claims)
+        user.is_active = is_active
+        return user
@@ -0,0 +1,24 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth import get_user_model
+
+from .hashing import check_password, make_password
+
+User = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend with password checks (and rehash on login) run on the hashing pool."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash once anyway so unknown usernames take as long as known ones
+            make_password(password)
+        else:
+            if check_password(user, password) and self.user_can_authenticate(user):
+                return user
@@ -0,0 +1,68 @@
+"""
+Password hashing on a bounded worker pool.
+
+PBKDF2, scrypt, bcrypt and argon2 release the GIL while hashing, so running
+them on PASSWORD_HASH_WORKERS threads caps the CPU that concurrent logins and
+sign-ups can take without serializing them behind one lock. With
+PASSWORD_HASH_POOL=process the hashing runs in worker processes instead.
+
+The pool only bounds concurrency. Login, registration and password changes
+are sync views, so the request thread blocks on its hash exactly as it would
+hashing inline; what changes is that no more than PASSWORD_HASH_WORKERS
+hashes run at once, and the rest queue instead of competing for CPU.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _setup_worker_process():
+    import django
+    django.setup()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if settings.PASSWORD_HASH_POOL == 'process':
+                    _pool = ProcessPoolExecutor(settings.PASSWORD_HASH_WORKERS, initializer=_setup_worker_process)
+                else:
+                    _pool = ThreadPoolExecutor(settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+    return _pool
+
+
+def run_hasher(func, *args):
+    """``func(*args)`` on the pool, waiting for the result in the calling thread."""
+    if not settings.PASSWORD_HASH_WORKERS:
+        return func(*args)
+    return get_pool().submit(func, *args).result()
+
+
+def make_password(password):
+    return run_hasher(hashers.make_password, password)
+
+
+def check_password(user, password):
+    """
+    ``user.check_password(password)`` with the hashing done on the pool,
+    including the rehash when the preferred hasher or its cost has changed.
+    """
+    is_correct, must_update = run_hasher(hashers.verify_password, password, user.password)
+    if is_correct and must_update:
+        user.password = make_password(password)
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+def set_password(user, password):
+    """``user.set_password(password)`` with the hashing done on the pool."""
+    user.password = make_password(password)
+    # Let AbstractBaseUser.save() notify the password validators, as set_password does
+    user._password = password
@@ -0,0 +1,117 @@
+"""
+Load-test the auth endpoints: login (CustomTokenObtainPairView), registration
+and password change.
+
+Creates temporary users, sends requests from a pool of threads and reports
+requests per second (overall and per password-hashing worker), latency
+percentiles and the SQL queries run per request. Password hashing dominates
+these endpoints; ``--fast-hasher`` swaps in MD5 for the run so the rest of
+the path is what gets measured. The users are deleted afterwards.
+"""
+import itertools
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from users.views import CustomTokenObtainPairView, UserRegistrationView, change_password
+
+User = get_user_model()
+
+PASSWORD = 'benchmark-Passw0rd'
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+USERNAME_PREFIX = 'auth-benchmark-'
+
+
+class Command(BaseCommand):
+    help = "Benchmark auth endpoint throughput (requests/second) and queries per request."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=['login', 'register', 'change-password'], default='login')
+        parser.add_argument('--requests', '--logins', dest='requests', type=int, default=200)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--fast-hasher', action='store_true',
+                            help="Hash the benchmark passwords with MD5 to leave out hashing cost")
+
+    def handle(self, *args, **options):
+        if options['fast_hasher']:
+            with override_settings(PASSWORD_HASHERS=FAST_HASHERS):
+                self.run(options)
+        else:
+            self.run(options)
+
+    def run(self, options):
+        self.users = [
+            User.objects.create_user(username=f'{USERNAME_PREFIX}{i}', password=PASSWORD)
+            for i in range(options['users'])
+        ]
+        self.factory = APIRequestFactory(SERVER_NAME='localhost')
+        self.sequence = itertools.count()
+        send = {
+            'login': self.login,
+            'register': self.register,
+            'change-password': self.change_password,
+        }[options['endpoint']]
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                send(0)
+            self.stdout.write(f"queries per request: {len(queries)}")
+            for query in queries:
+                self.stdout.write(f"  {query['sql'][:120]}")
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                latencies = list(pool.map(lambda i: self.timed(send, i), range(options['requests'])))
+            elapsed = time.perf_counter() - started
+
+            latencies.sort()
+            rate = options['requests'] / elapsed
+            workers = settings.PASSWORD_HASH_WORKERS
+            self.stdout.write(
+                f"{options['requests']} {options['endpoint']} requests in {elapsed:.3f}s "
+                f"with {options['concurrency']} threads: {rate:.1f} requests/s"
+                + (f" ({rate / workers:.1f} per hashing worker, {workers} workers)" if workers else " (inline hashing)")
+                + f", p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms"
+            )
+        finally:
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def expect_success(self, response, label):
+        if response.status_code >= 300:
+            raise CommandError(f"{label} failed with {response.status_code}: {response.data}")
+
+    def login(self, i):
+        username = self.users[i % len(self.users)].username
+        request = self.factory.post('/', {'username': username, 'password': PASSWORD}, format='json')
+        self.expect_success(CustomTokenObtainPairView.as_view()(request), 'Login')
+
+    def register(self, i):
+        data = {
+            'username': f'{USERNAME_PREFIX}new-{next(self.sequence)}',
+            'email': 'benchmark@example.com',
+            'password': PASSWORD,
+            'password_confirm': PASSWORD,
+        }
+        request = self.factory.post('/', data, format='json')
+        self.expect_success(UserRegistrationView.as_view()(request), 'Registration')
+
+    def change_password(self, i):
+        request = self.factory.post('/', {'old_password': PASSWORD, 'new_password': PASSWORD}, format='json')
+        force_authenticate(request, user=User.objects.get(pk=self.users[i % len(self.users)].pk))
+        self.expect_success(change_password(request), 'Password change')
+
+    def timed(self, send, i):
+        started = time.perf_counter()
+        try:
+            send(i)
+        finally:
+            close_old_connections()
+        return time.perf_counter() - started
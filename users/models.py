@@ -1,2 +1,37 @@
-from django.db import models
+from django.contrib.auth import get_user_model
 # Using Django's default User model; no custom fields needed here.
+
+User = get_user_model()
+
+
+class TokenUser(User):
+    """
+    A User built from JWT claims by ``users.authentication.StatelessJWTAuthentication``.
+
+    Fields carried by the token are set; the first access to any other field
+    loads the rest of the row in one query. Claims are as of login, so a
+    TokenUser is read-only: views that write load the User row instead
+    (``users.views.get_stored_user``).
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, claims, field_claims):
+        """``field_claims`` maps field attnames to the claims holding their values."""
+        loaded = {attname: claims[claim] for attname, claim in field_claims.items() if claim in claims}
+        fields = [field.attname for field in cls._meta.concrete_fields if field.attname in loaded]
+        return cls.from_db(None, fields, [loaded[attname] for attname in fields])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using, fields, from_queryset)
+
+    def save(self, *args, **kwargs):
+        raise TypeError("TokenUser is read-only; save the User loaded by pk instead")
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("TokenUser is read-only; delete the User loaded by pk instead")
@@ -1,11 +1,15 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from config.metrics import TimedSerializerMixin
+from .hashing import check_password, set_password
 
 User = get_user_model()
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     password_confirm = serializers.CharField(write_only=True)
     
@@ -23,18 +27,43 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        # What create_user does, with the password hashed on the hashing pool
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        set_password(user, password)
+        user.save()
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'date_joined')
         read_only_fields = ('id', 'username', 'date_joined')
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair plus the profile of the user SimpleJWT just authenticated."""
+    profile_claims = ('username', 'email', 'first_name', 'last_name')
+    
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        if settings.JWT_PROFILE_CLAIMS:
+            # Copied into the access token; refreshed tokens keep these values
+            for claim in cls.profile_claims:
+                token[claim] = getattr(user, claim)
+        return token
+    
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        data['user'] = UserProfileSerializer(self.user).data
+        return data
+
+
+class UserUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('email', 'first_name', 'last_name')
@@ -45,7 +74,8 @@ class ChangePasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField(required=True, validators=[validate_password])
     
     def validate_old_password(self, value):
-        user = self.context['request'].user
-        if not user.check_password(value):
+        # The view's stored user: a correct password may be rehashed and saved
+        user = self.context.get('user') or self.context['request'].user
+        if not check_password(user, value):
             raise serializers.ValidationError("Old password is incorrect")
         return value
\ No newline at end of file
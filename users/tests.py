@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import StatelessJWTAuthentication
+from .models import TokenUser
+from .views import UserProfileView, change_password, user_profile
+
+User = get_user_model()
+
+
+class StatelessAuthenticationTests(TestCase):
+    """Requests authenticated from token claims read and write the stored User, never the TokenUser."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='stateless', email='old@example.com', password='Old-pass-123', first_name='Asha'
+        )
+
+    def setUp(self):
+        token = AccessToken.for_user(self.user)
+        # The claims as of login, as JWT_PROFILE_CLAIMS embeds them
+        token['username'] = self.user.username
+        token['email'] = self.user.email
+        token['first_name'] = self.user.first_name
+        self.authorization = f'Bearer {token}'
+
+    def request(self, method, data=None):
+        return getattr(APIRequestFactory(), method)('/', data, format='json', HTTP_AUTHORIZATION=self.authorization)
+
+    def view(self, view):
+        # Views pick their authentication classes at import; run them with the stateless one
+        cls = getattr(view, 'cls', view)
+        return cls.as_view(authentication_classes=[StatelessJWTAuthentication])
+
+    def test_request_user_is_read_only(self):
+        user, _ = StatelessJWTAuthentication().authenticate(self.request('get'))
+        self.assertIsInstance(user, TokenUser)
+        user.first_name = 'Changed'
+        with self.assertRaises(TypeError):
+            user.save()
+        with self.assertRaises(TypeError):
+            user.delete()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Asha')
+
+    def test_profile_update_is_saved_and_shown(self):
+        response = self.view(UserProfileView)(self.request('patch', {'first_name': 'Ravi'}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Ravi')
+
+        # The token still says "Asha"; the profile shows the stored row
+        response = self.view(user_profile)(self.request('get'))
+        self.assertEqual(response.data['first_name'], 'Ravi')
+
+    def test_change_password(self):
+        data = {'old_password': 'Old-pass-123', 'new_password': 'New-pass-456!'}
+        response = self.view(change_password)(self.request('post', data))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('New-pass-456!'))
+
+    def test_change_password_checks_old_password(self):
+        data = {'old_password': 'wrong', 'new_password': 'New-pass-456!'}
+        response = self.view(change_password)(self.request('post', data))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('old_password', response.data)
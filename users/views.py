@@ -4,7 +4,10 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
+from .hashing import set_password
+from .models import TokenUser
 from .serializers import (
+    CustomTokenObtainPairSerializer,
     UserRegistrationSerializer,
     UserProfileSerializer,
     UserUpdateSerializer,
@@ -14,19 +17,20 @@ from .serializers import (
 User = get_user_model()
 
 
+def get_stored_user(request):
+    """
+    ``request.user`` as stored in the database. A TokenUser from
+    StatelessJWTAuthentication holds the claims of when the token was issued,
+    which the profile and password views must neither show nor save.
+    """
+    if isinstance(request.user, TokenUser):
+        return User.objects.get(pk=request.user.pk)
+    return request.user
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
-    
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        if response.status_code == 200:
-            username = request.data.get('username')
-            try:
-                user = User.objects.get(username=username)
-                user_serializer = UserProfileSerializer(user)
-                response.data['user'] = user_serializer.data
-            except User.DoesNotExist:
-                pass
-        return response
+    # Adds the profile of the authenticated user without querying it again
+    serializer_class = CustomTokenObtainPairSerializer
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -50,7 +54,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        return get_stored_user(self.request)
     
     def get_serializer_class(self):
         if self.request.method == 'PUT' or self.request.method == 'PATCH':
@@ -61,11 +65,11 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
-    serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
+    user = get_stored_user(request)
+    serializer = ChangePasswordSerializer(data=request.data, context={'request': request, 'user': user})
     
     if serializer.is_valid():
-        user = request.user
-        user.set_password(serializer.validated_data['new_password'])
+        set_password(user, serializer.validated_data['new_password'])
         user.save()
         
         return Response({'message': 'Password changed successfully'}, status=status.HTTP_200_OK)
@@ -77,5 +81,5 @@ def change_password(request):
 @permission_classes([IsAuthenticated])
 def user_profile(request):
     """Get current user profile"""
-    serializer = UserProfileSerializer(request.user)
+    serializer = UserProfileSerializer(get_stored_user(request))
     return Response(serializer.data)